@@ -1,14 +1,14 @@
 ﻿from __future__ import annotations
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
-from django.utils.encoding import force_bytes, force_str
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from rest_framework import generics, permissions, response, status
 from rest_framework.views import APIView
 
+from shop.emails import queue_password_reset
+
 from .serializers import (
     PasswordResetConfirmSerializer,
     PasswordResetRequestSerializer,
@@ -53,25 +53,7 @@ class PasswordResetRequestView(APIView):
         email = serializer.validated_data["email"]
         user = User.objects.filter(email__iexact=email, is_active=True).first()
         if user:
-            token_generator = PasswordResetTokenGenerator()
-            token = token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            reset_url = (
-                f"{settings.FRONTEND_PASSWORD_RESET_URL}?uid={uid}&token={token}"
-            )
-            subject = "Password reset request"
-            message = (
-                "You requested a password reset.\n\n"
-                f"Follow the link to set a new password:\n{reset_url}\n\n"
-                "If you did not send this request, simply ignore this email."
-            )
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=True,
-            )
+            queue_password_reset(user)
         return response.Response(
             {"detail": "If the email is registered, we have sent reset instructions."},
             status=status.HTTP_202_ACCEPTED,
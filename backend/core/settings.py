@@ -5,9 +5,11 @@ Django settings for the ecommerce backend.
 from __future__ import annotations
 
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 from sentry_sdk import init as sentry_init
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -46,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "django_filters",
@@ -201,6 +204,43 @@ CACHES = {
     }
 }
 
+# Anonymous catalog responses (products, categories) cached with tag-based
+# invalidation, see shop/cache.py.
+CATALOG_CACHE_ENABLED = getenv_bool("CATALOG_CACHE_ENABLED", True)
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+
+# Responses to writes sent with an Idempotency-Key header, see
+# shop/idempotency.py.
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "30"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+# Cohort and repeat-customer metrics per date range, see shop/analytics.py.
+CUSTOMER_ANALYTICS_CACHE_TIMEOUT = int(
+    os.getenv("CUSTOMER_ANALYTICS_CACHE_TIMEOUT", "3600")
+)
+
+# Per-user sets of purchased product ids behind verified-purchase checks,
+# see shop/utils.py; dropped whenever one of the user's orders changes.
+PURCHASES_CACHE_TIMEOUT = int(os.getenv("PURCHASES_CACHE_TIMEOUT", str(24 * 60 * 60)))
+
+# Completed buckets of the sales time series, see shop/sales.py. Rollup
+# writes drop them; the expiry bounds how long a missed drop can linger.
+SALES_BUCKET_CACHE_TIMEOUT = int(
+    os.getenv("SALES_BUCKET_CACHE_TIMEOUT", str(24 * 60 * 60))
+)
+
+# How long reviews claimed from the moderation queue stay reserved for the
+# moderator who claimed them, see shop/moderation.py.
+REVIEW_CLAIM_LEASE_SECONDS = int(os.getenv("REVIEW_CLAIM_LEASE_SECONDS", "900"))
+
+# "redis" keeps anonymous carts in Redis hashes until checkout or sign-in
+# (shop/carts.py); "database" stores every cart in PostgreSQL.
+GUEST_CART_BACKEND = os.getenv("GUEST_CART_BACKEND", "database")
+GUEST_CART_TTL = int(os.getenv("GUEST_CART_TTL", str(7 * 24 * 60 * 60)))
+# Database carts idle for longer than this are removed by purge_abandoned_carts.
+CART_RETENTION_DAYS = int(os.getenv("CART_RETENTION_DAYS", "30"))
+
 
 CSRF_TRUSTED_ORIGINS = [
     origin.strip()
@@ -217,6 +257,8 @@ if not CORS_ALLOW_ALL_ORIGINS:
     ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
 
 
 ALGOLIA_APP_ID = os.getenv("ALGOLIA_APP_ID", "")
@@ -224,6 +266,19 @@ ALGOLIA_ADMIN_API_KEY = os.getenv("ALGOLIA_ADMIN_API_KEY", "")
 ALGOLIA_INDEX_NAME = os.getenv("ALGOLIA_INDEX_NAME", "shop_products")
 ALGOLIA_ENABLED = bool(ALGOLIA_APP_ID and ALGOLIA_ADMIN_API_KEY and ALGOLIA_INDEX_NAME)
 
+# Typo-tolerant (pg_trgm) matching for ?search= and /api/products/suggest/.
+PRODUCT_SEARCH_FUZZY = getenv_bool("PRODUCT_SEARCH_FUZZY", True)
+
+# In-process fallback search (/api/products/autocomplete/), see
+# shop/local_search.py. Gunicorn workers share the snapshot in this directory.
+LOCAL_SEARCH_ENABLED = getenv_bool("LOCAL_SEARCH_ENABLED", True)
+LOCAL_SEARCH_DIR = Path(
+    os.getenv("LOCAL_SEARCH_DIR", Path(tempfile.gettempdir()) / "shopster-search")
+)
+LOCAL_SEARCH_JOURNAL_MAX_BYTES = int(
+    os.getenv("LOCAL_SEARCH_JOURNAL_MAX_BYTES", str(2 * 1024 * 1024))
+)
+
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
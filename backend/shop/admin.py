@@ -1,17 +1,19 @@
 from django.contrib import admin, messages
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .models import (
     Cart,
     CartItem,
     Category,
+    DailySalesRollup,
     Order,
     OrderItem,
     Product,
     ProductImage,
     ProductReview,
+    shard_stock_sum,
 )
+from .moderation import moderate_reviews
 
 # Admin branding
 admin.site.site_header = "Shopster Admin"
@@ -184,7 +186,7 @@ class ProductAdmin(SoftDeleteAdmin):
         "sku",
         "category",
         "price",
-        "stock",
+        "total_stock",
         "is_active",
         "is_archived",
         "deleted_at",
@@ -193,7 +195,21 @@ class ProductAdmin(SoftDeleteAdmin):
     search_fields = ("name", "sku", "slug")
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline]
-    readonly_fields = ("deleted_at",)
+    readonly_fields = ("deleted_at", "stock_shard_count")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(shard_stock=shard_stock_sum())
+
+    def get_readonly_fields(self, request, obj=None):
+        fields = super().get_readonly_fields(request, obj)
+        if obj is not None and obj.stock_shard_count:
+            # Sharded stock is changed with the shard_product_stock command.
+            fields = (*fields, "stock")
+        return fields
+
+    @admin.display(description=_("Stock"))
+    def total_stock(self, obj):
+        return obj.total_stock
 
 
 class CartItemInline(admin.TabularInline):
@@ -244,6 +260,12 @@ class OrderAdmin(SoftDeleteAdmin):
     )
     inlines = [OrderItemInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Orders added by hand count once their inline lines are saved.
+        if not change and form.instance.counts_as_sale:
+            DailySalesRollup.record(form.instance.sales_contribution())
+
     @admin.display(description="Status")
     def display_status(self, obj: Order):
         return ORDER_STATUS_LABELS.get(obj.status, obj.status)
@@ -290,35 +312,37 @@ class ProductReviewAdmin(SoftDeleteAdmin):
         "updated_at",
         "moderated_at",
         "moderated_by",
+        "claimed_by",
+        "claimed_until",
         "deleted_at",
     )
     actions = SoftDeleteAdmin.actions + ["approve_reviews", "reject_reviews"]
 
     @admin.action(description=_("Approve selected reviews"))
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(
-            moderation_status=ProductReview.ModerationStatus.APPROVED,
-            moderated_by=request.user,
-            moderated_at=timezone.now(),
+        updated = moderate_reviews(
+            queryset,
+            status=ProductReview.ModerationStatus.APPROVED,
+            moderator=request.user,
         )
         if updated:
             self.message_user(
                 request,
-                _("Approved %(count)d review(s).") % {"count": updated},
+                _("Approved %(count)d review(s).") % {"count": len(updated)},
                 messages.SUCCESS,
             )
 
     @admin.action(description=_("Reject selected reviews"))
     def reject_reviews(self, request, queryset):
-        updated = queryset.update(
-            moderation_status=ProductReview.ModerationStatus.REJECTED,
-            moderated_by=request.user,
-            moderated_at=timezone.now(),
+        updated = moderate_reviews(
+            queryset,
+            status=ProductReview.ModerationStatus.REJECTED,
+            moderator=request.user,
         )
         if updated:
             self.message_user(
                 request,
-                _("Rejected %(count)d review(s).") % {"count": updated},
+                _("Rejected %(count)d review(s).") % {"count": len(updated)},
                 messages.WARNING,
             )
 
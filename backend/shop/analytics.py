@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Order
+from .sales import day_bounds
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "stats:customers"
+CHUNK_SIZE = 50_000
+PERCENTILES = (50, 75, 90, 95, 99)
+SECONDS_PER_DAY = 86_400
+
+
+@dataclass
+class OrderArrays:
+    """One element per order; ``customer`` indexes distinct customers."""
+
+    customer: np.ndarray
+    placed: np.ndarray
+    month: np.ndarray
+    amount: np.ndarray
+    currency: np.ndarray
+    currencies: list[str]
+
+    def __len__(self) -> int:
+        return len(self.customer)
+
+
+def _month_number(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_label(number: int) -> str:
+    return f"{number // 12:04d}-{number % 12 + 1:02d}"
+
+
+def analysed_orders(first_day: date | None = None, last_day: date | None = None):
+    orders = Order.objects.exclude(status__in=Order.SALES_EXCLUDED_STATUSES)
+    if first_day:
+        orders = orders.filter(placed_at__gte=day_bounds(first_day, first_day)[0])
+    if last_day:
+        orders = orders.filter(placed_at__lt=day_bounds(last_day, last_day)[1])
+    return orders
+
+
+def load_order_arrays(
+    first_day: date | None = None,
+    last_day: date | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> OrderArrays:
+    """
+    Stream orders into preallocated NumPy arrays ``chunk_size`` rows at a
+    time, so memory stays at a few dozen bytes per order. Customers are the
+    user when the order has one, otherwise the lower-cased email.
+    """
+    orders = analysed_orders(first_day, last_day)
+    total = orders.count()
+    customer = np.empty(total, dtype=np.int64)
+    placed = np.empty(total, dtype=np.float64)
+    month = np.empty(total, dtype=np.int32)
+    amount = np.empty(total, dtype=np.float64)
+    currency = np.empty(total, dtype=np.int16)
+    customers: dict[int | str, int] = {}
+    currencies: dict[str, int] = {}
+
+    rows = (
+        orders.annotate(
+            month_start=TruncMonth("placed_at", tzinfo=timezone.get_current_timezone())
+        )
+        .order_by()
+        .values_list(
+            "user_id",
+            "customer_email",
+            "placed_at",
+            "month_start",
+            "total_amount",
+            "currency",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    # Orders placed after the count are left for the next run.
+    rows = islice(rows, total)
+    filled = 0
+    while batch := list(islice(rows, chunk_size)):
+        end = filled + len(batch)
+        user_ids, emails, moments, months, totals, codes = zip(*batch, strict=True)
+        customer[filled:end] = [
+            customers.setdefault(
+                user_id if user_id is not None else email.lower(), len(customers)
+            )
+            for user_id, email in zip(user_ids, emails, strict=True)
+        ]
+        placed[filled:end] = [moment.timestamp() for moment in moments]
+        month[filled:end] = [_month_number(value) for value in months]
+        amount[filled:end] = totals
+        currency[filled:end] = [
+            currencies.setdefault(code, len(currencies)) for code in codes
+        ]
+        filled = end
+    return OrderArrays(
+        customer=customer[:filled],
+        placed=placed[:filled],
+        month=month[:filled],
+        amount=amount[:filled],
+        currency=currency[:filled],
+        currencies=list(currencies),
+    )
+
+
+def _percentiles(values: np.ndarray) -> dict[str, float]:
+    points = np.percentile(values, PERCENTILES)
+    return {
+        f"p{rank}": round(float(point), 2)
+        for rank, point in zip(PERCENTILES, points, strict=True)
+    }
+
+
+def customer_metrics(
+    arrays: OrderArrays, max_offset: int = 12, last_month: int | None = None
+) -> dict:
+    """
+    Monthly cohorts, repeat-purchase rate, time to second order and revenue
+    percentiles, computed with array operations only.
+    """
+    if not len(arrays):
+        return {
+            "orders": 0,
+            "customers": 0,
+            "repeat_customers": 0,
+            "repeat_purchase_rate": None,
+            "time_to_second_order_days": None,
+            "revenue_percentiles": [],
+            "cohorts": [],
+        }
+    # Orders grouped by customer, oldest first within each customer.
+    order = np.lexsort((arrays.placed, arrays.customer))
+    customer = arrays.customer[order]
+    placed = arrays.placed[order]
+    month = arrays.month[order]
+    first = np.ones(len(customer), dtype=bool)
+    first[1:] = customer[1:] != customer[:-1]
+    starts = np.flatnonzero(first)
+    counts = np.diff(np.append(starts, len(customer)))
+
+    repeat = counts >= 2
+    gaps = (placed[starts[repeat] + 1] - placed[starts[repeat]]) / SECONDS_PER_DAY
+    time_to_second = None
+    if len(gaps):
+        time_to_second = {
+            "mean": round(float(gaps.mean()), 2),
+            **_percentiles(gaps),
+        }
+
+    # Each customer's cohort is the month of their first order; a customer
+    # counts once per month offset they ordered in.
+    width = max_offset + 1
+    customer_index = np.repeat(np.arange(len(starts)), counts)
+    offset = month - np.repeat(month[starts], counts)
+    keep = offset < width
+    active = np.unique(customer_index[keep] * width + offset[keep])
+    cohort_months, cohort_of_customer = np.unique(month[starts], return_inverse=True)
+    matrix = np.bincount(
+        cohort_of_customer[active // width] * width + active % width,
+        minlength=len(cohort_months) * width,
+    ).reshape(len(cohort_months), width)
+    last_month = int(month.max()) if last_month is None else last_month
+    cohorts = []
+    for row, cohort_month in zip(matrix, cohort_months, strict=True):
+        size = int(row[0])
+        observed = min(width, last_month - int(cohort_month) + 1)
+        cohorts.append(
+            {
+                "month": _month_label(int(cohort_month)),
+                "customers": size,
+                "retention": [
+                    round(float(value) / size, 4) for value in row[:observed]
+                ],
+            }
+        )
+
+    revenue = []
+    for code, name in enumerate(arrays.currencies):
+        mask = arrays.currency == code
+        per_customer = np.bincount(arrays.customer[mask], weights=arrays.amount[mask])
+        per_customer = per_customer[np.bincount(arrays.customer[mask]) > 0]
+        revenue.append(
+            {
+                "currency": name,
+                "orders": int(mask.sum()),
+                "revenue": round(float(arrays.amount[mask].sum()), 2),
+                "order_value": _percentiles(arrays.amount[mask]),
+                "customer_value": _percentiles(per_customer),
+            }
+        )
+
+    return {
+        "orders": len(arrays),
+        "customers": len(starts),
+        "repeat_customers": int(repeat.sum()),
+        "repeat_purchase_rate": round(float(repeat.mean()), 4),
+        "time_to_second_order_days": time_to_second,
+        "revenue_percentiles": revenue,
+        "cohorts": cohorts,
+    }
+
+
+def customer_analytics(
+    first_day: date | None = None,
+    last_day: date | None = None,
+    max_offset: int = 12,
+) -> dict:
+    """``customer_metrics`` for a date range, cached per range."""
+    key = f"{CACHE_PREFIX}:{first_day}:{last_day}:{max_offset}"
+    try:
+        cached = cache.get(key)
+    except Exception as exc:
+        logger.warning("Customer analytics cache unavailable: %s", exc)
+        cached = None
+    if cached is not None:
+        return cached
+    last_month = _month_number(last_day or timezone.localdate())
+    result = {
+        "date_from": first_day,
+        "date_to": last_day,
+        **customer_metrics(
+            load_order_arrays(first_day, last_day), max_offset, last_month
+        ),
+    }
+    try:
+        cache.set(key, result, settings.CUSTOMER_ANALYTICS_CACHE_TIMEOUT)
+    except Exception as exc:
+        logger.warning("Failed to cache customer analytics: %s", exc)
+    return result
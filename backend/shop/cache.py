@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "catalog:response"
+TAG_PREFIX = "catalog:tag"
+CATALOG_TAG = "catalog"
+CATEGORIES_TAG = "categories"
+IGNORED_QUERY_PARAMS = {"format"}
+SALES_KEY_PREFIX = "stats:sales"
+SALES_INTERVALS = ("day", "week", "month")
+
+
+def product_tag(product_id) -> str:
+    return f"product:{product_id}"
+
+
+def category_tag(category_id) -> str:
+    return f"category:{category_id}"
+
+
+def redis_client():
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+
+
+def _tag_key(tag: str) -> str:
+    return f"{TAG_PREFIX}:{tag}"
+
+
+def build_cache_key(request, scope: str, lookup: str = "") -> str:
+    """Key a response by scope, host, lookup and the normalized query string."""
+    params = []
+    for name in sorted(request.query_params.keys()):
+        if name in IGNORED_QUERY_PARAMS:
+            continue
+        values = sorted(v.strip() for v in request.query_params.getlist(name))
+        values = [value for value in values if value]
+        if not values or (name == "page" and values == ["1"]):
+            continue
+        params.append(f"{name}={','.join(values)}")
+    raw = "&".join([request.get_host(), str(lookup), *params])
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{scope}:{digest}"
+
+
+def get_cached_payload(key: str):
+    return cache.get(key)
+
+
+def store_payload(key: str, payload, tags: Iterable[str]) -> None:
+    timeout = settings.CATALOG_CACHE_TIMEOUT
+    cache.set(key, payload, timeout)
+    client = redis_client()
+    try:
+        if client is not None:
+            pipe = client.pipeline()
+            for tag in tags:
+                pipe.sadd(_tag_key(tag), key)
+                pipe.expire(_tag_key(tag), timeout)
+            pipe.execute()
+        else:
+            for tag in tags:
+                members = cache.get(_tag_key(tag)) or set()
+                members.add(key)
+                cache.set(_tag_key(tag), members, timeout)
+    except Exception as exc:
+        # An untracked entry could outlive an invalidation, so drop it.
+        logger.warning("Failed to register catalog cache tags: %s", exc)
+        cache.delete(key)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Drop every cached response registered under any of ``tags``."""
+    tag_keys = [_tag_key(tag) for tag in tags]
+    client = redis_client()
+    try:
+        if client is not None:
+            keys = set()
+            for tag_key in tag_keys:
+                keys.update(member.decode() for member in client.smembers(tag_key))
+            client.delete(*tag_keys)
+        else:
+            keys = set()
+            for members in cache.get_many(tag_keys).values():
+                keys.update(members)
+            cache.delete_many(tag_keys)
+        if keys:
+            cache.delete_many(list(keys))
+    except Exception as exc:
+        logger.warning("Failed to invalidate catalog cache tags %s: %s", tags, exc)
+
+
+def invalidate_on_commit(*tags: str) -> None:
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def sales_bucket_start(day: date, interval: str) -> date:
+    """First day of the ``day``/``week`` (ISO, Monday)/``month`` holding ``day``."""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def sales_bucket_key(interval: str, currency: str, start: date) -> str:
+    return f"{SALES_KEY_PREFIX}:{interval}:{currency}:{start.isoformat()}"
+
+
+def invalidate_sales_buckets(days: Iterable[tuple[date, str]]) -> None:
+    """Drop the cached time-series buckets covering each ``(day, currency)``."""
+    keys = {
+        sales_bucket_key(interval, currency, sales_bucket_start(day, interval))
+        for day, currency in days
+        for interval in SALES_INTERVALS
+    }
+    if not keys:
+        return
+    try:
+        cache.delete_many(list(keys))
+    except Exception as exc:
+        logger.warning("Failed to invalidate sales buckets: %s", exc)
+
+
+def invalidate_sales_on_commit(days: Iterable[tuple[date, str]]) -> None:
+    days = set(days)
+    transaction.on_commit(lambda: invalidate_sales_buckets(days))
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous ``list``/``retrieve`` responses from the cache.
+
+    Subclasses describe which tags a response depends on via
+    ``get_list_cache_tags`` and ``get_detail_cache_tags``; signals drop the
+    tagged entries when the underlying rows change.
+    """
+
+    cache_scope = ""
+
+    def _cache_enabled(self, request) -> bool:
+        return settings.CATALOG_CACHE_ENABLED and not request.user.is_authenticated
+
+    def _cached_response(self, request, scope: str, lookup, render, get_tags):
+        if not self._cache_enabled(request):
+            return render()
+        key = build_cache_key(request, scope, lookup)
+        payload = get_cached_payload(key)
+        if payload is not None:
+            return Response(payload)
+        response = render()
+        if response.status_code == 200:
+            store_payload(key, response.data, get_tags(response.data))
+        return response
+
+    def get_list_cache_tags(self, data) -> list[str]:
+        return [CATALOG_TAG]
+
+    def get_detail_cache_tags(self, data) -> list[str]:
+        return [CATALOG_TAG]
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            request,
+            f"{self.cache_scope}:list",
+            "",
+            lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs),
+            self.get_list_cache_tags,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs.get(self.lookup_url_kwarg or self.lookup_field, "")
+        return self._cached_response(
+            request,
+            f"{self.cache_scope}:detail",
+            lookup,
+            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs),
+            self.get_detail_cache_tags,
+        )
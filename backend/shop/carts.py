@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+
+from .cache import redis_client
+from .models import Cart, CartItem, Product
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cart:guest"
+CREATED_FIELD = "created"
+UPDATED_FIELD = "updated"
+META_FIELDS = {CREATED_FIELD, UPDATED_FIELD}
+
+
+def _timestamp(value: bytes | str | None) -> datetime:
+    seconds = float(value) if value else time.time()
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+@dataclass
+class CartChanges:
+    """
+    Cart operations folded per product: ``increments`` are added to the
+    current quantity, ``quantities`` replace it and ``removals`` drop lines.
+    """
+
+    increments: dict[int, int] = field(default_factory=dict)
+    quantities: dict[int, int] = field(default_factory=dict)
+    removals: set[int] = field(default_factory=set)
+
+
+def fold_operations(operations: Iterable[dict]) -> CartChanges:
+    """
+    Reduce ``add``/``set``/``remove`` operations, applied in order, to at
+    most one change per product.
+    """
+    changes = CartChanges()
+    for operation in operations:
+        product_id = operation["product_id"]
+        quantity = operation.get("quantity", 1)
+        kind = operation["op"]
+        if kind == "add" and product_id in changes.quantities:
+            changes.quantities[product_id] += quantity
+        elif kind == "add" and product_id in changes.removals:
+            changes.removals.discard(product_id)
+            changes.quantities[product_id] = quantity
+        elif kind == "add":
+            changes.increments[product_id] = (
+                changes.increments.get(product_id, 0) + quantity
+            )
+        elif kind == "set" and quantity > 0:
+            changes.increments.pop(product_id, None)
+            changes.removals.discard(product_id)
+            changes.quantities[product_id] = quantity
+        else:
+            changes.increments.pop(product_id, None)
+            changes.quantities.pop(product_id, None)
+            changes.removals.add(product_id)
+    return changes
+
+
+def apply_changes(cart_id, changes: CartChanges) -> None:
+    """Apply folded changes to a database cart in at most three statements."""
+    with transaction.atomic():
+        if changes.removals:
+            CartItem.objects.filter(
+                cart_id=cart_id, product_id__in=changes.removals
+            ).delete()
+        if changes.quantities:
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in sorted(changes.quantities.items())
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity", "updated_at"],
+            )
+        CartItem.add_quantities(cart_id, changes.increments)
+
+
+@dataclass
+class GuestCart:
+    """
+    A Redis-resident cart shaped like ``Cart`` for ``CartSerializer``. Its
+    lines are unsaved ``CartItem`` instances whose id is the product id.
+    """
+
+    id: UUID
+    items: list[CartItem] = field(default_factory=list)
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    user = None
+
+    @property
+    def subtotal(self) -> Decimal:
+        return sum((item.subtotal for item in self.items), Decimal("0.00"))
+
+    @property
+    def total_items(self) -> int:
+        return sum(item.quantity for item in self.items)
+
+    def item(self, product_id: int) -> CartItem | None:
+        return next((i for i in self.items if i.product_id == product_id), None)
+
+
+class GuestCartStore:
+    """
+    Guest carts kept as Redis hashes ``{product_id: quantity}`` that expire
+    ``ttl`` seconds after their last use. Nothing reaches PostgreSQL until
+    the cart is checked out or claimed by a signed-in user (``persist``).
+    """
+
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+
+    def _key(self, cart_id) -> str:
+        return f"{KEY_PREFIX}:{cart_id}"
+
+    def create(self) -> GuestCart:
+        cart_id = uuid4()
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(cart_id), mapping={CREATED_FIELD: now, UPDATED_FIELD: now})
+        pipe.expire(self._key(cart_id), self.ttl)
+        pipe.execute()
+        return GuestCart(
+            id=cart_id, created_at=_timestamp(now), updated_at=_timestamp(now)
+        )
+
+    def quantities(self, cart_id) -> dict[str, bytes] | None:
+        """Raw hash contents, or ``None`` when the cart is not in Redis."""
+        pipe = self.client.pipeline()
+        pipe.hgetall(self._key(cart_id))
+        pipe.expire(self._key(cart_id), self.ttl)
+        data, _ = pipe.execute()
+        if not data:
+            return None
+        return {
+            (name.decode() if isinstance(name, bytes) else name): value
+            for name, value in data.items()
+        }
+
+    def load(self, cart_id) -> GuestCart | None:
+        data = self.quantities(cart_id)
+        if data is None:
+            return None
+        quantities = {
+            int(name): int(value)
+            for name, value in data.items()
+            if name not in META_FIELDS
+        }
+        products = (
+            Product.objects.filter(pk__in=quantities, is_active=True)
+            .prefetch_related("images")
+            .order_by("pk")
+        )
+        cart_id = UUID(str(cart_id))
+        items = [
+            CartItem(
+                id=product.pk,
+                cart_id=cart_id,
+                product=product,
+                quantity=quantities[product.pk],
+            )
+            for product in products
+        ]
+        return GuestCart(
+            id=cart_id,
+            items=items,
+            created_at=_timestamp(data.get(CREATED_FIELD)),
+            updated_at=_timestamp(data.get(UPDATED_FIELD)),
+        )
+
+    def set_quantity(self, cart_id, product_id: int, quantity: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(
+            self._key(cart_id),
+            mapping={str(product_id): quantity, UPDATED_FIELD: time.time()},
+        )
+        pipe.expire(self._key(cart_id), self.ttl)
+        pipe.execute()
+
+    def create_line(self, cart_id, product_id: int, quantity: int) -> bool:
+        """Add a line unless the product is already in the cart."""
+        pipe = self.client.pipeline()
+        pipe.hsetnx(self._key(cart_id), str(product_id), quantity)
+        pipe.hset(self._key(cart_id), UPDATED_FIELD, time.time())
+        pipe.expire(self._key(cart_id), self.ttl)
+        return bool(pipe.execute()[0])
+
+    def add(self, cart_id, product_id: int, quantity: int) -> int:
+        pipe = self.client.pipeline()
+        pipe.hincrby(self._key(cart_id), str(product_id), quantity)
+        pipe.hset(self._key(cart_id), UPDATED_FIELD, time.time())
+        pipe.expire(self._key(cart_id), self.ttl)
+        return int(pipe.execute()[0])
+
+    def apply(self, cart_id, changes: CartChanges) -> None:
+        key = self._key(cart_id)
+        pipe = self.client.pipeline()
+        if changes.removals:
+            pipe.hdel(key, *(str(product_id) for product_id in changes.removals))
+        for product_id, quantity in changes.increments.items():
+            pipe.hincrby(key, str(product_id), quantity)
+        pipe.hset(
+            key,
+            mapping={
+                **{str(pid): quantity for pid, quantity in changes.quantities.items()},
+                UPDATED_FIELD: time.time(),
+            },
+        )
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def remove(self, cart_id, product_id: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.hdel(self._key(cart_id), str(product_id))
+        pipe.hset(self._key(cart_id), UPDATED_FIELD, time.time())
+        pipe.expire(self._key(cart_id), self.ttl)
+        pipe.execute()
+
+    def delete(self, cart_id) -> bool:
+        return bool(self.client.delete(self._key(cart_id)))
+
+    def persist(self, cart_id, user=None) -> Cart | None:
+        """
+        Write the guest cart to PostgreSQL under the same id and drop it from
+        Redis once the surrounding transaction commits.
+        """
+        data = self.quantities(cart_id)
+        if data is None:
+            return None
+        quantities = {
+            int(name): int(value)
+            for name, value in data.items()
+            if name not in META_FIELDS
+        }
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(
+                pk=cart_id,
+                defaults={"user": user if user and user.is_authenticated else None},
+            )
+            active = Product.objects.filter(pk__in=quantities, is_active=True)
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(
+                        cart=cart,
+                        product_id=product_id,
+                        quantity=quantities[product_id],
+                    )
+                    for product_id in active.values_list("pk", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+            transaction.on_commit(lambda: self.delete(cart_id))
+        return cart
+
+
+def get_guest_store() -> GuestCartStore | None:
+    """The Redis guest cart store, or ``None`` when carts live in the database."""
+    if settings.GUEST_CART_BACKEND != "redis":
+        return None
+    client = redis_client()
+    if client is None:
+        return None
+    return GuestCartStore(client, settings.GUEST_CART_TTL)
+
+
+def create_guest_cart() -> GuestCart | None:
+    store = get_guest_store()
+    if store is None:
+        return None
+    try:
+        return store.create()
+    except Exception as exc:
+        # Fall back to a database cart rather than failing the request.
+        logger.warning("Failed to create guest cart in Redis: %s", exc)
+        return None
+
+
+def resolve_guest_cart(request, cart_id) -> GuestCart | None:
+    """
+    Return the Redis cart for an anonymous request. A signed-in user claiming
+    a guest cart gets it persisted instead, and ``None`` is returned so the
+    caller continues with the database cart.
+    """
+    store = get_guest_store()
+    if store is None:
+        return None
+    try:
+        if request.user.is_authenticated:
+            store.persist(cart_id, request.user)
+            return None
+        return store.load(cart_id)
+    except Exception as exc:
+        logger.warning("Failed to read guest cart from Redis: %s", exc)
+        return None
+
+
+def delete_guest_cart(cart_id) -> bool:
+    store = get_guest_store()
+    if store is None:
+        return False
+    try:
+        return store.delete(cart_id)
+    except Exception as exc:
+        logger.warning("Failed to delete guest cart from Redis: %s", exc)
+        return False
+
+
+def abandoned_carts(cutoff: datetime) -> QuerySet[Cart]:
+    """
+    Database carts untouched since ``cutoff`` that never became an order.
+    Item writes do not bump ``Cart.updated_at``, so lines are checked too.
+    """
+    return Cart.objects.filter(updated_at__lt=cutoff, order__isnull=True).exclude(
+        Exists(CartItem.objects.filter(cart=OuterRef("pk"), updated_at__gte=cutoff))
+    )
+
+
+def purge_abandoned_carts(cutoff: datetime, batch_size: int) -> tuple[int, int]:
+    """
+    Delete up to ``batch_size`` abandoned carts, oldest first, with their
+    items in one short transaction. Carts locked by a concurrent checkout
+    are skipped. Returns ``(carts, items)`` deleted; ``(0, 0)`` means done.
+    """
+    with transaction.atomic():
+        cart_ids = list(
+            abandoned_carts(cutoff)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("updated_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not cart_ids:
+            return 0, 0
+        _, deleted = Cart.objects.filter(pk__in=cart_ids).delete()
+    return (
+        deleted.get(Cart._meta.label, 0),
+        deleted.get(CartItem._meta.label, 0),
+    )
+
+
+def persist_guest_cart(cart_id, user=None) -> Cart | None:
+    store = get_guest_store()
+    if store is None:
+        return None
+    try:
+        return store.persist(cart_id, user)
+    except Exception as exc:
+        logger.warning("Failed to persist guest cart: %s", exc)
+        return None
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import EmailOutbox, Order
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# How long a claimed batch stays hidden from other workers while it is sent.
+SEND_LEASE_SECONDS = 300
+
+
+@dataclass
+class OutboxDepth:
+    due: int
+    deferred: int
+    failed: int
+
+
+def queue_email(
+    subject: str, body: str, recipients: Iterable[str], from_email: str = ""
+) -> EmailOutbox | None:
+    """
+    Store an email for ``send_queued_emails``. Call it inside the transaction
+    that makes the email true, so it is sent only if that transaction commits.
+    """
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+
+
+def password_setup_url(user) -> str:
+    token = PasswordResetTokenGenerator().make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    return f"{settings.FRONTEND_PASSWORD_RESET_URL}?uid={uid}&token={token}"
+
+
+def queue_order_confirmation(order: Order) -> EmailOutbox | None:
+    if not order.customer_email:
+        return None
+    items = order.items.all()
+    lines = [
+        f"- {item.product_name} x {item.quantity} - {item.line_total} {order.currency}"
+        for item in items
+    ]
+    items_block = "\n".join(lines) if lines else "Cart is empty."
+    message = (
+        f"Hello, {order.shipping_full_name}!\n\n"
+        f"Thank you for your order #{order.pk}.\n\n"
+        f"Order summary:\n{items_block}\n\n"
+        f"Subtotal: {order.subtotal_amount} {order.currency}\n"
+        f"Shipping: {order.shipping_amount} {order.currency}\n"
+        f"Total: {order.total_amount} {order.currency}\n\n"
+        "We will contact you shortly to confirm the details.\n"
+        "If you did not place this order, please ignore this email."
+    )
+    return queue_email(
+        f"Order confirmation #{order.pk}", message, [order.customer_email]
+    )
+
+
+def queue_account_setup(user) -> EmailOutbox | None:
+    if not getattr(user, "email", None):
+        return None
+    full_name = user.get_full_name() or user.get_username()
+    message = (
+        f"Здравствуйте, {full_name}!\n\n"
+        "Для удобства мы создали для вас аккаунт в Shopster, чтобы вы могли "
+        "отслеживать свои заказы.\n"
+        "Перейдите по ссылке, чтобы придумать пароль и завершить регистрацию:\n"
+        f"{password_setup_url(user)}\n\n"
+        "Если вы не оформляли заказ или не хотите создавать аккаунт, просто "
+        "проигнорируйте это письмо."
+    )
+    return queue_email("Добро пожаловать в Shopster", message, [user.email])
+
+
+def queue_password_reset(user) -> EmailOutbox | None:
+    message = (
+        "You requested a password reset.\n\n"
+        f"Follow the link to set a new password:\n{password_setup_url(user)}\n\n"
+        "If you did not send this request, simply ignore this email."
+    )
+    return queue_email("Password reset request", message, [user.email])
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, RETRY_MAX_SECONDS))
+
+
+def _defer(entry: EmailOutbox, exc: Exception, now: datetime) -> None:
+    entry.attempts += 1
+    entry.last_error = str(exc)[:1000]
+    if entry.attempts >= MAX_ATTEMPTS:
+        entry.failed_at = now
+    else:
+        entry.available_at = now + retry_delay(entry.attempts)
+
+
+def send_queued_emails(batch_size: int = OUTBOX_BATCH_SIZE) -> tuple[int, int]:
+    """
+    Deliver one batch of due emails over a single mail connection and return
+    how many were sent and how many were deferred.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and leased by
+    moving ``available_at`` ``SEND_LEASE_SECONDS`` ahead, then the claim
+    commits: no row lock is held while talking to the mail server, and other
+    workers skip the leased rows. A worker that dies mid-batch leaves its
+    rows to be retried once the lease runs out. Failed emails are retried
+    with exponential backoff up to ``MAX_ATTEMPTS``.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(failed_at__isnull=True, available_at__lte=now)
+            .order_by("available_at", "pk")[:batch_size]
+        )
+        if not entries:
+            return 0, 0
+        EmailOutbox.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            available_at=now + timedelta(seconds=SEND_LEASE_SECONDS)
+        )
+
+    sent: list[int] = []
+    deferred: list[EmailOutbox] = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("Failed to open the mail connection: %s", exc)
+        for entry in entries:
+            _defer(entry, exc, now)
+        deferred = entries
+    else:
+        try:
+            for entry in entries:
+                message = EmailMessage(
+                    subject=entry.subject,
+                    body=entry.body,
+                    from_email=entry.from_email,
+                    to=entry.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as exc:
+                    logger.warning("Failed to send email %s: %s", entry.pk, exc)
+                    _defer(entry, exc, now)
+                    deferred.append(entry)
+                else:
+                    sent.append(entry.pk)
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        if sent:
+            EmailOutbox.objects.filter(pk__in=sent).delete()
+        if deferred:
+            EmailOutbox.objects.bulk_update(
+                deferred, ["attempts", "last_error", "available_at", "failed_at"]
+            )
+    return len(sent), len(deferred)
+
+
+def outbox_depth() -> OutboxDepth:
+    now = timezone.now()
+    pending = EmailOutbox.objects.filter(failed_at__isnull=True)
+    return OutboxDepth(
+        due=pending.filter(available_at__lte=now).count(),
+        deferred=pending.filter(available_at__gt=now).count(),
+        failed=EmailOutbox.objects.filter(failed_at__isnull=False).count(),
+    )
@@ -1,9 +1,10 @@
 ﻿from __future__ import annotations
 
 import django_filters
-from django.db.models import Q, QuerySet
+from django.db.models import Exists, OuterRef, Q, QuerySet
 
-from .models import Product
+from .fulltext import search_products
+from .models import Product, ProductStockShard
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -33,7 +34,12 @@ class ProductFilter(django_filters.FilterSet):
         if value is None:
             return queryset
         if value:
-            return queryset.filter(stock__gt=0)
+            sharded_stock = Exists(
+                ProductStockShard.objects.filter(product=OuterRef("pk"), stock__gt=0)
+            )
+            return queryset.filter(
+                Q(stock__gt=0) | Q(stock_shard_count__gt=0) & sharded_stock
+            )
         return queryset
 
     def filter_search(
@@ -44,6 +50,9 @@ class ProductFilter(django_filters.FilterSet):
         sanitized = value.strip()
         if not sanitized:
             return queryset
+        ranked = search_products(queryset, sanitized)
+        if ranked is not None:
+            return ranked
         variants = {sanitized, sanitized.lower(), sanitized.upper()}
         variants.add(sanitized.replace("ё", "е"))
         variants.add(sanitized.replace("е", "ё"))
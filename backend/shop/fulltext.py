@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+
+SEARCH_CONFIGS = ("russian", "simple")
+TOKEN_RE = re.compile(r"\w+")
+
+# Per database alias: whether the pg_trgm extension is installed.
+_trigram_available: dict[str, bool] = {}
+
+
+def normalize_text(value: str) -> str:
+    """Fold ``ё`` to ``е`` the same way the ``search_vector`` trigger does."""
+    return value.replace("ё", "е").replace("Ё", "Е")
+
+
+def is_supported(queryset: QuerySet) -> bool:
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def fuzzy_enabled(queryset: QuerySet) -> bool:
+    """Trigram matching needs PostgreSQL with ``pg_trgm`` (migration 0009)."""
+    if not settings.PRODUCT_SEARCH_FUZZY or not is_supported(queryset):
+        return False
+    alias = queryset.db
+    if alias not in _trigram_available:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[alias] = cursor.fetchone() is not None
+    return _trigram_available[alias]
+
+
+def build_search_query(value: str) -> SearchQuery | None:
+    """
+    Turn user input into a prefix tsquery (``term:* & term:*``) over both
+    the stemmed ``russian`` and the verbatim ``simple`` configurations.
+
+    Only word characters reach the raw query, so user input cannot inject
+    tsquery operators. Returns ``None`` when nothing searchable is left.
+    """
+    tokens = TOKEN_RE.findall(normalize_text(value).lower())
+    if not tokens:
+        return None
+    raw = " & ".join(f"{token}:*" for token in tokens)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw, config=config, search_type="raw")
+        query = part if query is None else query | part
+    return query
+
+
+def search_products(queryset: QuerySet, value: str) -> QuerySet | None:
+    """
+    Filter products through the GIN-indexed ``search_vector`` column and
+    annotate ``search_rank``. Returns ``None`` when full-text search cannot
+    handle the input so the caller can fall back to substring matching.
+
+    With ``pg_trgm`` available, names and SKUs that are only similar to the
+    input (typos) match too; each condition is served by its own GIN index
+    and the planner combines them with a bitmap OR.
+    """
+    if not is_supported(queryset):
+        return None
+    query = build_search_query(value)
+    if query is None:
+        return None
+    rank = SearchRank(F("search_vector"), query)
+    condition = Q(search_vector=query)
+    if fuzzy_enabled(queryset):
+        term = normalize_text(value)
+        condition |= Q(name__trigram_word_similar=term) | Q(sku__trigram_similar=value)
+        rank = rank + TrigramWordSimilarity(term, "name")
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+def suggest_product_names(
+    queryset: QuerySet, value: str, limit: int
+) -> list[dict[str, object]]:
+    """Return the product names closest to a possibly misspelled ``value``."""
+    value = normalize_text(value.strip())
+    if not value:
+        return []
+    if fuzzy_enabled(queryset):
+        rows = (
+            queryset.filter(name__trigram_word_similar=value)
+            .annotate(similarity=TrigramWordSimilarity(value, "name"))
+            .order_by("-similarity", "name")
+            .values("id", "name", "slug", "similarity")
+        )
+    else:
+        rows = (
+            queryset.filter(name__icontains=value)
+            .order_by("name")
+            .values("id", "name", "slug")
+        )
+    suggestions = []
+    for row in rows[:limit]:
+        similarity = row.get("similarity")
+        row["similarity"] = round(similarity, 3) if similarity is not None else None
+        suggestions.append(row)
+    return suggestions
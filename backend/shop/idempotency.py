@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+KEY_PREFIX = "idempotency"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+# Response headers worth replaying; everything else is regenerated.
+REPLAYED_HEADERS = ("Location",)
+
+
+def _cache_key(request, key: str) -> str:
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    raw = "\n".join([request.method, request.path, str(user), key])
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{digest}"
+
+
+def _fingerprint(request) -> str:
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(stored: dict) -> Response:
+    headers = {**stored["headers"], REPLAYED_HEADER: "true"}
+    return Response(stored["data"], status=stored["status"], headers=headers)
+
+
+def _mismatch() -> Response:
+    return Response(
+        {"detail": f"{HEADER} was already used for a different request."},
+        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    )
+
+
+def _release(lock_key: str, token: str) -> None:
+    try:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception as exc:
+        logger.warning("Failed to release idempotency lock: %s", exc)
+
+
+def _store(result_key: str, lock_key: str, token: str, stored: dict) -> None:
+    try:
+        cache.set(result_key, stored, settings.IDEMPOTENCY_TTL)
+    except Exception as exc:
+        logger.warning("Failed to store idempotent response: %s", exc)
+    _release(lock_key, token)
+
+
+def idempotent(action):
+    """
+    Honour an ``Idempotency-Key`` header on a viewset write action.
+
+    The first request with a key takes a short in-flight lock in the cache
+    (Redis), runs the action and, once its transaction commits, stores the
+    response for ``IDEMPOTENCY_TTL`` seconds. Retries replay the stored
+    response; duplicates that arrive while the first is still running wait
+    for its result instead of competing for the same database rows. Without
+    the header, or when the cache is unavailable, the action runs as usual.
+    """
+
+    @functools.wraps(action)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER, "").strip()
+        if not key:
+            return action(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result_key = _cache_key(request, key)
+        lock_key = f"{result_key}:lock"
+        fingerprint = _fingerprint(request)
+        token = uuid4().hex
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            try:
+                stored = cache.get(result_key)
+                acquired = (
+                    None
+                    if stored
+                    else cache.add(lock_key, token, settings.IDEMPOTENCY_LOCK_TIMEOUT)
+                )
+            except Exception as exc:
+                logger.warning("Idempotency cache unavailable: %s", exc)
+                return action(self, request, *args, **kwargs)
+            if stored:
+                if stored["fingerprint"] != fingerprint:
+                    return _mismatch()
+                return _replay(stored)
+            # ``add`` returns None when django-redis swallows a connection
+            # error: run the action without idempotency guarantees.
+            if acquired is not False:
+                break
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": f"A request with this {HEADER} is in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            response = action(self, request, *args, **kwargs)
+        except Exception:
+            _release(lock_key, token)
+            raise
+        if response.status_code >= 500:
+            _release(lock_key, token)
+            return response
+        stored = {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "data": response.data,
+            "headers": {
+                name: response[name] for name in REPLAYED_HEADERS if name in response
+            },
+        }
+        # Published after commit so a replay never points at rolled-back rows.
+        transaction.on_commit(
+            functools.partial(_store, result_key, lock_key, token, stored)
+        )
+        return response
+
+    return wrapper
@@ -0,0 +1,688 @@
+"""
+In-process product search used when Algolia is disabled or unreachable.
+
+The index is built from the same ``serialize_product`` records that are pushed
+to Algolia and lives in two files under ``settings.LOCAL_SEARCH_DIR``:
+
+* an immutable binary snapshot (sorted term dictionary, postings and the
+  records themselves) that every gunicorn worker memory-maps, so the pages are
+  shared through the OS page cache instead of being copied per process;
+* an append-only journal of product changes written from the product signals.
+  Workers replay new journal lines into a small in-memory overlay before each
+  query. ``build_local_search_index --compact --loop`` folds the journal into
+  a fresh snapshot in the background once it grows past
+  ``settings.LOCAL_SEARCH_JOURNAL_MAX_BYTES``; requests only ever append.
+
+Queries use Algolia's ``prefixLast`` semantics (every word must match, the
+last one as a prefix) and rank documents with field-weighted BM25.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .fulltext import TOKEN_RE, normalize_text
+from .models import Product, shard_stock_sum
+from .search import serialize_products
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "products.idx"
+JOURNAL_NAME = "products.journal"
+LOCK_NAME = "products.lock"
+BUILD_LOCK_NAME = "products.build.lock"
+
+MAGIC = b"SHOPIDX2"
+# Layout: header, product ids (uint32[documents], ascending), document lengths
+# (float32[documents]), record table, term table, then a blob holding the
+# JSON records, term strings and postings referenced by the tables.
+# magic, documents, terms, average document length, record table, term table
+HEADER = struct.Struct("<8sIIdQQ")
+# record offset, record length
+RECORD_ENTRY = struct.Struct("<QI")
+# term offset, term length, postings offset, postings count
+TERM_ENTRY = struct.Struct("<QIQI")
+
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "sku": 3.0,
+    "category": 2.0,
+    "short_description": 1.0,
+    "description": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+# Probe a posting list instead of scanning it when it is this many times
+# longer than the candidate set.
+PROBE_RATIO = 16
+RECORDS_CHUNK_SIZE = 500
+
+Record = dict[str, Any]
+
+
+def tokenize(value: str) -> list[str]:
+    return TOKEN_RE.findall(normalize_text(value).lower())
+
+
+def analyze(record: Record) -> tuple[dict[str, float], float]:
+    """Weighted term frequencies and the weighted length of a record."""
+    frequencies: dict[str, float] = defaultdict(float)
+    length = 0.0
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(str(record.get(field) or "")):
+            frequencies[token] += weight
+            length += weight
+    return dict(frequencies), length
+
+
+def inverse_document_frequency(df: int, documents: int) -> float:
+    return math.log(1 + (documents - df + 0.5) / (df + 0.5))
+
+
+def bm25(tf: float, idf: float, length: float, avgdl: float) -> float:
+    norm = 1 - BM25_B + BM25_B * (length / avgdl if avgdl else 1)
+    return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+
+def iter_product_records(product_ids: Iterable[int] | None = None) -> Iterator[Record]:
+    queryset = Product.objects.filter(is_active=True).order_by("pk")
+    if product_ids is not None:
+        queryset = queryset.filter(pk__in=list(product_ids))
+    return serialize_products(queryset, chunk_size=RECORDS_CHUNK_SIZE)
+
+
+def _atomic_write(path: Path, chunks: Iterable[bytes]) -> None:
+    handle = tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", delete=False
+    )
+    try:
+        with handle:
+            for chunk in chunks:
+                handle.write(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+
+def _align(buffer: bytearray, base: int, boundary: int) -> int:
+    """Pad ``buffer`` so the next write lands on an aligned file offset."""
+    buffer += b"\0" * (-(base + len(buffer)) % boundary)
+    return base + len(buffer)
+
+
+def write_snapshot(path: Path, records: Iterable[Record]) -> int:
+    """Serialize ``records`` into a snapshot file and return their number."""
+    product_ids = array("I")
+    lengths = array("f")
+    payloads: list[bytes] = []
+    postings: dict[bytes, list[tuple[int, float]]] = defaultdict(list)
+    # Documents are stored in product id order so ids can be binary-searched.
+    for record in sorted(records, key=lambda record: int(record["objectID"])):
+        frequencies, length = analyze(record)
+        for term, tf in frequencies.items():
+            postings[term.encode("utf-8")].append((len(payloads), tf))
+        payloads.append(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        product_ids.append(int(record["objectID"]))
+        lengths.append(length)
+
+    # Terms are ordered by their UTF-8 bytes, which keeps prefixes contiguous.
+    terms = sorted(postings)
+    doc_count = len(payloads)
+    ids_offset = HEADER.size
+    lengths_offset = ids_offset + 4 * doc_count
+    records_offset = lengths_offset + 4 * doc_count
+    terms_offset = records_offset + RECORD_ENTRY.size * doc_count
+    blob_offset = terms_offset + TERM_ENTRY.size * len(terms)
+    record_table = bytearray()
+    term_table = bytearray()
+    blob = bytearray()
+    for payload in payloads:
+        record_table += RECORD_ENTRY.pack(blob_offset + len(blob), len(payload))
+        blob += payload
+    for term in terms:
+        entries = postings[term]
+        term_at = blob_offset + len(blob)
+        blob += term
+        # Postings are read through zero-copy ``memoryview.cast`` slices.
+        postings_at = _align(blob, blob_offset, 4)
+        blob += array("I", (doc for doc, _ in entries)).tobytes()
+        blob += array("f", (tf for _, tf in entries)).tobytes()
+        term_table += TERM_ENTRY.pack(term_at, len(term), postings_at, len(entries))
+
+    avgdl = sum(lengths) / doc_count if doc_count else 0.0
+    header = HEADER.pack(
+        MAGIC, doc_count, len(terms), avgdl, records_offset, terms_offset
+    )
+    _atomic_write(
+        path,
+        [
+            header,
+            product_ids.tobytes(),
+            lengths.tobytes(),
+            record_table,
+            term_table,
+            blob,
+        ],
+    )
+    return doc_count
+
+
+class Snapshot:
+    """Read-only view over a memory-mapped snapshot file."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as handle:
+            self.stat_key = _stat_key(os.fstat(handle.fileno()))
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.doc_count,
+            self.term_count,
+            self.avgdl,
+            self.records_offset,
+            self.terms_offset,
+        ) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a product search snapshot")
+        self.view = memoryview(self.buffer)
+        ids_end = HEADER.size + 4 * self.doc_count
+        self.product_ids = self.view[HEADER.size : ids_end].cast("I")
+        self.lengths = self.view[ids_end : ids_end + 4 * self.doc_count].cast("f")
+
+    def close(self) -> None:
+        self.product_ids.release()
+        self.lengths.release()
+        self.view.release()
+        self.buffer.close()
+
+    def record(self, index: int) -> Record:
+        offset, size = RECORD_ENTRY.unpack_from(
+            self.buffer, self.records_offset + index * RECORD_ENTRY.size
+        )
+        return json.loads(self.buffer[offset : offset + size])
+
+    def records(self) -> Iterator[tuple[int, Record]]:
+        for index in range(self.doc_count):
+            yield self.product_ids[index], self.record(index)
+
+    def _term_entry(self, index: int) -> tuple[int, int, int, int]:
+        return TERM_ENTRY.unpack_from(
+            self.buffer, self.terms_offset + index * TERM_ENTRY.size
+        )
+
+    def posting_count(self, index: int) -> int:
+        return self._term_entry(index)[3]
+
+    def term(self, index: int) -> bytes:
+        offset, size, _, _ = self._term_entry(index)
+        return self.buffer[offset : offset + size]
+
+    def postings(self, index: int) -> tuple[memoryview, memoryview]:
+        """Document indexes and weighted term frequencies of a term."""
+        _, _, offset, count = self._term_entry(index)
+        documents = self.view[offset : offset + 4 * count].cast("I")
+        frequencies = self.view[offset + 4 * count : offset + 8 * count].cast("f")
+        return documents, frequencies
+
+    def locate(self, product_id: int) -> int | None:
+        """Document index of ``product_id``, or ``None`` if it is not stored."""
+        index = bisect_left(self.product_ids, product_id)
+        if index < self.doc_count and self.product_ids[index] == product_id:
+            return index
+        return None
+
+    def document_frequency(self, term: str, excluded: Sequence[int] = ()) -> int:
+        """Documents containing ``term``, leaving out the ``excluded`` indexes."""
+        matches = self.expand(term, prefix=False)
+        if not matches:
+            return 0
+        doc_indexes, frequencies = self.postings(matches[0])
+        try:
+            return len(doc_indexes) - _count_postings(doc_indexes, excluded)
+        finally:
+            doc_indexes.release()
+            frequencies.release()
+
+    def expand(self, token: str, prefix: bool) -> list[int]:
+        """Indexes of the dictionary terms equal to (or starting with) ``token``."""
+        key = token.encode("utf-8")
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if not prefix:
+            if low < self.term_count and self.term(low) == key:
+                return [low]
+            return []
+        matches = []
+        while (
+            low < self.term_count
+            and len(matches) < MAX_PREFIX_EXPANSIONS
+            and self.term(low).startswith(key)
+        ):
+            matches.append(low)
+            low += 1
+        return matches
+
+
+class Overlay:
+    """Journal changes applied on top of the snapshot in this process."""
+
+    def __init__(self):
+        # Product id -> record, or ``None`` for a product removed from search.
+        self.records: dict[int, Record | None] = {}
+        self.lengths: dict[int, float] = {}
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._terms: dict[int, list[str]] = {}
+
+    def apply(self, product_id: int, record: Record | None) -> None:
+        for term in self._terms.pop(product_id, []):
+            self.postings[term].pop(product_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+        self.lengths.pop(product_id, None)
+        self.records[product_id] = record
+        if record is None:
+            return
+        frequencies, length = analyze(record)
+        for term, tf in frequencies.items():
+            self.postings[term][product_id] = tf
+        self._terms[product_id] = list(frequencies)
+        self.lengths[product_id] = length
+
+    def expand(self, token: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [token] if token in self.postings else []
+        return [term for term in self.postings if term.startswith(token)][
+            :MAX_PREFIX_EXPANSIONS
+        ]
+
+
+def _matching_postings(
+    doc_indexes: memoryview, frequencies: memoryview, candidates: list[int] | None
+) -> Iterator[tuple[int, float]]:
+    """
+    Walk a posting list, or binary-search it for the (sorted) ``candidates``
+    left by rarer query words when there are few of them.
+    """
+    if candidates is None or len(candidates) * PROBE_RATIO >= len(doc_indexes):
+        yield from zip(doc_indexes, frequencies, strict=True)
+        return
+    for doc_index in candidates:
+        position = bisect_left(doc_indexes, doc_index)
+        if position < len(doc_indexes) and doc_indexes[position] == doc_index:
+            yield doc_index, frequencies[position]
+
+
+def _count_postings(doc_indexes: memoryview, excluded: Sequence[int]) -> int:
+    """How many of the sorted ``excluded`` document indexes a posting list holds."""
+    count = 0
+    for doc_index in excluded:
+        position = bisect_left(doc_indexes, doc_index)
+        if position < len(doc_indexes) and doc_indexes[position] == doc_index:
+            count += 1
+    return count
+
+
+def _stat_key(stat: os.stat_result) -> tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _journal_line(product_id: int, record: Record | None) -> bytes:
+    entry = {"id": product_id, "record": record}
+    return json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _parse_journal(data: bytes) -> Iterator[tuple[int, Record | None]]:
+    for line in data.splitlines():
+        if line.strip():
+            entry = json.loads(line)
+            yield int(entry["id"]), entry["record"]
+
+
+class LocalSearchIndex:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / SNAPSHOT_NAME
+        self.journal_path = self.directory / JOURNAL_NAME
+        self.lock_path = self.directory / LOCK_NAME
+        self.build_lock_path = self.directory / BUILD_LOCK_NAME
+        self._lock = threading.Lock()
+        self._snapshot: Snapshot | None = None
+        self._overlay = Overlay()
+        self._journal_inode: int | None = None
+        self._journal_offset = 0
+        self._missing_logged = False
+
+    @contextmanager
+    def _file_lock(self, path: Path | None = None):
+        """
+        Serialize journal appends and snapshot swaps across processes, or
+        with ``build_lock_path``, snapshot builds among themselves.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(path or self.lock_path, "a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _replace_journal(self, data: bytes) -> None:
+        # A new inode tells readers to drop their overlay and start over.
+        _atomic_write(self.journal_path, [data])
+
+    def _read_journal(self, offset: int = 0) -> tuple[int | None, bytes]:
+        try:
+            with open(self.journal_path, "rb") as handle:
+                inode = os.fstat(handle.fileno()).st_ino
+                handle.seek(offset)
+                return inode, handle.read()
+        except FileNotFoundError:
+            return None, b""
+
+    def rebuild(self, records: Iterable[Record] | None = None) -> int:
+        """Write a fresh snapshot from the database (or the given records)."""
+        with self._file_lock(self.build_lock_path):
+            with self._file_lock():
+                start_inode, pending = self._read_journal()
+            if records is None:
+                records = iter_product_records()
+            documents = {int(record["objectID"]): record for record in records}
+            return self._install(documents.values(), start_inode, len(pending))
+
+    def compact(self) -> int:
+        """Fold the journal into a new snapshot without touching the database."""
+        with self._file_lock(self.build_lock_path):
+            with self._file_lock():
+                start_inode, data = self._read_journal()
+            documents: dict[int, Record | None] = {}
+            if self.snapshot_path.exists():
+                snapshot = Snapshot(self.snapshot_path)
+                try:
+                    documents.update(snapshot.records())
+                finally:
+                    snapshot.close()
+            documents.update(_parse_journal(data))
+            return self._install(
+                (record for record in documents.values() if record is not None),
+                start_inode,
+                len(data),
+            )
+
+    def journal_size(self) -> int:
+        try:
+            return self.journal_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _install(
+        self, records: Iterable[Record], start_inode: int | None, start_offset: int
+    ) -> int:
+        """
+        Write ``records`` as the new snapshot, keeping the journal entries
+        from ``start_offset`` on. The snapshot is written beside the live one,
+        so appends only wait for the rename.
+        """
+        staging = self.directory / f".{SNAPSHOT_NAME}.next"
+        count = write_snapshot(staging, records)
+        with self._file_lock():
+            inode, data = self._read_journal()
+            # Keep the changes journaled while the snapshot was being built;
+            # replaying an entry already in the snapshot is harmless.
+            tail = data[start_offset:] if inode == start_inode else data
+            os.replace(staging, self.snapshot_path)
+            self._replace_journal(tail)
+        return count
+
+    def apply(self, changes: dict[int, Record | None]) -> None:
+        """Journal new records (``None`` removes a product) for every worker."""
+        if not changes:
+            return
+        lines = b"".join(
+            _journal_line(product_id, record) for product_id, record in changes.items()
+        )
+        with self._file_lock():
+            with open(self.journal_path, "ab") as handle:
+                handle.write(lines)
+
+    def _refresh(self) -> bool:
+        """
+        Pick up a new snapshot and journal entries. Returns ``False`` when
+        there is no snapshot yet: building one scans the whole catalog, which
+        is left to ``build_local_search_index`` rather than a search request.
+        """
+        try:
+            current = _stat_key(os.stat(self.snapshot_path))
+        except FileNotFoundError:
+            if not self._missing_logged:
+                logger.warning(
+                    "Local search snapshot %s is missing; run "
+                    "build_local_search_index",
+                    self.snapshot_path,
+                )
+                self._missing_logged = True
+            return False
+        self._missing_logged = False
+        if self._snapshot is None or self._snapshot.stat_key != current:
+            try:
+                snapshot = Snapshot(self.snapshot_path)
+            except ValueError as exc:
+                # Written by an older release; build_local_search_index
+                # replaces it.
+                logger.warning("Local search snapshot unusable: %s", exc)
+                return False
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._snapshot = snapshot
+            self._reset_overlay()
+
+        inode, data = self._read_journal(self._journal_offset)
+        if inode != self._journal_inode:
+            self._reset_overlay()
+            self._journal_inode = inode
+            inode, data = self._read_journal()
+        # A writer may be midway through a line; pick it up next time.
+        complete = data[: data.rfind(b"\n") + 1]
+        for product_id, record in _parse_journal(complete):
+            self._overlay.apply(product_id, record)
+        self._journal_offset += len(complete)
+        return True
+
+    def _reset_overlay(self) -> None:
+        self._overlay = Overlay()
+        self._journal_inode = None
+        self._journal_offset = 0
+
+    def search(self, query: str, limit: int = 10) -> dict[str, Any]:
+        """Return ``{"hits": [...], "nbHits": n}`` in Algolia's record shape."""
+        tokens = tokenize(query)
+        if not tokens or limit < 1:
+            return {"hits": [], "nbHits": 0}
+        with self._lock:
+            if not self._refresh():
+                return {"hits": [], "nbHits": 0}
+            snapshot, overlay = self._snapshot, self._overlay
+            live = [pid for pid, record in overlay.records.items() if record]
+            # Overlay entries replace or remove snapshot documents with the
+            # same id, so those documents drop out of the BM25 statistics.
+            shadowed = sorted(
+                index
+                for index in map(snapshot.locate, overlay.records)
+                if index is not None
+            )
+            documents = snapshot.doc_count - len(shadowed) + len(live)
+            avgdl = snapshot.avgdl or (
+                sum(overlay.lengths.values()) / len(live) if live else 0.0
+            )
+            # Product id -> snapshot document index, or None for overlay records.
+            locations: dict[int, int | None] = {}
+            product_ids, lengths = snapshot.product_ids, snapshot.lengths
+            scores: dict[int, float] | None = None
+            plans = []
+            for position, token in enumerate(tokens):
+                prefix = position == len(tokens) - 1
+                snapshot_terms = snapshot.expand(token, prefix)
+                overlay_terms = overlay.expand(token, prefix)
+                cost = sum(map(snapshot.posting_count, snapshot_terms)) + sum(
+                    len(overlay.postings[term]) for term in overlay_terms
+                )
+                plans.append((cost, snapshot_terms, overlay_terms))
+            # Rarest words first: later words only need to confirm candidates.
+            plans.sort(key=lambda plan: plan[0])
+            for _, snapshot_terms, overlay_terms in plans:
+                token_scores: dict[int, float] = {}
+                candidates = None
+                if scores is not None:
+                    candidates = [
+                        locations[product_id]
+                        for product_id in scores
+                        if locations[product_id] is not None
+                    ]
+                    candidates.sort()
+                for term_index in snapshot_terms:
+                    term = snapshot.term(term_index).decode("utf-8")
+                    doc_indexes, frequencies = snapshot.postings(term_index)
+                    df = (
+                        len(doc_indexes)
+                        - _count_postings(doc_indexes, shadowed)
+                        + len(overlay.postings.get(term, ()))
+                    )
+                    idf = inverse_document_frequency(df, documents)
+                    for doc_index, tf in _matching_postings(
+                        doc_indexes, frequencies, candidates
+                    ):
+                        product_id = product_ids[doc_index]
+                        if (
+                            scores is not None and product_id not in scores
+                        ) or product_id in overlay.records:
+                            continue
+                        score = bm25(tf, idf, lengths[doc_index], avgdl)
+                        if score > token_scores.get(product_id, 0.0):
+                            token_scores[product_id] = score
+                        locations[product_id] = doc_index
+                    doc_indexes.release()
+                    frequencies.release()
+                for term in overlay_terms:
+                    term_postings = overlay.postings[term]
+                    df = len(term_postings) + snapshot.document_frequency(
+                        term, shadowed
+                    )
+                    idf = inverse_document_frequency(df, documents)
+                    for product_id, tf in term_postings.items():
+                        length = overlay.lengths[product_id]
+                        score = bm25(tf, idf, length, avgdl)
+                        if score > token_scores.get(product_id, 0.0):
+                            token_scores[product_id] = score
+                        locations[product_id] = None
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        product_id: total + token_scores[product_id]
+                        for product_id, total in scores.items()
+                        if product_id in token_scores
+                    }
+                if not scores:
+                    return {"hits": [], "nbHits": 0}
+
+            best = heapq.nsmallest(
+                limit, scores.items(), key=lambda item: (-item[1], item[0])
+            )
+            hits = []
+            for product_id, _ in best:
+                location = locations[product_id]
+                if location is None:
+                    hits.append(overlay.records[product_id])
+                else:
+                    hits.append(snapshot.record(location))
+        return {"hits": hits, "nbHits": len(scores)}
+
+
+_indexes: dict[str, LocalSearchIndex] = {}
+
+
+def get_local_index() -> LocalSearchIndex:
+    directory = str(settings.LOCAL_SEARCH_DIR)
+    if directory not in _indexes:
+        _indexes[directory] = LocalSearchIndex(Path(directory))
+    return _indexes[directory]
+
+
+def search_products(query: str, limit: int = 10) -> dict[str, Any]:
+    """
+    Search the local index. Stock changes with every checkout, which does not
+    journal it, so the hits get the current figure in one query.
+    """
+    result = get_local_index().search(query, limit)
+    hits = result["hits"]
+    if hits:
+        stock = dict(
+            Product.objects.filter(pk__in=[int(hit["objectID"]) for hit in hits])
+            .annotate(total=F("stock") + shard_stock_sum())
+            .values_list("pk", "total")
+        )
+        result["hits"] = [
+            {**hit, "stock": stock.get(int(hit["objectID"]), hit["stock"])}
+            for hit in hits
+        ]
+    return result
+
+
+def refresh_products(product_ids: Iterable[int]) -> None:
+    """Re-serialize ``product_ids`` and journal the result for every worker."""
+    if not settings.LOCAL_SEARCH_ENABLED:
+        return
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    records = {
+        int(record["objectID"]): record for record in iter_product_records(product_ids)
+    }
+    try:
+        get_local_index().apply(
+            {product_id: records.get(product_id) for product_id in product_ids}
+        )
+    except OSError as exc:
+        logger.warning("Failed to update the local search index: %s", exc)
+
+
+def refresh_products_on_commit(product_ids: Iterable[int]) -> None:
+    if not settings.LOCAL_SEARCH_ENABLED:
+        return
+    product_ids = set(product_ids)
+    transaction.on_commit(lambda: refresh_products(product_ids))
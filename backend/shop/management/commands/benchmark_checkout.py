@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from ...models import Cart, CartItem, Category, InsufficientStockError, Order, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест оформления заказов: параллельные покупки одного "
+        "товара. Создаёт временные данные и удаляет их после прогона."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Параллельные покупатели."
+        )
+        parser.add_argument(
+            "--orders", type=int, default=400, help="Количество попыток заказа."
+        )
+        parser.add_argument(
+            "--quantity", type=int, default=1, help="Штук товара в каждом заказе."
+        )
+        parser.add_argument(
+            "--stock",
+            type=int,
+            help="Начальный остаток (по умолчанию хватает на все заказы).",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=0,
+            help="Разбить остаток товара на N счётчиков (0 — без шардирования).",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Не удалять созданные товар, корзины и заказы.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("SQLite блокирует всю базу; запустите на PostgreSQL.")
+        threads = max(1, options["threads"])
+        orders = max(1, options["orders"])
+        quantity = max(1, options["quantity"])
+        stock = options["stock"]
+        if stock is None:
+            stock = orders * quantity
+
+        suffix = uuid4().hex[:8]
+        category = Category.objects.create(name=f"Benchmark {suffix}")
+        product = Product.objects.create(
+            category=category,
+            name=f"Benchmark product {suffix}",
+            sku=f"BENCH-{suffix}",
+            price=Decimal("1.00"),
+            stock=stock,
+        )
+        if options["shards"] > 0:
+            product.set_stock_shards(options["shards"])
+        carts = Cart.objects.bulk_create(Cart() for _ in range(orders))
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=quantity) for cart in carts
+        )
+
+        pending = list(carts)
+        lock = threading.Lock()
+        latencies: list[float] = []
+        outcomes = {"placed": 0, "rejected": 0}
+
+        def buyer():
+            try:
+                while True:
+                    with lock:
+                        if not pending:
+                            return
+                        cart = pending.pop()
+                    started = time.perf_counter()
+                    try:
+                        Order.create_from_cart(
+                            cart,
+                            customer_email="benchmark@example.com",
+                            shipping_full_name="Benchmark",
+                            shipping_address="Benchmark",
+                            shipping_city="Benchmark",
+                        )
+                        outcome = "placed"
+                    except InsufficientStockError:
+                        outcome = "rejected"
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        outcomes[outcome] += 1
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=buyer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        remaining = Product.all_objects.get(pk=product.pk).total_stock
+        sold = outcomes["placed"] * quantity
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"Потоков: {threads}, счётчиков: {product.stock_shard_count}, "
+            f"попыток: {orders}, оформлено: {outcomes['placed']}, "
+            f"отказов: {outcomes['rejected']}"
+        )
+        self.stdout.write(
+            f"Пропускная способность: {len(latencies) / elapsed:.1f} заказов/с, "
+            f"задержка p50 {statistics.median(latencies) * 1000:.1f} мс, "
+            f"p95 {p95 * 1000:.1f} мс"
+        )
+        consistent = remaining == stock - sold and remaining >= 0
+        if not options["keep"]:
+            Order.all_objects.filter(items__product=product).hard_delete()
+            Cart.objects.filter(items__product=product).delete()
+            product.hard_delete()
+            category.delete()
+        if not consistent:
+            raise CommandError(
+                f"Остаток {remaining} не совпадает с ожидаемым {stock - sold}."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Перепродаж нет, остаток на складе: {remaining}.")
+        )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...local_search import get_local_index
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Собирает снимок локального поискового индекса товаров."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="Только свернуть журнал изменений в снимок, без чтения базы.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help=(
+                "Вместе с --compact: работать постоянно и сворачивать журнал, "
+                "когда он больше LOCAL_SEARCH_JOURNAL_MAX_BYTES."
+            ),
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30.0,
+            help="Пауза между проверками размера журнала в режиме --loop (секунды).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.LOCAL_SEARCH_ENABLED:
+            self.stdout.write(
+                self.style.WARNING("Локальный поиск отключён (LOCAL_SEARCH_ENABLED).")
+            )
+            return
+        index = get_local_index()
+        if options["loop"]:
+            if not options["compact"]:
+                raise CommandError("--loop используется только вместе с --compact.")
+            self._compact_forever(index, options["interval"])
+            return
+        started = time.perf_counter()
+        if options["compact"]:
+            count = index.compact()
+        else:
+            count = index.rebuild()
+        self._report(index, count, started)
+
+    def _compact_forever(self, index, interval: float):
+        while True:
+            if (
+                index.snapshot_path.exists()
+                and index.journal_size() > settings.LOCAL_SEARCH_JOURNAL_MAX_BYTES
+            ):
+                started = time.perf_counter()
+                try:
+                    count = index.compact()
+                except (OSError, ValueError) as exc:
+                    logger.warning("Failed to compact the local search index: %s", exc)
+                else:
+                    self._report(index, count, started)
+            time.sleep(interval)
+
+    def _report(self, index, count: int, started: float):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Индекс {index.snapshot_path} собран: {count} товаров "
+                f"за {elapsed:.2f} с."
+            )
+        )
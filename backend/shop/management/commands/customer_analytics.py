@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ...analytics import CHUNK_SIZE, customer_metrics, load_order_arrays
+
+
+class Command(BaseCommand):
+    help = (
+        "Считает когорты покупателей, долю повторных покупок, время до второго "
+        "заказа и перцентили выручки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="Первый день периода (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Последний день периода (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=12,
+            help="Сколько месяцев удержания показывать для каждой когорты.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Количество заказов, читаемых из базы за один раз.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Вывести полный результат в JSON.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        arrays = load_order_arrays(
+            options["date_from"], options["date_to"], max(1, options["chunk_size"])
+        )
+        loaded = time.perf_counter()
+        metrics = customer_metrics(arrays, max(0, options["months"]))
+        finished = time.perf_counter()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(metrics, cls=DjangoJSONEncoder, indent=2))
+            return
+        self.stdout.write(
+            f"Заказов: {metrics['orders']}, покупателей: {metrics['customers']}, "
+            f"повторных: {metrics['repeat_customers']} "
+            f"({metrics['repeat_purchase_rate'] or 0:.1%})"
+        )
+        if metrics["time_to_second_order_days"]:
+            gap = metrics["time_to_second_order_days"]
+            self.stdout.write(
+                f"До второго заказа: медиана {gap['p50']} дн., p90 {gap['p90']} дн."
+            )
+        for currency in metrics["revenue_percentiles"]:
+            values = currency["order_value"]
+            self.stdout.write(
+                f"{currency['currency']}: выручка {currency['revenue']}, "
+                f"чек p50 {values['p50']}, p90 {values['p90']}, p99 {values['p99']}"
+            )
+        self.stdout.write(f"Когорт: {len(metrics['cohorts'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загрузка {loaded - started:.2f} с, "
+                f"расчёт {finished - loaded:.2f} с."
+            )
+        )
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import SalesRollupQueue
+from ...sales import SALES_QUEUE_BATCH_SIZE, process_sales_queue
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+class Command(BaseCommand):
+    help = "Переносит изменения продаж из очереди в дневные агрегаты."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SALES_QUEUE_BATCH_SIZE,
+            help="Количество изменений, переносимых в одной транзакции.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, опрашивая очередь.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза между опросами пустой очереди в режиме --loop (секунды).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = options["interval"]
+        backoff = interval
+        while True:
+            try:
+                folded = process_sales_queue(batch_size)
+            except Exception as exc:
+                if not options["loop"]:
+                    raise CommandError(
+                        f"Ошибка обработки очереди продаж: {exc}"
+                    ) from exc
+                logger.warning("Failed to process the sales queue: %s", exc)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            backoff = interval
+            if folded:
+                self.stdout.write(
+                    f"Перенесено: {folded}, "
+                    f"в очереди: {SalesRollupQueue.objects.count()}"
+                )
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(interval)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Очередь обработана, осталось: {SalesRollupQueue.objects.count()}"
+            )
+        )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import SearchIndexQueue
+from ...search import QUEUE_BATCH_SIZE, process_index_queue
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+class Command(BaseCommand):
+    help = "Отправляет накопленные изменения товаров в Algolia пакетами."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=QUEUE_BATCH_SIZE,
+            help="Количество товаров в одном запросе к Algolia.",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=2.0,
+            help="Сколько секунд изменение ждёт в очереди, чтобы склеить повторы.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, опрашивая очередь.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза между опросами пустой очереди в режиме --loop (секунды).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.ALGOLIA_ENABLED:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Algolia не настроена. Задайте переменные окружения и повторите."
+                )
+            )
+            return
+        batch_size = max(1, options["batch_size"])
+        interval = options["interval"]
+        backoff = interval
+        while True:
+            try:
+                saved, deleted = process_index_queue(batch_size, options["delay"])
+            except Exception as exc:
+                if not options["loop"]:
+                    raise CommandError(
+                        f"Ошибка синхронизации с Algolia: {exc}"
+                    ) from exc
+                logger.warning("Failed to push the search index queue: %s", exc)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            backoff = interval
+            if saved or deleted:
+                self.stdout.write(
+                    f"Обновлено: {saved}, удалено: {deleted}, "
+                    f"в очереди: {SearchIndexQueue.objects.count()}"
+                )
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(interval)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Очередь обработана, осталось: {SearchIndexQueue.objects.count()}"
+            )
+        )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...carts import abandoned_carts, purge_abandoned_carts
+from ...models import CartItem
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет корзины без заказа, не изменявшиеся дольше заданного срока, "
+        "небольшими пачками."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CART_RETENTION_DAYS,
+            help="Удалять корзины, простаивающие дольше этого числа дней.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Количество корзин, удаляемых за одну транзакцию.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.5,
+            help="Пауза между пачками (секунды).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать корзины и позиции, ничего не удаляя.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, повторяя очистку с интервалом --interval.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=3600.0,
+            help="Пауза между проходами в режиме --loop (секунды).",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days должен быть не меньше 1.")
+        if options["dry_run"]:
+            self._report_candidates(self._cutoff(options["days"]))
+            return
+        interval = options["interval"]
+        backoff = interval
+        while True:
+            try:
+                self._purge(
+                    self._cutoff(options["days"]),
+                    max(1, options["batch_size"]),
+                    max(0.0, options["sleep"]),
+                )
+            except Exception as exc:
+                if not options["loop"]:
+                    raise CommandError(f"Ошибка очистки корзин: {exc}") from exc
+                logger.warning("Failed to purge abandoned carts: %s", exc)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            backoff = interval
+            if not options["loop"]:
+                break
+            time.sleep(interval)
+
+    def _cutoff(self, days: int):
+        return timezone.now() - timedelta(days=days)
+
+    def _report_candidates(self, cutoff) -> None:
+        carts = abandoned_carts(cutoff)
+        items = CartItem.objects.filter(cart__in=carts).count()
+        self.stdout.write(
+            self.style.WARNING(
+                f"Пробный запуск: будет удалено корзин: {carts.count()}, "
+                f"позиций: {items} (старше {cutoff:%Y-%m-%d %H:%M})."
+            )
+        )
+
+    def _purge(self, cutoff, batch_size: int, pause: float) -> None:
+        started = time.perf_counter()
+        total_carts = total_items = 0
+        while True:
+            carts, items = purge_abandoned_carts(cutoff, batch_size)
+            if not carts:
+                break
+            total_carts += carts
+            total_items += items
+            # Keep transactions short and spread the WAL out between batches.
+            if carts == batch_size and pause:
+                time.sleep(pause)
+        elapsed = time.perf_counter() - started
+        rows = total_carts + total_items
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Удалено корзин: {total_carts}, позиций: {total_items} "
+                f"за {elapsed:.1f} с ({rows / elapsed if elapsed else 0:.0f} строк/с)."
+            )
+        )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from ...models import Product
+from ...ratings import refresh_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает агрегаты рейтинга товаров по одобренным отзывам."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Количество товаров, пересчитываемых в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        product_ids = (
+            Product.all_objects.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=batch_size)
+        )
+        processed = 0
+        batch: list[int] = []
+        for product_id in product_ids:
+            batch.append(product_id)
+            if len(batch) >= batch_size:
+                refresh_rating_summaries(batch)
+                processed += len(batch)
+                batch = []
+                self.stdout.write(f"Обработано товаров: {processed}")
+        if batch:
+            refresh_rating_summaries(batch)
+            processed += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f"Рейтинги пересчитаны для {processed} товаров.")
+        )
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from ...models import Order
+from ...sales import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает дневные агрегаты продаж по заказам: заполняет их для "
+        "старых заказов и исправляет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="Первый пересчитываемый день (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Последний пересчитываемый день (YYYY-MM-DD), по умолчанию сегодня.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=2,
+            help="Сколько последних дней пересчитать, если --from не указан.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать всю историю заказов.",
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=31,
+            help="Количество дней, пересчитываемых в одной транзакции.",
+        )
+
+    def handle(self, *args, **options):
+        last_day = options["date_to"] or timezone.localdate()
+        if options["all"]:
+            bounds = Order.objects.aggregate(
+                first=Min("placed_at"), last=Max("placed_at")
+            )
+            if bounds["first"] is None:
+                self.stdout.write(self.style.WARNING("Заказов нет."))
+                return
+            first_day = timezone.localdate(bounds["first"])
+            last_day = max(last_day, timezone.localdate(bounds["last"]))
+        elif options["date_from"]:
+            first_day = options["date_from"]
+        else:
+            first_day = last_day - timedelta(days=max(1, options["days"]) - 1)
+        if first_day > last_day:
+            raise CommandError("Начальная дата позже конечной.")
+
+        chunk = timedelta(days=max(1, options["chunk_days"]))
+        written = mismatched = 0
+        start = first_day
+        while start <= last_day:
+            end = min(start + chunk - timedelta(days=1), last_day)
+            rows, differences = rebuild_sales_rollups(start, end)
+            written += rows
+            mismatched += differences
+            self.stdout.write(
+                f"{start} — {end}: строк {rows}, расхождений {differences}"
+            )
+            start = end + timedelta(days=1)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Агрегаты продаж пересчитаны с {first_day} по {last_day}: "
+                f"строк {written}, исправлено расхождений {mismatched}."
+            )
+        )
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...emails import OUTBOX_BATCH_SIZE, outbox_depth, send_queued_emails
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+class Command(BaseCommand):
+    help = "Отправляет письма из очереди (заказы, регистрация, сброс пароля)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help="Количество писем за одно SMTP-соединение.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно, опрашивая очередь.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Пауза между опросами пустой очереди в режиме --loop (секунды).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        interval = options["interval"]
+        backoff = interval
+        while True:
+            try:
+                sent, deferred = send_queued_emails(batch_size)
+            except Exception as exc:
+                if not options["loop"]:
+                    raise CommandError(
+                        f"Ошибка обработки очереди писем: {exc}"
+                    ) from exc
+                logger.warning("Failed to process the email outbox: %s", exc)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            backoff = interval
+            if sent or deferred:
+                self.stdout.write(
+                    f"Отправлено: {sent}, отложено: {deferred}, "
+                    f"{self._depth_report()}"
+                )
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(interval)
+        self.stdout.write(
+            self.style.SUCCESS(f"Очередь обработана, {self._depth_report()}")
+        )
+
+    def _depth_report(self) -> str:
+        depth = outbox_depth()
+        return (
+            f"к отправке: {depth.due}, ждут повтора: {depth.deferred}, "
+            f"не доставлено: {depth.failed}"
+        )
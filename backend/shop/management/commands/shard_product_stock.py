@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from ...models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Разбивает остаток популярного товара на несколько строк-счётчиков, "
+        "чтобы параллельные заказы не ждали друг друга. --shards 0 "
+        "возвращает остаток в обычное поле."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("product", help="ID или артикул (SKU) товара.")
+        parser.add_argument(
+            "--shards",
+            type=int,
+            required=True,
+            help="Количество счётчиков (0 — отключить шардирование).",
+        )
+        parser.add_argument(
+            "--total",
+            type=int,
+            help="Новый общий остаток (по умолчанию сохраняется текущий).",
+        )
+
+    def handle(self, *args, **options):
+        shards = options["shards"]
+        total = options["total"]
+        if not 0 <= shards <= 256:
+            raise CommandError("--shards должно быть от 0 до 256.")
+        if total is not None and total < 0:
+            raise CommandError("--total не может быть отрицательным.")
+        lookup = Q(sku=options["product"])
+        if options["product"].isdigit():
+            lookup |= Q(pk=options["product"])
+        product = Product.all_objects.filter(lookup).first()
+        if product is None:
+            raise CommandError(f"Товар {options['product']!r} не найден.")
+
+        product.set_stock_shards(shards, total=total)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{product.sku}: остаток {product.total_stock}, "
+                f"счётчиков {product.stock_shard_count}."
+            )
+        )
@@ -1,9 +1,27 @@
 from __future__ import annotations
 
+from datetime import datetime, time
+
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ...search import SYNC_BATCH_SIZE, SYNC_WORKERS, SyncResult, sync_all_products
 
-from ...search import sync_all_products
+
+def parse_since(value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(
+                f"Неверная дата --since: {value!r}. Используйте ISO 8601."
+            )
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
 
 
 class Command(BaseCommand):
@@ -13,7 +31,26 @@ class Command(BaseCommand):
         parser.add_argument(
             "--clear",
             action="store_true",
-            help="Очистить индекс перед загрузкой данных.",
+            help=(
+                "Пересобрать индекс с нуля во временном индексе и атомарно "
+                "заменить им рабочий."
+            ),
+        )
+        parser.add_argument(
+            "--since",
+            help="Отправить только товары, изменённые после даты (ISO 8601).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SYNC_BATCH_SIZE,
+            help="Количество товаров в одном запросе к Algolia.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=SYNC_WORKERS,
+            help="Количество параллельных запросов к Algolia.",
         )
 
     def handle(self, *args, **options):
@@ -25,7 +62,27 @@ class Command(BaseCommand):
             )
             return
         clear = options["clear"]
-        sync_all_products(clear_index=clear)
+        since = parse_since(options["since"]) if options["since"] else None
+        if clear and since is not None:
+            raise CommandError("--clear и --since нельзя использовать вместе.")
+
+        def progress(result: SyncResult) -> None:
+            self.stdout.write(
+                f"Отправлено товаров: {result.saved} ({result.rate:.0f} в секунду)"
+            )
+
+        result = sync_all_products(
+            clear_index=clear,
+            since=since,
+            batch_size=max(1, options["batch_size"]),
+            workers=max(1, options["workers"]),
+            progress=progress,
+        )
         self.stdout.write(
-            self.style.SUCCESS("Товары синхронизированы с индексом Algolia.")
+            self.style.SUCCESS(
+                f"Товары синхронизированы с индексом Algolia: отправлено "
+                f"{result.saved}, удалено {result.deleted}, пакетов "
+                f"{result.batches}, {result.elapsed:.1f} с "
+                f"({result.rate:.0f} в секунду)."
+            )
         )
@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    ProductReview = apps.get_model("shop", "ProductReview")
+    ProductRatingSummary = apps.get_model("shop", "ProductRatingSummary")
+    histograms = defaultdict(dict)
+    rows = (
+        ProductReview.objects.filter(
+            deleted_at__isnull=True, moderation_status="approved"
+        )
+        .order_by()
+        .values("product_id", "rating")
+        .annotate(total=Count("id"))
+    )
+    for row in rows:
+        histograms[row["product_id"]][row["rating"]] = row["total"]
+    ProductRatingSummary.objects.bulk_create(
+        [
+            ProductRatingSummary(
+                product_id=product_id,
+                reviews_count=sum(histogram.values()),
+                rating_sum=sum(star * total for star, total in histogram.items()),
+                **{f"stars_{star}": histogram.get(star, 0) for star in range(1, 6)},
+            )
+            for product_id, histogram in histograms.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0005_productreview_guest_comments"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRatingSummary",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_summary",
+                        serialize=False,
+                        to="shop.product",
+                    ),
+                ),
+                ("reviews_count", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                ("stars_1", models.PositiveIntegerField(default=0)),
+                ("stars_2", models.PositiveIntegerField(default=0)),
+                ("stars_3", models.PositiveIntegerField(default=0)),
+                ("stars_4", models.PositiveIntegerField(default=0)),
+                ("stars_5", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Rating summary",
+                "verbose_name_plural": "Rating summaries",
+            },
+        ),
+        migrations.RunPython(
+            backfill_rating_summaries, migrations.RunPython.noop
+        ),
+    ]
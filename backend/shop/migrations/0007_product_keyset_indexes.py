@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0006_product_rating_summary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(deleted_at__isnull=True),
+                fields=["name", "id"],
+                name="product_name_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(deleted_at__isnull=True),
+                fields=["price", "id"],
+                name="product_price_keyset_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(deleted_at__isnull=True),
+                fields=["created_at", "id"],
+                name="product_created_keyset_idx",
+            ),
+        ),
+    ]
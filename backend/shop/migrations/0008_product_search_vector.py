@@ -0,0 +1,79 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# ``ё`` is folded to ``е`` before both configurations see the text, so the
+# query side only has to apply the same translation (shop.fulltext). SKU
+# separators become spaces: the default parser would read ``-001`` as a
+# signed number, which the ``\w+`` query tokens never match.
+CREATE_SQL = """
+CREATE OR REPLACE FUNCTION shop_product_search_document(
+    name text, sku text, short_description text, description text
+) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('pg_catalog.russian', translate(coalesce(name, ''), 'ёЁ', 'еЕ')), 'A')
+        || setweight(to_tsvector('pg_catalog.simple', translate(coalesce(name, ''), 'ёЁ', 'еЕ')), 'A')
+        || setweight(to_tsvector('pg_catalog.simple', translate(coalesce(sku, ''), '-_./', '    ')), 'A')
+        || setweight(to_tsvector('pg_catalog.russian', translate(coalesce(short_description, ''), 'ёЁ', 'еЕ')), 'B')
+        || setweight(to_tsvector('pg_catalog.simple', translate(coalesce(short_description, ''), 'ёЁ', 'еЕ')), 'B')
+        || setweight(to_tsvector('pg_catalog.russian', translate(coalesce(description, ''), 'ёЁ', 'еЕ')), 'C')
+        || setweight(to_tsvector('pg_catalog.simple', translate(coalesce(description, ''), 'ёЁ', 'еЕ')), 'C')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION shop_product_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := shop_product_search_document(
+        NEW.name, NEW.sku, NEW.short_description, NEW.description
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER shop_product_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, sku, short_description, description
+    ON shop_product
+    FOR EACH ROW EXECUTE FUNCTION shop_product_search_vector_trigger();
+
+UPDATE shop_product SET search_vector = shop_product_search_document(
+    name, sku, short_description, description
+);
+
+CREATE INDEX shop_product_search_vector_gin
+    ON shop_product USING gin (search_vector);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS shop_product_search_vector_gin;
+DROP TRIGGER IF EXISTS shop_product_search_vector_update ON shop_product;
+DROP FUNCTION IF EXISTS shop_product_search_vector_trigger();
+DROP FUNCTION IF EXISTS shop_product_search_document(text, text, text, text);
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0007_product_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
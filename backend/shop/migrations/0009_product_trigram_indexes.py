@@ -0,0 +1,44 @@
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS shop_product_name_trgm
+    ON shop_product USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS shop_product_sku_trgm
+    ON shop_product USING gin (sku gin_trgm_ops);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS shop_product_name_trgm;
+DROP INDEX IF EXISTS shop_product_sku_trgm;
+"""
+
+
+def create_trigram_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        available = cursor.fetchone() is not None
+    # Fuzzy search switches itself off when the extension is missing
+    # (shop.fulltext.fuzzy_enabled), so a server without contrib still migrates.
+    if available:
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0008_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
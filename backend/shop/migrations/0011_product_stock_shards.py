@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0010_searchindexqueue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="stock_shard_count",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="ProductStockShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveSmallIntegerField()),
+                ("stock", models.PositiveIntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_shards",
+                        to="shop.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock shard",
+                "verbose_name_plural": "Stock shards",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("product", "index"),
+                        name="product_stock_shard_unique",
+                    )
+                ],
+            },
+        ),
+    ]
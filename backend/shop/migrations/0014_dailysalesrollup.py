@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0013_cart_updated_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("currency", models.CharField(max_length=3)),
+                ("product_name", models.CharField(blank=True, max_length=255)),
+                ("orders", models.IntegerField(default=0)),
+                ("quantity", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="shop.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily sales rollup",
+                "verbose_name_plural": "Daily sales rollups",
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("product__isnull", False)),
+                        fields=("day", "currency", "product"),
+                        name="sales_rollup_product_unique",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("product__isnull", True)),
+                        fields=("day", "currency"),
+                        name="sales_rollup_total_unique",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0014_dailysalesrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productreview",
+            index=models.Index(
+                condition=models.Q(
+                    deleted_at__isnull=True, moderation_status="approved"
+                ),
+                fields=["product", "-created_at", "-id"],
+                name="review_feed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("shop", "0015_review_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productreview",
+            name="claimed_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="claimed_product_reviews",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="productreview",
+            name="claimed_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="productreview",
+            index=models.Index(
+                condition=models.Q(
+                    deleted_at__isnull=True, moderation_status="pending"
+                ),
+                fields=["created_at", "id"],
+                name="review_pending_queue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0017_salesrollupqueue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindexqueue",
+            name="available_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,13 +1,22 @@
 ﻿from __future__ import annotations
 
+import random
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date
 from decimal import Decimal
 from uuid import uuid4
 
 from django.conf import settings
-from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .cache import invalidate_on_commit, invalidate_sales_on_commit, product_tag
+
 
 class SoftDeleteQuerySet(models.QuerySet):
     def delete(self):
@@ -63,6 +72,14 @@ class SoftDeleteModel(models.Model):
             self.save(update_fields=["deleted_at"])
 
 
+class InsufficientStockError(ValueError):
+    """Cart lines that cannot be served from the current stock."""
+
+    def __init__(self, shortages: list[dict[str, object]]):
+        self.shortages = shortages
+        super().__init__("Not enough stock for some cart items.")
+
+
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True, allow_unicode=True)
@@ -109,12 +126,35 @@ class Product(SoftDeleteModel):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default="RUB")
     stock = models.PositiveIntegerField(default=0)
+    # Hot SKUs keep their stock in ``stock_shards`` so concurrent checkouts
+    # update different rows; ``stock`` itself stays 0 while sharded.
+    stock_shard_count = models.PositiveSmallIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Filled by a PostgreSQL trigger (see migration 0008), GIN-indexed.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ("name",)
+        indexes = [
+            # Keyset pagination walks (<ordering field>, id) over live rows.
+            models.Index(
+                fields=("name", "id"),
+                condition=models.Q(deleted_at__isnull=True),
+                name="product_name_keyset_idx",
+            ),
+            models.Index(
+                fields=("price", "id"),
+                condition=models.Q(deleted_at__isnull=True),
+                name="product_price_keyset_idx",
+            ),
+            models.Index(
+                fields=("created_at", "id"),
+                condition=models.Q(deleted_at__isnull=True),
+                name="product_created_keyset_idx",
+            ),
+        ]
         verbose_name = "РўРѕРІР°СЂ"
         verbose_name_plural = "РўРѕРІР°СЂС‹"
 
@@ -139,6 +179,196 @@ class Product(SoftDeleteModel):
     def __str__(self) -> str:
         return self.name
 
+    def _get_rating_summary(self) -> "ProductRatingSummary | None":
+        try:
+            return self.rating_summary
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def reviews_count(self) -> int:
+        summary = self._get_rating_summary()
+        return summary.reviews_count if summary else 0
+
+    @property
+    def average_rating(self) -> float | None:
+        summary = self._get_rating_summary()
+        return summary.average_rating if summary else None
+
+    @property
+    def total_stock(self) -> int:
+        """
+        Units on hand, including sharded stock. Reads the ``shard_stock``
+        annotation (see ``shard_stock_sum``) when the queryset provides it.
+        """
+        if not self.stock_shard_count:
+            return self.stock
+        shard_stock = getattr(self, "shard_stock", None)
+        if shard_stock is None:
+            shard_stock = self.stock_shards.aggregate(total=models.Sum("stock"))
+            shard_stock = shard_stock["total"] or 0
+        return self.stock + shard_stock
+
+    def set_stock_shards(self, count: int, total: int | None = None) -> None:
+        """
+        Spread the product's stock (or ``total``) evenly over ``count`` shard
+        rows; ``count=0`` folds it back into ``stock``. The product and its
+        shards stay locked until the redistribution commits.
+        """
+        with transaction.atomic():
+            product = Product.all_objects.select_for_update().get(pk=self.pk)
+            shards = list(product.stock_shards.select_for_update())
+            if total is None:
+                total = product.stock + sum(shard.stock for shard in shards)
+            product.stock_shards.all().delete()
+            if count:
+                base, extra = divmod(total, count)
+                ProductStockShard.objects.bulk_create(
+                    ProductStockShard(
+                        product=product, index=index, stock=base + (index < extra)
+                    )
+                    for index in range(count)
+                )
+            product.stock = 0 if count else total
+            product.stock_shard_count = count
+            product.save(update_fields=["stock", "stock_shard_count", "updated_at"])
+        self.stock = product.stock
+        self.stock_shard_count = count
+        self.__dict__.pop("shard_stock", None)
+
+    @classmethod
+    def reserve_stock(cls, quantities: dict[int, int]) -> dict[int, int]:
+        """
+        Take ``{product_id: quantity}`` out of stock with one conditional
+        ``UPDATE ... WHERE stock >= quantity`` per product, in id order so
+        concurrent checkouts lock rows in the same sequence. Sharded products
+        are served by ``ProductStockShard.reserve`` instead.
+
+        Returns ``{product_id: available}`` for the lines that could not be
+        reserved; the caller must roll back its transaction in that case.
+        """
+        sharded = dict(
+            cls.objects.filter(
+                pk__in=quantities, is_active=True, stock_shard_count__gt=0
+            ).values_list("pk", "stock_shard_count")
+        )
+        short: list[int] = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            if product_id in sharded:
+                reserved = ProductStockShard.reserve(
+                    product_id, quantity, sharded[product_id]
+                )
+            else:
+                reserved = cls.objects.filter(
+                    pk=product_id,
+                    is_active=True,
+                    stock_shard_count=0,
+                    stock__gte=quantity,
+                ).update(stock=models.F("stock") - quantity, updated_at=timezone.now())
+            if not reserved:
+                short.append(product_id)
+        if not short:
+            # Imported here: it imports this module.
+            from .search import enqueue_products_on_commit
+
+            # Detail pages show stock; listings may lag by the cache timeout
+            # rather than dropping every catalog page on each checkout.
+            invalidate_on_commit(
+                *(product_tag(product_id) for product_id in quantities)
+            )
+            # ``update()`` skips the post_save receivers. Algolia records carry
+            # stock, so queue them after COMMIT; local search hits read it live.
+            enqueue_products_on_commit(quantities)
+            return {}
+        available = dict(
+            cls.objects.filter(pk__in=short, is_active=True)
+            .annotate(total=models.F("stock") + shard_stock_sum())
+            .values_list("pk", "total")
+        )
+        return {product_id: available.get(product_id, 0) for product_id in short}
+
+
+class ProductStockShard(models.Model):
+    """
+    One slice of a hot product's stock. Checkouts decrement a random shard,
+    so per-SKU throughput grows with the shard count instead of queueing on
+    the product row.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        related_name="stock_shards",
+        on_delete=models.CASCADE,
+    )
+    index = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("product", "index"), name="product_stock_shard_unique"
+            ),
+        ]
+        verbose_name = "Stock shard"
+        verbose_name_plural = "Stock shards"
+
+    def __str__(self) -> str:
+        return f"Product {self.product_id} shard {self.index}: {self.stock}"
+
+    @classmethod
+    def reserve(cls, product_id: int, quantity: int, shard_count: int) -> bool:
+        """
+        Decrement the first shard holding ``quantity``, starting from a random
+        one. When no single shard is large enough, lock every non-empty shard
+        and take the quantity across them.
+        """
+        start = random.randrange(shard_count)
+        for offset in range(shard_count):
+            updated = cls.objects.filter(
+                product_id=product_id,
+                index=(start + offset) % shard_count,
+                stock__gte=quantity,
+            ).update(stock=models.F("stock") - quantity)
+            if updated:
+                return True
+        shards = list(
+            cls.objects.select_for_update()
+            .filter(product_id=product_id, stock__gt=0)
+            .order_by("index")
+        )
+        if sum(shard.stock for shard in shards) < quantity:
+            return False
+        remaining = quantity
+        for shard in shards:
+            taken = min(shard.stock, remaining)
+            shard.stock -= taken
+            remaining -= taken
+        cls.objects.bulk_update(shards, ["stock"])
+        return True
+
+
+def shard_stock_sum() -> models.Expression:
+    """
+    Correlated ``SUM`` of a product's shard stock for ``.annotate()``; the
+    subquery only runs for sharded products.
+    """
+    totals = (
+        ProductStockShard.objects.filter(product=models.OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(total=models.Sum("stock"))
+        .values("total")
+    )
+    return models.Case(
+        models.When(
+            stock_shard_count__gt=0,
+            then=Coalesce(models.Subquery(totals), 0),
+        ),
+        default=0,
+        output_field=models.PositiveIntegerField(),
+    )
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(
@@ -173,18 +403,47 @@ class Cart(models.Model):
 
     class Meta:
         ordering = ("-updated_at",)
+        indexes = [
+            # purge_abandoned_carts walks idle carts oldest first.
+            models.Index(fields=("updated_at",), name="cart_updated_idx"),
+        ]
         verbose_name = "РљРѕСЂР·РёРЅР°"
         verbose_name_plural = "РљРѕСЂР·РёРЅС‹"
 
     def __str__(self) -> str:
         return f"Cart {self.pk}"
 
+    def _prefetched_items(self) -> list[CartItem] | None:
+        cache = getattr(self, "_prefetched_objects_cache", {})
+        return list(cache["items"]) if "items" in cache else None
+
+    def _totals(self) -> dict[str, Decimal | int]:
+        """Aggregate the cart in one query when its items were not prefetched."""
+        totals = self.items.aggregate(
+            subtotal=models.Sum(
+                models.F("quantity") * models.F("product__price"),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            total_items=models.Sum("quantity"),
+        )
+        return {
+            "subtotal": totals["subtotal"] or Decimal("0.00"),
+            "total_items": totals["total_items"] or 0,
+        }
+
     @property
     def subtotal(self) -> Decimal:
-        total = Decimal("0.00")
-        for item in self.items.select_related("product"):
-            total += item.subtotal
-        return total
+        items = self._prefetched_items()
+        if items is None:
+            return self._totals()["subtotal"]
+        return sum((item.subtotal for item in items), Decimal("0.00"))
+
+    @property
+    def total_items(self) -> int:
+        items = self._prefetched_items()
+        if items is None:
+            return self._totals()["total_items"]
+        return sum(item.quantity for item in items)
 
 
 class CartItem(models.Model):
@@ -214,6 +473,46 @@ class CartItem(models.Model):
     def subtotal(self) -> Decimal:
         return self.product.price * self.quantity
 
+    @classmethod
+    def add_quantities(cls, cart_id, quantities: dict[int, int]) -> dict[int, int]:
+        """
+        Add ``{product_id: quantity}`` to a cart in one ``INSERT ... ON
+        CONFLICT (cart_id, product_id) DO UPDATE`` statement: new lines are
+        created and existing ones incremented without reading them first.
+
+        Returns the resulting quantity per product.
+        """
+        if not quantities:
+            return {}
+        connection = connections[router.db_for_write(cls)]
+        quote = connection.ops.quote_name
+        cart, product, quantity, created_at, updated_at = (
+            cls._meta.get_field(name)
+            for name in ("cart", "product", "quantity", "created_at", "updated_at")
+        )
+        cart_value = cart.get_db_prep_value(cart_id, connection)
+        now = updated_at.get_db_prep_value(timezone.now(), connection)
+        rows = sorted(quantities.items())
+        params: list[object] = []
+        for product_id, amount in rows:
+            params += [cart_value, product_id, amount, now, now]
+        table = quote(cls._meta.db_table)
+        columns = [
+            quote(f.column) for f in (cart, product, quantity, created_at, updated_at)
+        ]
+        cart_col, product_col, quantity_col, _, updated_col = columns
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+            f"ON CONFLICT ({cart_col}, {product_col}) DO UPDATE SET "
+            f"{quantity_col} = {table}.{quantity_col} + EXCLUDED.{quantity_col}, "
+            f"{updated_col} = EXCLUDED.{updated_col} "
+            f"RETURNING {product_col}, {quantity_col}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return dict(cursor.fetchall())
+
 
 class Order(SoftDeleteModel):
     class Status(models.TextChoices):
@@ -229,6 +528,11 @@ class Order(SoftDeleteModel):
         PAID = "paid", "Оплачен"
         REFUNDED = "refunded", "Возврат"
 
+    # Orders in these statuses are left out of sales statistics.
+    SALES_EXCLUDED_STATUSES = frozenset({Status.DRAFT, Status.CANCELLED})
+    # Paid orders in these statuses make their lines verified purchases.
+    PURCHASE_STATUSES = frozenset({Status.PAID, Status.SHIPPED, Status.COMPLETED})
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name="orders",
@@ -276,6 +580,41 @@ class Order(SoftDeleteModel):
     def __str__(self) -> str:
         return f"Order #{self.pk}"
 
+    @property
+    def counts_as_sale(self) -> bool:
+        return (
+            self.deleted_at is None and self.status not in self.SALES_EXCLUDED_STATUSES
+        )
+
+    @property
+    def counts_as_purchase(self) -> bool:
+        return (
+            self.deleted_at is None
+            and self.status in self.PURCHASE_STATUSES
+            and self.payment_status == self.PaymentStatus.PAID
+        )
+
+    def sales_contribution(
+        self, *, day: date | None = None, currency: str | None = None
+    ) -> dict[SalesKey, SalesDelta]:
+        """What this order adds to ``DailySalesRollup``, by (day, currency, product)."""
+        day = day or timezone.localdate(self.placed_at)
+        currency = currency or self.currency
+        total = SalesDelta(orders=1, revenue=self.total_amount)
+        deltas: dict[SalesKey, SalesDelta] = {(day, currency, None): total}
+        lines = self.items.values_list(
+            "product_id", "product_name", "quantity", "line_total"
+        )
+        for product_id, product_name, quantity, line_total in lines:
+            line = deltas.setdefault(
+                (day, currency, product_id),
+                SalesDelta(orders=1, product_name=product_name),
+            )
+            line.quantity += quantity
+            line.revenue += line_total
+            total.quantity += quantity
+        return deltas
+
     @classmethod
     def create_from_cart(
         cls,
@@ -309,7 +648,8 @@ class Order(SoftDeleteModel):
             )
 
             order_items: list[OrderItem] = []
-            for item in cart.items.select_related("product"):
+            items = list(cart.items.select_related("product"))
+            for item in items:
                 line_total = item.product.price * item.quantity
                 subtotal += line_total
                 order_items.append(
@@ -329,6 +669,29 @@ class Order(SoftDeleteModel):
             order.total_amount = subtotal + shipping_amount
             order.save(update_fields=["subtotal_amount", "total_amount"])
             cart.delete()
+
+            # Reserve last: hot product rows stay locked only until COMMIT.
+            quantities: dict[int, int] = {}
+            for item in items:
+                quantities[item.product_id] = (
+                    quantities.get(item.product_id, 0) + item.quantity
+                )
+            shortages = Product.reserve_stock(quantities)
+            if shortages:
+                raise InsufficientStockError(
+                    [
+                        {
+                            "product": item.product_id,
+                            "product_name": item.product.name,
+                            "requested": item.quantity,
+                            "available": shortages[item.product_id],
+                        }
+                        for item in items
+                        if item.product_id in shortages
+                    ]
+                )
+            if order.counts_as_sale:
+                DailySalesRollup.record(order.sales_contribution())
             return order
 
 
@@ -406,6 +769,16 @@ class ProductReview(SoftDeleteModel):
         null=True,
         blank=True,
     )
+    # Lease taken by shop.moderation.claim_pending_reviews so moderators
+    # working the queue in parallel are handed different reviews.
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="claimed_product_reviews",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    claimed_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -425,6 +798,24 @@ class ProductReview(SoftDeleteModel):
                 name="product_review_rating_range",
             ),
         ]
+        indexes = [
+            # The public feed of a product walks approved reviews newest first.
+            models.Index(
+                fields=("product", "-created_at", "-id"),
+                condition=models.Q(
+                    deleted_at__isnull=True, moderation_status="approved"
+                ),
+                name="review_feed_idx",
+            ),
+            # Moderators claim pending reviews oldest first.
+            models.Index(
+                fields=("created_at", "id"),
+                condition=models.Q(
+                    deleted_at__isnull=True, moderation_status="pending"
+                ),
+                name="review_pending_queue_idx",
+            ),
+        ]
         verbose_name = "Отзыв о товаре"
         verbose_name_plural = "Отзывы о товарах"
 
@@ -442,12 +833,288 @@ class ProductReview(SoftDeleteModel):
         self.moderated_by = moderator
         self.moderation_note = note
         self.moderated_at = timezone.now()
+        self.claimed_by = None
+        self.claimed_until = None
         self.save(
             update_fields=[
                 "moderation_status",
                 "moderated_by",
                 "moderation_note",
                 "moderated_at",
+                "claimed_by",
+                "claimed_until",
                 "updated_at",
             ]
         )
+
+
+SalesKey = tuple[date, str, int | None]
+
+
+@dataclass
+class SalesDelta:
+    orders: int = 0
+    quantity: int = 0
+    revenue: Decimal = field(default_factory=lambda: Decimal("0.00"))
+    product_name: str = ""
+
+
+class DailySalesRollup(models.Model):
+    """
+    Per-day sales folded in from ``SalesRollupQueue`` by ``shop.sales``. Rows
+    with a product hold that product's lines; the row without one holds
+    whole-order totals (order count, items and ``total_amount`` including
+    shipping).
+    """
+
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    product = models.ForeignKey(
+        Product,
+        related_name="sales_rollups",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    product_name = models.CharField(max_length=255, blank=True)
+    orders = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("day", "currency", "product"),
+                condition=models.Q(product__isnull=False),
+                name="sales_rollup_product_unique",
+            ),
+            models.UniqueConstraint(
+                fields=("day", "currency"),
+                condition=models.Q(product__isnull=True),
+                name="sales_rollup_total_unique",
+            ),
+        ]
+        verbose_name = "Daily sales rollup"
+        verbose_name_plural = "Daily sales rollups"
+
+    def __str__(self) -> str:
+        return f"Sales {self.day} {self.currency} product {self.product_id}"
+
+    # First key of the PostgreSQL advisory locks taken per rollup day; day
+    # ordinals start at 1, so second key 0 is free for ``lock_rollups``.
+    LOCK_NAMESPACE = 0x5A1E5
+
+    @classmethod
+    def _advisory_lock(cls, function: str, keys: Iterable[int]) -> None:
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute(f"SELECT {function}(%s, %s)", [cls.LOCK_NAMESPACE, key])
+
+    @classmethod
+    def lock_days(cls, days: Iterable[date], *, shared: bool) -> None:
+        """
+        Take transaction-level advisory locks on ``days``, in day order.
+        ``record`` holds them shared so checkouts never wait on each other;
+        ``rebuild_sales_rollups`` holds them exclusively, so it waits for
+        in-flight checkouts to commit and blocks new ones until it is done.
+        """
+        function = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+        cls._advisory_lock(function, (day.toordinal() for day in sorted(set(days))))
+
+    @classmethod
+    def lock_rollups(cls) -> None:
+        """
+        Serialize the writers of rollup rows, ``process_sales_queue`` and
+        ``rebuild_sales_rollups``, for the rest of the transaction. Take it
+        before any day lock.
+        """
+        cls._advisory_lock("pg_advisory_xact_lock", [0])
+
+    @classmethod
+    def record(cls, deltas: dict[SalesKey, SalesDelta], sign: int = 1) -> None:
+        """
+        Queue ``deltas`` (negated for ``sign=-1``) for ``process_sales_queue``
+        with one INSERT. Checkouts of the same day never touch a shared row,
+        so they do not wait on each other until COMMIT.
+        """
+        if not deltas:
+            return
+        with transaction.atomic():
+            cls.lock_days((day for day, _, _ in deltas), shared=True)
+            SalesRollupQueue.objects.bulk_create(
+                [
+                    SalesRollupQueue(
+                        day=day,
+                        currency=currency,
+                        product_id=product_id,
+                        product_name=delta.product_name,
+                        orders=sign * delta.orders,
+                        quantity=sign * delta.quantity,
+                        revenue=sign * delta.revenue,
+                    )
+                    for (day, currency, product_id), delta in deltas.items()
+                ]
+            )
+
+    @classmethod
+    def apply(cls, deltas: dict[SalesKey, SalesDelta]) -> None:
+        """
+        Add the signed ``deltas`` with one UPDATE per row, creating missing
+        rows, in a fixed order. Callers hold ``lock_rollups``.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            for key in sorted(deltas, key=lambda key: (key[0], key[1], key[2] or 0)):
+                day, currency, product_id = key
+                delta = deltas[key]
+                rows = cls.objects.filter(
+                    day=day, currency=currency, product_id=product_id
+                )
+                changes = {
+                    "orders": models.F("orders") + delta.orders,
+                    "quantity": models.F("quantity") + delta.quantity,
+                    "revenue": models.F("revenue") + delta.revenue,
+                    "updated_at": now,
+                }
+                if delta.product_name:
+                    changes["product_name"] = delta.product_name
+                if rows.update(**changes) or delta.orders < 0:
+                    # Nothing to subtract from means the row was never built;
+                    # rebuild_sales_rollups restores it from the orders.
+                    continue
+                cls.objects.create(
+                    day=day,
+                    currency=currency,
+                    product_id=product_id,
+                    product_name=delta.product_name,
+                    orders=delta.orders,
+                    quantity=delta.quantity,
+                    revenue=delta.revenue,
+                )
+            invalidate_sales_on_commit((day, currency) for day, currency, _ in deltas)
+
+
+class SalesRollupQueue(models.Model):
+    """
+    Signed sales changes written in the same transaction as the order and
+    folded into ``DailySalesRollup`` by ``process_sales_queue``.
+    """
+
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    product = models.ForeignKey(
+        Product,
+        related_name="+",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    product_name = models.CharField(max_length=255, blank=True)
+    orders = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Sales rollup queue entry"
+        verbose_name_plural = "Sales rollup queue"
+
+    def __str__(self) -> str:
+        return f"Sales change {self.day} {self.currency} product {self.product_id}"
+
+
+class ProductRatingSummary(models.Model):
+    """Approved-review aggregates kept in sync by ``shop.ratings``."""
+
+    product = models.OneToOneField(
+        Product,
+        related_name="rating_summary",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    reviews_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Rating summary"
+        verbose_name_plural = "Rating summaries"
+
+    def __str__(self) -> str:
+        return f"Rating summary for product {self.product_id}"
+
+    @property
+    def average_rating(self) -> float | None:
+        if not self.reviews_count:
+            return None
+        return self.rating_sum / self.reviews_count
+
+    @property
+    def histogram(self) -> dict[int, int]:
+        return {star: getattr(self, f"stars_{star}") for star in range(1, 6)}
+
+
+class SearchIndexQueue(models.Model):
+    """
+    Products whose Algolia record is stale. Rows are written in the same
+    transaction as the change and drained by ``process_search_index_queue``;
+    a failed push holds the row back until ``available_at``.
+    """
+
+    product_id = models.PositiveBigIntegerField(unique=True)
+    enqueued_at = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Search index queue entry"
+        verbose_name_plural = "Search index queue"
+
+    def __str__(self) -> str:
+        return f"Reindex product {self.product_id}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing emails, written in the same transaction as the change that
+    triggers them and delivered by ``send_queued_emails``. Delivered rows are
+    deleted; rows that exhaust their retries keep ``failed_at`` set.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker polls due, undelivered rows in available_at order.
+            models.Index(
+                fields=("available_at", "id"),
+                condition=models.Q(failed_at__isnull=True),
+                name="email_outbox_due_idx",
+            ),
+        ]
+        verbose_name = "Outgoing email"
+        verbose_name_plural = "Email outbox"
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {', '.join(self.recipients)}"
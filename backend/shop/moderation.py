@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import ProductReview
+from .ratings import refresh_rating_summaries
+
+
+def moderate_reviews(
+    reviews: QuerySet[ProductReview], *, status: str, moderator, note: str = ""
+) -> list[int]:
+    """
+    Set the moderation outcome of every review in ``reviews`` with a single
+    UPDATE, then refresh the rating summaries of the products whose approved
+    set changed in one pass (which also drops their cached pages once).
+    Returns the ids of the reviews that were updated.
+    """
+    if status not in ProductReview.ModerationStatus.values:
+        raise ValueError("Unknown moderation status")
+    approved = ProductReview.ModerationStatus.APPROVED
+    with transaction.atomic():
+        # Lock through a pk subquery: admin changelist querysets may carry
+        # DISTINCT or annotations that FOR UPDATE does not accept.
+        rows = list(
+            ProductReview.all_objects.filter(pk__in=reviews.values("pk"))
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "product_id", "moderation_status")
+        )
+        if not rows:
+            return []
+        now = timezone.now()
+        ProductReview.all_objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+            moderation_status=status,
+            moderated_by=moderator,
+            moderation_note=note,
+            moderated_at=now,
+            claimed_by=None,
+            claimed_until=None,
+            updated_at=now,
+        )
+        refresh_rating_summaries(
+            product_id
+            for _, product_id, previous in rows
+            if approved in (previous, status) and previous != status
+        )
+    return [pk for pk, _, _ in rows]
+
+
+def claim_pending_reviews(moderator, limit: int) -> list[ProductReview]:
+    """
+    Lease up to ``limit`` of the oldest pending reviews to ``moderator`` for
+    ``REVIEW_CLAIM_LEASE_SECONDS``. Rows being claimed by another moderator
+    right now are skipped (``FOR UPDATE SKIP LOCKED``) rather than waited
+    on, and leases that ran out are handed out again. The moderator's own
+    unexpired claims stay claimable, so calling again renews them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        claimable = (
+            ProductReview.all_objects.filter(
+                deleted_at__isnull=True,
+                moderation_status=ProductReview.ModerationStatus.PENDING,
+            )
+            .filter(
+                Q(claimed_until__isnull=True)
+                | Q(claimed_until__lte=now)
+                | Q(claimed_by=moderator)
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("created_at", "pk")
+        )
+        ids = list(claimable.values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        ProductReview.all_objects.filter(pk__in=ids).update(
+            claimed_by=moderator,
+            claimed_until=now + timedelta(seconds=settings.REVIEW_CLAIM_LEASE_SECONDS),
+        )
+    return list(
+        ProductReview.all_objects.filter(pk__in=ids)
+        .select_related("product", "user")
+        .order_by("created_at", "pk")
+    )
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over ``(<ordering field>, id)``.
+
+    Each page is fetched with a range condition on the last row of the
+    previous page instead of an OFFSET, and no ``COUNT(*)`` is issued, so
+    deep pages cost the same as the first one. The ordering follows the
+    view's ``OrderingFilter`` (``?ordering=-price``) with ``id`` as the
+    tie-breaker in the same direction. Results the view already ordered by
+    an annotation, such as full-text ``search_rank``, are rejected: there
+    is no model field a cursor could resume from.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+    annotation_ordering_message = (
+        "Cursor pagination cannot follow a relevance ordering; "
+        "pass ordering= or use page numbers."
+    )
+
+    def get_page_size(self, request) -> int:
+        default = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 12
+        raw = request.query_params.get(self.page_size_query_param)
+        try:
+            value = int(raw) if raw else default
+        except (TypeError, ValueError):
+            value = default
+        return max(1, min(value, self.max_page_size))
+
+    def get_ordering(self, request, queryset: QuerySet, view) -> str:
+        ordering = OrderingFilter().get_ordering(request, queryset, view) or ("id",)
+        field = ordering[0]
+        return "id" if field.lstrip("-") == "pk" else field
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None):
+        order_by = queryset.query.order_by
+        if (
+            order_by
+            and isinstance(order_by[0], str)
+            and order_by[0].lstrip("-") in queryset.query.annotations
+        ):
+            raise ParseError(self.annotation_ordering_message)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field_name = self.ordering.lstrip("-")
+        self.descending = self.ordering.startswith("-")
+        order_by = [self.ordering]
+        if self.field_name != "id":
+            order_by.append("-id" if self.descending else "id")
+
+        queryset = queryset.order_by(*order_by)
+        cursor = self.decode_cursor(request, queryset)
+        if cursor is not None:
+            queryset = queryset.filter(self._position_filter(*cursor))
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def _position_filter(self, value: Any, last_id: int) -> Q:
+        suffix = "lt" if self.descending else "gt"
+        if self.field_name == "id":
+            return Q(**{f"id__{suffix}": last_id})
+        # ``field >= value`` keeps the condition sargable for an index on
+        # (field, id); the OR only disambiguates rows that share the value.
+        inclusive = "lte" if self.descending else "gte"
+        return Q(**{f"{self.field_name}__{inclusive}": value}) & (
+            Q(**{f"{self.field_name}__{suffix}": value})
+            | Q(**{self.field_name: value, f"id__{suffix}": last_id})
+        )
+
+    def decode_cursor(self, request, queryset: QuerySet) -> tuple[Any, int] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8")
+            )
+            if payload["o"] != self.ordering:
+                raise ValueError("ordering mismatch")
+            last_id = int(payload["id"])
+            field = queryset.model._meta.get_field(self.field_name)
+            value = field.to_python(payload["v"])
+        except (
+            KeyError,
+            TypeError,
+            ValueError,
+            UnicodeError,
+            binascii.Error,
+            json.JSONDecodeError,
+        ) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        return value, last_id
+
+    def encode_cursor(self, instance) -> str:
+        value = getattr(instance, self.field_name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = {"o": self.ordering, "v": value, "id": instance.pk}
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "page")
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": None,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque keyset cursor taken from the `next` link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class ReviewFeedPagination(KeysetPagination):
+    """
+    Newest reviews first over ``(created_at, id)``, matching the partial
+    ``review_feed_idx`` index; ``?ordering=`` does not apply to the feed.
+    """
+
+    def get_ordering(self, request, queryset: QuerySet, view) -> str:
+        return "-created_at"
+
+
+class OptionalKeysetMixin:
+    """
+    Switch a view to ``keyset_pagination_class`` for ``?pagination=cursor``
+    or when a ``cursor`` is supplied; page-number pagination stays the
+    default.
+    """
+
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params if self.request else {}
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import CATALOG_TAG, invalidate_on_commit, product_tag
+from .models import ProductRatingSummary, ProductReview
+
+SUMMARY_FIELDS = (
+    "reviews_count",
+    "rating_sum",
+    "stars_1",
+    "stars_2",
+    "stars_3",
+    "stars_4",
+    "stars_5",
+    "updated_at",
+)
+
+
+def refresh_rating_summaries(product_ids: Iterable[int]) -> None:
+    """Recompute approved-review aggregates for the given products."""
+    ids = sorted({pk for pk in product_ids if pk})
+    if not ids:
+        return
+    with transaction.atomic():
+        # Lock existing rows in a stable order so concurrent refreshes of the
+        # same product serialize instead of overwriting each other.
+        list(
+            ProductRatingSummary.objects.select_for_update()
+            .filter(product_id__in=ids)
+            .order_by("product_id")
+            .values_list("product_id", flat=True)
+        )
+        histograms: dict[int, dict[int, int]] = defaultdict(dict)
+        rows = (
+            ProductReview.objects.filter(product_id__in=ids)
+            .order_by()
+            .values("product_id", "rating")
+            .annotate(total=Count("id"))
+        )
+        for row in rows:
+            histograms[row["product_id"]][row["rating"]] = row["total"]
+
+        summaries = []
+        for product_id in ids:
+            histogram = histograms.get(product_id, {})
+            summaries.append(
+                ProductRatingSummary(
+                    product_id=product_id,
+                    reviews_count=sum(histogram.values()),
+                    rating_sum=sum(star * total for star, total in histogram.items()),
+                    **{f"stars_{star}": histogram.get(star, 0) for star in range(1, 6)},
+                )
+            )
+        ProductRatingSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=SUMMARY_FIELDS,
+        )
+        invalidate_on_commit(CATALOG_TAG, *(product_tag(pk) for pk in ids))
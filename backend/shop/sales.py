@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .cache import invalidate_sales_on_commit, sales_bucket_key, sales_bucket_start
+from .models import (
+    DailySalesRollup,
+    Order,
+    OrderItem,
+    SalesDelta,
+    SalesKey,
+    SalesRollupQueue,
+)
+
+logger = logging.getLogger(__name__)
+
+SALES_QUEUE_BATCH_SIZE = 1000
+
+BUCKET_EXPRESSIONS = {
+    "day": lambda: F("day"),
+    "week": lambda: TruncWeek("day"),
+    "month": lambda: TruncMonth("day"),
+}
+
+
+def day_bounds(first_day: date, last_day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(first_day, time.min))
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+    return start, end
+
+
+def counted_orders(first_day: date, last_day: date):
+    start, end = day_bounds(first_day, last_day)
+    return Order.objects.filter(placed_at__gte=start, placed_at__lt=end).exclude(
+        status__in=Order.SALES_EXCLUDED_STATUSES
+    )
+
+
+def rebuild_sales_rollups(first_day: date, last_day: date) -> tuple[int, int]:
+    """
+    Recompute the rollups of ``first_day``..``last_day`` from the orders with
+    two grouped queries and replace the stored rows. Returns the number of
+    rows written and how many of them differed from what was stored.
+
+    The days are locked against ``DailySalesRollup.record`` for the whole
+    transaction, before the orders are read, so a checkout committing in the
+    meantime is either counted by the rebuild or queued after it, never lost;
+    the current day can therefore be rebuilt while orders come in. Changes
+    queued for these days before that are already in the orders and are
+    dropped, but count towards what was stored.
+    """
+    tz = timezone.get_current_timezone()
+    days = [
+        first_day + timedelta(days=offset)
+        for offset in range((last_day - first_day).days + 1)
+    ]
+    with transaction.atomic():
+        DailySalesRollup.lock_rollups()
+        DailySalesRollup.lock_days(days, shared=False)
+        orders = counted_orders(first_day, last_day)
+        rebuilt: dict[SalesKey, SalesDelta] = {}
+        totals = (
+            orders.annotate(day=TruncDate("placed_at", tzinfo=tz))
+            .order_by()
+            .values("day", "currency")
+            .annotate(orders_count=Count("id"), revenue=Sum("total_amount"))
+        )
+        for row in totals:
+            rebuilt[(row["day"], row["currency"], None)] = SalesDelta(
+                orders=row["orders_count"], revenue=row["revenue"]
+            )
+        lines = (
+            OrderItem.objects.filter(order__in=orders)
+            .annotate(day=TruncDate("order__placed_at", tzinfo=tz))
+            .order_by()
+            .values("day", "order__currency", "product_id")
+            .annotate(
+                orders_count=Count("order_id", distinct=True),
+                items=Sum("quantity"),
+                revenue=Sum("line_total"),
+                name=Max("product_name"),
+            )
+        )
+        for row in lines:
+            day, currency = row["day"], row["order__currency"]
+            rebuilt[(day, currency, row["product_id"])] = SalesDelta(
+                orders=row["orders_count"],
+                quantity=row["items"],
+                revenue=row["revenue"],
+                product_name=row["name"],
+            )
+            rebuilt[(day, currency, None)].quantity += row["items"]
+
+        stored = DailySalesRollup.objects.select_for_update().filter(
+            day__gte=first_day, day__lte=last_day
+        )
+        previous = {
+            (row.day, row.currency, row.product_id): (
+                row.orders,
+                row.quantity,
+                row.revenue,
+            )
+            for row in stored
+        }
+        queued = SalesRollupQueue.objects.filter(day__gte=first_day, day__lte=last_day)
+        for key, delta in _sum_queued(queued).items():
+            orders_count, items, revenue = previous.get(key, (0, 0, Decimal("0.00")))
+            previous[key] = (
+                orders_count + delta.orders,
+                items + delta.quantity,
+                revenue + delta.revenue,
+            )
+        queued.delete()
+        stored.delete()
+        currencies = {key[1] for key in previous.keys() | rebuilt.keys()}
+        invalidate_sales_on_commit(
+            (day, currency) for day in days for currency in currencies
+        )
+        DailySalesRollup.objects.bulk_create(
+            [
+                DailySalesRollup(
+                    day=day,
+                    currency=currency,
+                    product_id=product_id,
+                    product_name=delta.product_name,
+                    orders=delta.orders,
+                    quantity=delta.quantity,
+                    revenue=delta.revenue,
+                )
+                for (day, currency, product_id), delta in rebuilt.items()
+            ]
+        )
+    mismatched = sum(
+        previous.get(key) != (delta.orders, delta.quantity, delta.revenue)
+        for key, delta in rebuilt.items()
+    ) + len(previous.keys() - rebuilt.keys())
+    return len(rebuilt), mismatched
+
+
+def _sum_queued(entries) -> dict[SalesKey, SalesDelta]:
+    deltas: dict[SalesKey, SalesDelta] = {}
+    for entry in entries:
+        delta = deltas.setdefault(
+            (entry.day, entry.currency, entry.product_id), SalesDelta()
+        )
+        delta.orders += entry.orders
+        delta.quantity += entry.quantity
+        delta.revenue += entry.revenue
+        delta.product_name = entry.product_name or delta.product_name
+    return deltas
+
+
+def process_sales_queue(batch_size: int = SALES_QUEUE_BATCH_SIZE) -> int:
+    """
+    Fold the oldest ``batch_size`` queued sales changes into the rollups and
+    return how many were folded. Changes are summed per row first, so a burst
+    of checkouts costs one UPDATE per rollup row touched rather than one per
+    order, and only this worker ever waits on the daily total row.
+    """
+    with transaction.atomic():
+        DailySalesRollup.lock_rollups()
+        entries = list(SalesRollupQueue.objects.order_by("pk")[:batch_size])
+        if not entries:
+            return 0
+        DailySalesRollup.apply(_sum_queued(entries))
+        SalesRollupQueue.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+    return len(entries)
+
+
+def sales_rollups(date_from: date | None = None, date_to: date | None = None):
+    rows = DailySalesRollup.objects.all()
+    if date_from:
+        rows = rows.filter(day__gte=date_from)
+    if date_to:
+        rows = rows.filter(day__lte=date_to)
+    return rows
+
+
+def sales_overview(date_from: date | None = None, date_to: date | None = None):
+    """Per-currency totals and the top products, read from rollup rows only."""
+    rows = sales_rollups(date_from, date_to)
+    totals = (
+        rows.filter(product__isnull=True)
+        .order_by("currency")
+        .values("currency")
+        .annotate(total_sales=Sum("revenue"), total_orders=Sum("orders"))
+        .filter(total_orders__gt=0)
+    )
+    top_products = (
+        rows.filter(product__isnull=False)
+        .values("product_id")
+        .annotate(
+            product_name=Max("product_name"),
+            total_quantity=Sum("quantity"),
+            total_sales=Sum("revenue"),
+        )
+        .filter(total_quantity__gt=0)
+        .order_by("-total_quantity", "product_id")[:5]
+    )
+    return list(totals), list(top_products)
+
+
+def shift_bucket(start: date, interval: str, count: int) -> date:
+    """The bucket ``count`` intervals after (negative: before) ``start``."""
+    if interval == "month":
+        month = start.year * 12 + start.month - 1 + count
+        return date(month // 12, month % 12 + 1, 1)
+    return start + timedelta(days=count * (7 if interval == "week" else 1))
+
+
+def _bucket_totals(interval: str, currency: str, first: date, last: date):
+    """Orders and revenue per bucket from the total rollup rows, in one query."""
+    rows = (
+        DailySalesRollup.objects.filter(
+            product__isnull=True, currency=currency, day__gte=first, day__lte=last
+        )
+        .annotate(bucket=BUCKET_EXPRESSIONS[interval]())
+        .order_by()
+        .values("bucket")
+        .annotate(orders_count=Sum("orders"), revenue_sum=Sum("revenue"))
+    )
+    return {
+        row["bucket"]: {
+            "orders": row["orders_count"] or 0,
+            "revenue": str(row["revenue_sum"] or Decimal("0.00")),
+        }
+        for row in rows
+    }
+
+
+def sales_series(interval: str, currency: str, buckets: int) -> list[dict]:
+    """
+    Orders and revenue for the last ``buckets`` intervals, oldest first. Past
+    buckets are cached for ``SALES_BUCKET_CACHE_TIMEOUT`` (rollup writes drop
+    them sooner); only the current, still changing bucket is recomputed on
+    every call.
+    """
+    current = sales_bucket_start(timezone.localdate(), interval)
+    starts = [shift_bucket(current, interval, -offset) for offset in range(buckets)]
+    starts.reverse()
+    keys = {start: sales_bucket_key(interval, currency, start) for start in starts}
+    try:
+        cached = cache.get_many([keys[start] for start in starts[:-1]])
+    except Exception as exc:
+        logger.warning("Sales bucket cache unavailable: %s", exc)
+        cached = {}
+    missing = [start for start in starts if keys[start] not in cached]
+    empty = {"orders": 0, "revenue": "0.00"}
+    last_day = shift_bucket(current, interval, 1) - timedelta(days=1)
+    computed = _bucket_totals(interval, currency, missing[0], last_day)
+    fresh = {start: computed.get(start, empty) for start in missing}
+    try:
+        cache.set_many(
+            {keys[start]: fresh[start] for start in missing if start != current},
+            timeout=settings.SALES_BUCKET_CACHE_TIMEOUT,
+        )
+    except Exception as exc:
+        logger.warning("Failed to cache sales buckets: %s", exc)
+    series = []
+    for start in starts:
+        bucket = cached.get(keys[start]) or fresh[start]
+        series.append({"period_start": start, **bucket})
+    return series
+
+
+def summarize_buckets(series: list[dict]) -> dict:
+    orders = sum(bucket["orders"] for bucket in series)
+    revenue = sum((Decimal(bucket["revenue"]) for bucket in series), Decimal("0.00"))
+    return {
+        "orders": orders,
+        "revenue": str(revenue),
+        "average_order_value": average_order_value(revenue, orders),
+    }
+
+
+def average_order_value(revenue, orders: int) -> str | None:
+    if not orders:
+        return None
+    return str((Decimal(revenue) / orders).quantize(Decimal("0.01")))
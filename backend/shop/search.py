@@ -1,32 +1,85 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Any
 
 from algoliasearch.search_client import SearchClient
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, Q, QuerySet
 from django.utils import timezone
 
-from .models import Product
+from .models import Product, ProductImage, SearchIndexQueue, shard_stock_sum
+
+QUEUE_BATCH_SIZE = 500
+QUEUE_RETRY_BASE_SECONDS = 30
+QUEUE_RETRY_MAX_SECONDS = 3600
+SYNC_BATCH_SIZE = 1000
+SYNC_CHUNK_SIZE = 500
+SYNC_WORKERS = 4
+SEARCH_IMAGES_ATTR = "search_images"
 
 _client = None
 _index = None
 
 
-def get_index():
-    global _client, _index
+def get_client():
+    global _client
     if not settings.ALGOLIA_ENABLED:
         return None
     if _client is None:
         _client = SearchClient.create(
             settings.ALGOLIA_APP_ID, settings.ALGOLIA_ADMIN_API_KEY
         )
+    return _client
+
+
+def get_index():
+    global _index
+    client = get_client()
+    if client is None:
+        return None
     if _index is None:
-        _index = _client.init_index(settings.ALGOLIA_INDEX_NAME)
+        _index = client.init_index(settings.ALGOLIA_INDEX_NAME)
     return _index
 
 
+def with_search_relations(queryset: QuerySet[Product]) -> QuerySet[Product]:
+    """
+    Load everything ``serialize_product`` reads in a fixed number of queries:
+    the category is joined, sharded stock is summed in place and the images
+    arrive main-first in ``product.search_images``.
+    """
+    return (
+        queryset.select_related("category")
+        .annotate(shard_stock=shard_stock_sum())
+        .prefetch_related(
+            Prefetch(
+                "images",
+                queryset=ProductImage.objects.order_by("-is_main", "pk"),
+                to_attr=SEARCH_IMAGES_ATTR,
+            )
+        )
+    )
+
+
+def _main_image(product: Product) -> ProductImage | None:
+    images = getattr(product, SEARCH_IMAGES_ATTR, None)
+    if images is None:
+        # Served from a plain prefetch_related("images") cache when present.
+        images = sorted(
+            product.images.all(), key=lambda image: (not image.is_main, image.pk)
+        )
+    return images[0] if images else None
+
+
 def serialize_product(product: Product) -> dict[str, Any]:
-    main_image = product.images.filter(is_main=True).first() or product.images.first()
+    main_image = _main_image(product)
     image_url = main_image.image.url if main_image else ""
     return {
         "objectID": str(product.id),
@@ -37,7 +90,7 @@ def serialize_product(product: Product) -> dict[str, Any]:
         "description": product.description,
         "price": float(product.price),
         "currency": product.currency,
-        "stock": product.stock,
+        "stock": product.total_stock,
         "category": product.category.name if product.category else "",
         "category_slug": product.category.slug if product.category else "",
         "is_active": product.is_active,
@@ -50,6 +103,18 @@ def serialize_product(product: Product) -> dict[str, Any]:
     }
 
 
+def serialize_products(
+    queryset: QuerySet[Product], chunk_size: int = SYNC_CHUNK_SIZE
+) -> Iterator[dict[str, Any]]:
+    """
+    Stream records for ``queryset``. Each chunk of ``chunk_size`` products
+    costs one product query and one image query, whatever its size.
+    """
+    products = with_search_relations(queryset).iterator(chunk_size=chunk_size)
+    for product in products:
+        yield serialize_product(product)
+
+
 def index_product(product_id: int) -> None:
     if not settings.ALGOLIA_ENABLED:
         return
@@ -57,11 +122,7 @@ def index_product(product_id: int) -> None:
     if not index:
         return
     try:
-        product = (
-            Product.objects.select_related("category")
-            .prefetch_related("images")
-            .get(pk=product_id)
-        )
+        product = with_search_relations(Product.objects).get(pk=product_id)
     except Product.DoesNotExist:
         remove_product(product_id)
         return
@@ -80,19 +141,212 @@ def remove_product(product_id: int) -> None:
     index.delete_object(str(product_id))
 
 
-def sync_all_products(clear_index: bool = False) -> None:
+@dataclass
+class SyncResult:
+    saved: int = 0
+    deleted: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Records pushed per second."""
+        return self.saved / self.elapsed if self.elapsed else 0.0
+
+
+def _batched(records: Iterable[dict[str, Any]], size: int) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _push_batches(
+    index,
+    batches: Iterable[list[dict[str, Any]]],
+    workers: int,
+    wait: bool,
+    result: SyncResult,
+    progress: Callable[[SyncResult], None] | None,
+) -> None:
+    """
+    Send ``batches`` over a thread pool. At most ``2 * workers`` batches are
+    in flight, so memory stays bounded while the database cursor streams.
+    """
+
+    def push(batch):
+        response = index.save_objects(batch)
+        if wait:
+            response.wait()
+        return len(batch)
+
+    def collect(done):
+        for future in done:
+            result.saved += future.result()
+            result.batches += 1
+        result.elapsed = time.perf_counter() - started
+        if progress is not None:
+            progress(result)
+
+    started = time.perf_counter() - result.elapsed
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(push, batch))
+            if len(pending) >= 2 * workers:
+                done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        if pending:
+            done, _ = wait_futures(pending)
+            collect(done)
+
+
+def sync_all_products(
+    clear_index: bool = False,
+    since: datetime | None = None,
+    batch_size: int = SYNC_BATCH_SIZE,
+    workers: int = SYNC_WORKERS,
+    progress: Callable[[SyncResult], None] | None = None,
+) -> SyncResult:
+    """
+    Stream active products into Algolia in ``batch_size`` batches sent by
+    ``workers`` threads.
+
+    ``since`` limits the sync to products changed after that moment and
+    removes the ones hidden or deleted since. ``clear_index`` rebuilds into a
+    temporary index (with the live settings, synonyms and rules) and moves it
+    over the live one, so searches never hit an empty index.
+    """
+    result = SyncResult()
     if not settings.ALGOLIA_ENABLED:
-        return
+        return result
     index = get_index()
     if not index:
+        return result
+    products = Product.objects.filter(is_active=True).order_by("pk")
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+    records = serialize_products(products)
+    batches = _batched(records, batch_size)
+
+    if not clear_index:
+        _push_batches(index, batches, workers, False, result, progress)
+        if since is not None:
+            removed = [
+                str(pk)
+                for pk in Product.all_objects.filter(
+                    Q(updated_at__gte=since, is_active=False) | Q(deleted_at__gte=since)
+                ).values_list("pk", flat=True)
+            ]
+            if removed:
+                index.delete_objects(removed)
+                result.deleted = len(removed)
+        return result
+
+    temporary = get_client().init_index(
+        f"{settings.ALGOLIA_INDEX_NAME}_tmp_{int(time.time())}"
+    )
+    index.copy_to(temporary.name, {"scope": ["settings", "synonyms", "rules"]}).wait()
+    try:
+        _push_batches(temporary, batches, workers, True, result, progress)
+        temporary.move_to(index.name).wait()
+    except Exception:
+        temporary.delete()
+        raise
+    return result
+
+
+def enqueue_products(product_ids: Iterable[int]) -> None:
+    """
+    Mark products for reindexing in the current transaction. Repeated changes
+    collapse into one row whose ``enqueued_at`` moves forward.
+    """
+    if not settings.ALGOLIA_ENABLED:
         return
-    if clear_index:
-        index.clear_objects()
-    records = [
-        serialize_product(product)
-        for product in Product.objects.select_related("category")
-        .prefetch_related("images")
-        .filter(is_active=True)
+    now = timezone.now()
+    entries = [
+        SearchIndexQueue(product_id=product_id, enqueued_at=now)
+        for product_id in sorted(set(product_ids))
     ]
-    if records:
-        index.save_objects(records)
+    if entries:
+        SearchIndexQueue.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["product_id"],
+            update_fields=["enqueued_at"],
+        )
+
+
+def queue_retry_delay(attempts: int) -> timedelta:
+    seconds = QUEUE_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, QUEUE_RETRY_MAX_SECONDS))
+
+
+def enqueue_products_on_commit(product_ids: Iterable[int]) -> None:
+    """
+    Mark products for reindexing once the current transaction commits, in a
+    statement of its own. For changes every checkout makes, such as stock,
+    the queue row is then not locked for the rest of the checkout.
+    """
+    if not settings.ALGOLIA_ENABLED:
+        return
+    product_ids = set(product_ids)
+    transaction.on_commit(lambda: enqueue_products(product_ids))
+
+
+def process_index_queue(
+    batch_size: int = QUEUE_BATCH_SIZE, delay: float = 0
+) -> tuple[int, int]:
+    """
+    Push one batch of queued products to Algolia with a single
+    ``save_objects`` and ``delete_objects`` call and return how many records
+    were saved and deleted. Only entries older than ``delay`` seconds are
+    taken, so bursts of edits to a product are sent once.
+
+    A failed push holds its entries back with exponential backoff. An entry
+    that already failed is retried in a batch of its own, so one product
+    Algolia keeps rejecting (an oversized record, say) cannot stall the rest
+    of the queue.
+    """
+    index = get_index()
+    if not index:
+        return 0, 0
+    now = timezone.now()
+    due = SearchIndexQueue.objects.filter(
+        enqueued_at__lte=now - timedelta(seconds=delay), available_at__lte=now
+    )
+    retry = due.filter(attempts__gt=0).order_by("available_at", "pk").first()
+    if retry is not None:
+        entries = [retry]
+    else:
+        entries = list(due.order_by("enqueued_at", "pk")[:batch_size])
+    if not entries:
+        return 0, 0
+    product_ids = [entry.product_id for entry in entries]
+    records = list(
+        serialize_products(Product.objects.filter(pk__in=product_ids, is_active=True))
+    )
+    indexed = {int(record["objectID"]) for record in records}
+    removed = [str(pk) for pk in product_ids if pk not in indexed]
+    try:
+        if records:
+            index.save_objects(records)
+        if removed:
+            index.delete_objects(removed)
+    except Exception:
+        # Either a lone retry or fresh entries: they share one attempt count.
+        attempts = entries[0].attempts + 1
+        SearchIndexQueue.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            attempts=attempts, available_at=now + queue_retry_delay(attempts)
+        )
+        raise
+    # Entries re-enqueued while the batch was in flight stay queued.
+    processed = Q()
+    for entry in entries:
+        processed |= Q(pk=entry.pk, enqueued_at=entry.enqueued_at)
+    SearchIndexQueue.objects.filter(processed).delete()
+    return len(records), len(removed)
@@ -3,13 +3,16 @@ from __future__ import annotations
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import models
 from django.utils.text import slugify
 from rest_framework import serializers
 
+from .carts import persist_guest_cart
 from .models import (
     Cart,
     CartItem,
     Category,
+    InsufficientStockError,
     Order,
     OrderItem,
     Product,
@@ -19,6 +22,11 @@ from .models import (
 
 User = get_user_model()
 
+USER_REVIEWS_CONTEXT_KEY = "user_reviews"
+MAX_CART_OPERATIONS = 100
+MAX_MODERATION_BATCH = 500
+MAX_REVIEW_CLAIM = 50
+
 
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -129,7 +137,35 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         return data
 
 
+class ReviewBulkModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_MODERATION_BATCH,
+    )
+    status = serializers.ChoiceField(choices=ProductReview.ModerationStatus.choices)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class ReviewClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_REVIEW_CLAIM, default=10
+    )
+
+
+class ProductListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        products = list(data.all() if isinstance(data, models.Manager) else data)
+        self.child.load_user_reviews(products)
+        return super().to_representation(products)
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    """
+    Pass ``user_fields=False`` to drop ``can_review``/``user_review`` where
+    the product is nested and the per-user state is not needed.
+    """
+
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         source="category",
@@ -144,6 +180,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = (
             "id",
             "category",
@@ -179,6 +216,27 @@ class ProductSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
+    def __init__(self, *args, user_fields: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not user_fields:
+            self.fields.pop("can_review")
+            self.fields.pop("user_review")
+
+    def to_representation(self, instance: Product):
+        data = super().to_representation(instance)
+        if "stock" in data:
+            data["stock"] = instance.total_stock
+        return data
+
+    def update(self, instance: Product, validated_data):
+        stock = None
+        if instance.stock_shard_count and "stock" in validated_data:
+            stock = validated_data.pop("stock")
+        instance = super().update(instance, validated_data)
+        if stock is not None:
+            instance.set_stock_shards(instance.stock_shard_count, total=stock)
+        return instance
+
     def get_average_rating(self, obj: Product):
         value = getattr(obj, "average_rating", None)
         if value is None:
@@ -186,43 +244,80 @@ class ProductSerializer(serializers.ModelSerializer):
         return round(float(value), 2)
 
     def get_can_review(self, obj: Product) -> bool:
-        request = self.context.get("request")
-        if not request:
-            return False
-        user = request.user if request.user.is_authenticated else None
-        if (
-            user
-            and ProductReview.objects.with_unapproved()
-            .filter(
-                product=obj,
-                user=user,
-                deleted_at__isnull=True,
-            )
-            .exists()
-        ):
+        if not self.context.get("request"):
             return False
-        return True
+        return self._get_user_review(obj) is None
 
     def get_user_review(self, obj: Product):
+        review = self._get_user_review(obj)
+        if not review:
+            return None
+        return ProductReviewSerializer(review, context=self.context).data
+
+    def _get_request_user(self):
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return None
-        review = (
+        return request.user
+
+    def load_user_reviews(self, products) -> None:
+        """
+        Fetch the requesting user's reviews for ``products`` in one query.
+
+        Results are kept in the shared serializer context, keyed by product
+        id (``None`` when the user has not reviewed the product), so that
+        ``can_review`` and ``user_review`` never query per product.
+        """
+        user = self._get_request_user()
+        if user is None or "user_review" not in self.fields:
+            return
+        reviews = self.context.setdefault(USER_REVIEWS_CONTEXT_KEY, {})
+        missing = [product.pk for product in products if product.pk not in reviews]
+        if not missing:
+            return
+        reviews.update(dict.fromkeys(missing))
+        queryset = (
             ProductReview.objects.with_unapproved()
-            .filter(
-                product=obj,
-                user=request.user,
-                deleted_at__isnull=True,
-            )
-            .first()
+            .filter(product_id__in=missing, user=user)
+            .select_related("product", "user")
         )
-        if not review:
+        for review in queryset:
+            reviews[review.product_id] = review
+
+    def _get_user_review(self, obj: Product) -> ProductReview | None:
+        if self._get_request_user() is None:
             return None
-        return ProductReviewSerializer(review, context=self.context).data
+        self.load_user_reviews([obj])
+        return self.context[USER_REVIEWS_CONTEXT_KEY].get(obj.pk)
+
+
+class CartProductSerializer(serializers.ModelSerializer):
+    """
+    The slice of a product a cart line needs. Reads only the product row and
+    its prefetched images, so a cart costs the same queries at any size.
+    """
+
+    main_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ("id", "slug", "name", "price", "currency", "main_image")
+        read_only_fields = fields
+
+    def get_main_image(self, obj: Product):
+        # Picked from the prefetched images: the main one, else the oldest.
+        image = min(
+            obj.images.all(),
+            key=lambda image: (not image.is_main, image.pk),
+            default=None,
+        )
+        if image is None:
+            return None
+        return ProductImageSerializer(image, context=self.context).data
 
 
 class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = CartProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         source="product",
         queryset=Product.objects.filter(is_active=True),
@@ -240,6 +335,48 @@ class CartItemSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "product", "subtotal", "cart")
 
 
+class CartItemAddSerializer(serializers.Serializer):
+    product_id = serializers.PrimaryKeyRelatedField(
+        source="product",
+        queryset=Product.objects.filter(is_active=True),
+    )
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=("add", "set", "remove"))
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+    def validate(self, attrs):
+        if attrs["op"] == "add" and attrs["quantity"] < 1:
+            raise serializers.ValidationError(
+                {"quantity": "Ensure this value is greater than or equal to 1."}
+            )
+        return attrs
+
+
+class CartOperationsSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(
+        many=True, allow_empty=False, max_length=MAX_CART_OPERATIONS
+    )
+
+    def validate_operations(self, operations):
+        # One query for every product referenced, instead of one per line.
+        product_ids = {op["product_id"] for op in operations if op["op"] != "remove"}
+        active = set(
+            Product.objects.filter(pk__in=product_ids, is_active=True).values_list(
+                "pk", flat=True
+            )
+        )
+        missing = sorted(product_ids - active)
+        if missing:
+            raise serializers.ValidationError(
+                f"Unknown or inactive products: {', '.join(map(str, missing))}."
+            )
+        return operations
+
+
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     subtotal = serializers.DecimalField(
@@ -247,19 +384,16 @@ class CartSerializer(serializers.ModelSerializer):
         decimal_places=2,
         read_only=True,
     )
-    total_items = serializers.SerializerMethodField()
+    total_items = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Cart
         fields = ("id", "items", "subtotal", "total_items", "created_at", "updated_at")
         read_only_fields = fields
 
-    def get_total_items(self, obj: Cart) -> int:
-        return sum(item.quantity for item in obj.items.all())
-
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductSerializer(read_only=True, user_fields=False)
 
     class Meta:
         model = OrderItem
@@ -334,7 +468,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
     def validate_cart_id(self, value):
         if not Cart.objects.filter(id=value).exists():
-            raise serializers.ValidationError("Cart not found.")
+            request = self.context.get("request")
+            # Guest carts kept in Redis are written to the database here.
+            if persist_guest_cart(value, getattr(request, "user", None)) is None:
+                raise serializers.ValidationError("Cart not found.")
         return value
 
     def create(self, validated_data):
@@ -356,6 +493,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 shipping_amount=shipping_amount,
                 **validated_data,
             )
+        except InsufficientStockError as exc:
+            raise serializers.ValidationError(
+                {"detail": str(exc), "items": exc.shortages}
+            ) from exc
         except ValueError as exc:
             raise serializers.ValidationError(str(exc)) from exc
         self.auto_registered_user = resolved_user if is_auto_registered else None
@@ -1,22 +1,204 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Product
-from .search import index_product, remove_product
+from .cache import (
+    CATALOG_TAG,
+    CATEGORIES_TAG,
+    category_tag,
+    invalidate_on_commit,
+    product_tag,
+)
+from .local_search import refresh_products, refresh_products_on_commit
+from .models import (
+    Category,
+    DailySalesRollup,
+    Order,
+    OrderItem,
+    Product,
+    ProductImage,
+    ProductReview,
+)
+from .ratings import refresh_rating_summaries
+from .search import enqueue_products
+from .utils import invalidate_purchases_on_commit
 
 
 @receiver(post_save, sender=Product, dispatch_uid="shop_product_algolia_sync")
 def product_saved(sender, instance: Product, **kwargs):
-    if not settings.ALGOLIA_ENABLED:
-        return
-    index_product(instance.pk)
+    enqueue_products([instance.pk])
 
 
 @receiver(post_delete, sender=Product, dispatch_uid="shop_product_algolia_delete")
 def product_deleted(sender, instance: Product, **kwargs):
-    if not settings.ALGOLIA_ENABLED:
+    enqueue_products([instance.pk])
+
+
+@receiver(post_save, sender=ProductImage, dispatch_uid="shop_image_algolia_save")
+@receiver(post_delete, sender=ProductImage, dispatch_uid="shop_image_algolia_delete")
+def product_image_algolia_changed(sender, instance: ProductImage, **kwargs):
+    enqueue_products([instance.product_id])
+
+
+@receiver(post_save, sender=Category, dispatch_uid="shop_category_algolia_save")
+def category_algolia_changed(sender, instance: Category, created, **kwargs):
+    if created or not settings.ALGOLIA_ENABLED:
+        return
+    enqueue_products(
+        Product.objects.filter(category_id=instance.pk).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=ProductReview, dispatch_uid="shop_review_rating_sync")
+def review_saved(sender, instance: ProductReview, created: bool, **kwargs):
+    if (
+        created
+        and instance.moderation_status != ProductReview.ModerationStatus.APPROVED
+    ):
+        return
+    refresh_rating_summaries([instance.product_id])
+
+
+@receiver(post_delete, sender=ProductReview, dispatch_uid="shop_review_rating_delete")
+def review_deleted(sender, instance: ProductReview, origin=None, **kwargs):
+    # The summary row is removed together with the product itself.
+    if isinstance(origin, Product) or getattr(origin, "model", None) is Product:
+        return
+    refresh_rating_summaries([instance.product_id])
+
+
+@receiver(post_save, sender=Product, dispatch_uid="shop_product_cache_save")
+@receiver(post_delete, sender=Product, dispatch_uid="shop_product_cache_delete")
+def product_changed(sender, instance: Product, **kwargs):
+    invalidate_on_commit(CATALOG_TAG, product_tag(instance.pk))
+
+
+@receiver(post_save, sender=ProductImage, dispatch_uid="shop_image_cache_save")
+@receiver(post_delete, sender=ProductImage, dispatch_uid="shop_image_cache_delete")
+def product_image_changed(sender, instance: ProductImage, **kwargs):
+    invalidate_on_commit(CATALOG_TAG, product_tag(instance.product_id))
+
+
+@receiver(post_save, sender=Category, dispatch_uid="shop_category_cache_save")
+@receiver(post_delete, sender=Category, dispatch_uid="shop_category_cache_delete")
+def category_changed(sender, instance: Category, **kwargs):
+    invalidate_on_commit(CATALOG_TAG, CATEGORIES_TAG, category_tag(instance.pk))
+
+
+@receiver(post_save, sender=Product, dispatch_uid="shop_product_local_search_save")
+@receiver(post_delete, sender=Product, dispatch_uid="shop_product_local_search_delete")
+def product_local_search_changed(sender, instance: Product, **kwargs):
+    refresh_products_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=ProductImage, dispatch_uid="shop_image_local_search_save")
+@receiver(
+    post_delete, sender=ProductImage, dispatch_uid="shop_image_local_search_delete"
+)
+def product_image_local_search_changed(sender, instance: ProductImage, **kwargs):
+    refresh_products_on_commit([instance.product_id])
+
+
+@receiver(post_save, sender=Category, dispatch_uid="shop_category_local_search_save")
+def category_local_search_changed(sender, instance: Category, created, **kwargs):
+    # Records embed the category name, so renames touch every product in it.
+    if created or not settings.LOCAL_SEARCH_ENABLED:
+        return
+    products = Product.objects.filter(category_id=instance.pk)
+    transaction.on_commit(
+        lambda: refresh_products(products.values_list("pk", flat=True))
+    )
+
+
+SALES_FIELDS = ("status", "deleted_at", "placed_at", "currency")
+PURCHASE_FIELDS = ("status", "payment_status", "deleted_at", "user")
+TRACKED_ORDER_FIELDS = tuple(dict.fromkeys(SALES_FIELDS + PURCHASE_FIELDS))
+
+
+@receiver(pre_save, sender=Order, dispatch_uid="shop_order_sales_before")
+def order_before_save(sender, instance: Order, raw=False, update_fields=None, **kwargs):
+    instance._before = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(TRACKED_ORDER_FIELDS):
+        return
+    instance._before = (
+        Order.all_objects.filter(pk=instance.pk).values(*TRACKED_ORDER_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Order, dispatch_uid="shop_order_sales_sync")
+def order_sales_changed(sender, instance: Order, created: bool, **kwargs):
+    # New orders are recorded by Order.create_from_cart once their lines exist.
+    before = getattr(instance, "_before", None)
+    if created or before is None:
+        return
+    was_counted = (
+        before["deleted_at"] is None
+        and before["status"] not in Order.SALES_EXCLUDED_STATUSES
+    )
+    old_key = (timezone.localdate(before["placed_at"]), before["currency"])
+    new_key = (timezone.localdate(instance.placed_at), instance.currency)
+    if was_counted == instance.counts_as_sale and (
+        not was_counted or old_key == new_key
+    ):
+        return
+    if was_counted:
+        day, currency = old_key
+        DailySalesRollup.record(
+            instance.sales_contribution(day=day, currency=currency), sign=-1
+        )
+    if instance.counts_as_sale:
+        DailySalesRollup.record(instance.sales_contribution())
+
+
+@receiver(pre_delete, sender=Order, dispatch_uid="shop_order_sales_delete")
+def order_sales_deleted(sender, instance: Order, **kwargs):
+    # Before the cascade removes the lines the contribution is built from.
+    if instance.counts_as_sale:
+        DailySalesRollup.record(instance.sales_contribution(), sign=-1)
+
+
+@receiver(post_save, sender=Order, dispatch_uid="shop_order_purchases_sync")
+def order_purchases_changed(sender, instance: Order, created: bool, **kwargs):
+    if created:
+        if instance.counts_as_purchase:
+            invalidate_purchases_on_commit([instance.user_id])
+        return
+    before = getattr(instance, "_before", None)
+    if before is None:
+        return
+    was_purchase = (
+        before["deleted_at"] is None
+        and before["status"] in Order.PURCHASE_STATUSES
+        and before["payment_status"] == Order.PaymentStatus.PAID
+    )
+    if was_purchase == instance.counts_as_purchase and (
+        not was_purchase or before["user"] == instance.user_id
+    ):
+        return
+    invalidate_purchases_on_commit([before["user"], instance.user_id])
+
+
+@receiver(post_delete, sender=Order, dispatch_uid="shop_order_purchases_delete")
+def order_purchases_deleted(sender, instance: Order, **kwargs):
+    if instance.counts_as_purchase:
+        invalidate_purchases_on_commit([instance.user_id])
+
+
+@receiver(post_save, sender=OrderItem, dispatch_uid="shop_order_item_purchases_save")
+@receiver(
+    post_delete, sender=OrderItem, dispatch_uid="shop_order_item_purchases_delete"
+)
+def order_item_purchases_changed(sender, instance: OrderItem, origin=None, **kwargs):
+    # Lines edited by hand on an order that already counts (e.g. in the admin);
+    # deleting the order itself is handled by order_purchases_deleted.
+    if isinstance(origin, Order) or getattr(origin, "model", None) is Order:
         return
-    remove_product(instance.pk)
+    order = Order.all_objects.filter(pk=instance.order_id).first()
+    if order is not None and order.counts_as_purchase:
+        invalidate_purchases_on_commit([order.user_id])
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.models import Cart, CartItem, Category, Product
+from shop.tests.test_guest_carts import FakeRedis
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class CartOperationsTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Shoes")
+        self.sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=5
+        )
+        self.boot = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-1", price=25, stock=5
+        )
+        self.sandal = Product.objects.create(
+            category=category, name="Sandal", sku="SNDL-1", price=5, stock=5
+        )
+        self.cart = Cart.objects.create()
+        self.operations_url = reverse("cart-operations", args=[self.cart.id])
+
+    def _add(self, product, quantity, cart_id=None):
+        return self.client.post(
+            reverse("cart-items-add", args=[cart_id or self.cart.id]),
+            {"product_id": product.id, "quantity": quantity},
+            format="json",
+        )
+
+    def test_add_increments_existing_line_in_one_statement(self):
+        self._add(self.sneaker, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._add(self.sneaker, 2)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data["quantity"], 3)
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "shop_cartitem" in query["sql"]
+            and query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(len(writes), 1)
+
+    def test_batch_applies_operations_and_returns_cart(self):
+        CartItem.objects.create(cart=self.cart, product=self.sneaker, quantity=1)
+        CartItem.objects.create(cart=self.cart, product=self.boot, quantity=1)
+
+        response = self.client.post(
+            self.operations_url,
+            {
+                "operations": [
+                    {"op": "add", "product_id": self.sneaker.id, "quantity": 2},
+                    {"op": "remove", "product_id": self.boot.id},
+                    {"op": "set", "product_id": self.sandal.id, "quantity": 4},
+                    {"op": "add", "product_id": self.sandal.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            sorted(
+                (item["product"]["id"], item["quantity"])
+                for item in response.data["items"]
+            ),
+            [(self.sneaker.id, 3), (self.sandal.id, 5)],
+        )
+        self.assertEqual(response.data["subtotal"], "55.00")
+
+    def test_invalid_batch_changes_nothing(self):
+        CartItem.objects.create(cart=self.cart, product=self.sneaker, quantity=1)
+        self.boot.is_active = False
+        self.boot.save(update_fields=["is_active"])
+
+        response = self.client.post(
+            self.operations_url,
+            {
+                "operations": [
+                    {"op": "remove", "product_id": self.sneaker.id},
+                    {"op": "add", "product_id": self.boot.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CartItem.objects.get().quantity, 1)
+
+    @override_settings(GUEST_CART_BACKEND="redis")
+    def test_guest_cart_operations_stay_in_redis(self):
+        redis = FakeRedis()
+        with mock.patch("shop.carts.redis_client", return_value=redis):
+            cart_id = self.client.post(reverse("cart-list")).data["id"]
+            self._add(self.sneaker, 1, cart_id)
+            added = self._add(self.sneaker, 1, cart_id)
+            response = self.client.post(
+                reverse("cart-operations", args=[cart_id]),
+                {
+                    "operations": [
+                        {"op": "set", "product_id": self.boot.id, "quantity": 2},
+                        {"op": "remove", "product_id": self.sneaker.id},
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(added.data["quantity"], 2)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            [
+                (item["product"]["id"], item["quantity"])
+                for item in response.data["items"]
+            ],
+            [(self.boot.id, 2)],
+        )
+        self.assertEqual(CartItem.objects.count(), 0)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.models import Cart, CartItem, Category, Product, ProductImage
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class CartPayloadTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Shoes")
+        self.cart = Cart.objects.create()
+        self.url = reverse("cart-detail", args=[self.cart.id])
+
+    def _add_lines(self, count: int) -> None:
+        start = CartItem.objects.filter(cart=self.cart).count()
+        for number in range(start, start + count):
+            product = Product.objects.create(
+                category=self.category,
+                name=f"Sneaker {number}",
+                sku=f"SNKR-{number}",
+                price=10,
+                stock=5,
+                description="Long description " * 50,
+            )
+            ProductImage.objects.create(
+                product=product,
+                image=f"products/{number}.jpg",
+                is_main=True,
+            )
+            CartItem.objects.create(cart=self.cart, product=product, quantity=2)
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries.captured_queries)
+
+    def test_cart_lines_carry_a_compact_product(self):
+        self._add_lines(1)
+
+        response, _ = self._get()
+
+        product = response.data["items"][0]["product"]
+        self.assertEqual(
+            set(product), {"id", "slug", "name", "price", "currency", "main_image"}
+        )
+        self.assertTrue(product["main_image"]["is_main"])
+        self.assertEqual(response.data["subtotal"], "20.00")
+        self.assertEqual(response.data["total_items"], 2)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        self._add_lines(1)
+        _, small = self._get()
+        self._add_lines(9)
+        response, large = self._get()
+
+        self.assertEqual(len(response.data["items"]), 10)
+        self.assertEqual(response.data["subtotal"], "200.00")
+        self.assertEqual(large, small)
+
+    def test_totals_aggregate_without_prefetch(self):
+        self._add_lines(3)
+        cart = Cart.objects.get(pk=self.cart.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            subtotal = cart.subtotal
+
+        self.assertEqual(subtotal, Decimal("60.00"))
+        self.assertEqual(len(queries.captured_queries), 1)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.models import Cart, CartItem, Category, Order, Product
+
+
+class PurgeAbandonedCartsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=5
+        )
+        self.long_ago = timezone.now() - timedelta(days=60)
+
+    def _cart(self, *, idle: bool, item_idle: bool = True) -> Cart:
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product)
+        if idle:
+            Cart.objects.filter(pk=cart.pk).update(updated_at=self.long_ago)
+        if item_idle:
+            CartItem.objects.filter(cart=cart).update(updated_at=self.long_ago)
+        return cart
+
+    def _purge(self, *args) -> str:
+        out = StringIO()
+        call_command(
+            "purge_abandoned_carts",
+            "--days=30",
+            "--batch-size=2",
+            "--sleep=0",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_deletes_idle_carts_in_batches(self):
+        abandoned = [self._cart(idle=True) for _ in range(3)]
+        recent = self._cart(idle=False, item_idle=False)
+        recently_edited = self._cart(idle=True, item_idle=False)
+        ordered = self._cart(idle=True)
+        Order.objects.create(
+            cart=ordered,
+            subtotal_amount=Decimal("10.00"),
+            total_amount=Decimal("10.00"),
+            customer_email="buyer@example.com",
+            shipping_full_name="Buyer",
+            shipping_address="Lenina 1",
+            shipping_city="Moscow",
+        )
+
+        output = self._purge()
+
+        self.assertIn("Удалено корзин: 3, позиций: 3", output)
+        self.assertIn("строк/с", output)
+        self.assertFalse(
+            Cart.objects.filter(pk__in=[cart.pk for cart in abandoned]).exists()
+        )
+        self.assertEqual(
+            set(Cart.objects.values_list("pk", flat=True)),
+            {recent.pk, recently_edited.pk, ordered.pk},
+        )
+
+    def test_dry_run_only_counts(self):
+        self._cart(idle=True)
+
+        output = self._purge("--dry-run")
+
+        self.assertIn("корзин: 1, позиций: 1", output)
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertEqual(CartItem.objects.count(), 1)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.models import Category, Product, ProductReview
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CATALOG_CACHE_ENABLED=True,
+)
+class CatalogResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(
+            category=self.category,
+            name="Comfort Sneaker",
+            sku="SNKR-001",
+            price=Decimal("4990.00"),
+            stock=10,
+        )
+        self.list_url = reverse("product-list")
+        self.detail_url = reverse("product-detail", args=[self.product.slug])
+
+    def test_repeat_anonymous_requests_skip_the_database(self):
+        self.client.get(self.list_url, {"ordering": "price", "page": 1})
+        self.client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as queries:
+            listing = self.client.get(self.list_url, {"ordering": "price"})
+            detail = self.client.get(self.detail_url)
+        # ATOMIC_REQUESTS only wraps the cached hits in savepoints.
+        self.assertFalse(
+            [query for query in queries if "SAVEPOINT" not in query["sql"]]
+        )
+        self.assertEqual(listing.data["results"][0]["id"], self.product.id)
+        self.assertEqual(detail.data["id"], self.product.id)
+
+    def test_product_change_invalidates_list_and_detail(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal("3990.00")
+            self.product.save()
+
+        self.assertEqual(
+            self.client.get(self.list_url).data["results"][0]["price"], "3990.00"
+        )
+        self.assertEqual(self.client.get(self.detail_url).data["price"], "3990.00")
+
+    def test_category_change_invalidates_product_detail(self):
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.description = "Running shoes"
+            self.category.save()
+
+        detail = self.client.get(self.detail_url)
+        self.assertEqual(detail.data["category"]["description"], "Running shoes")
+
+    def test_review_moderation_invalidates_product(self):
+        moderator = get_user_model().objects.create_user(
+            username="moderator", password="secret", is_staff=True
+        )
+        review = ProductReview.objects.create(
+            product=self.product, rating=4, body="Good", author_name="Guest"
+        )
+        self.assertEqual(self.client.get(self.detail_url).data["reviews_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            review.mark_moderated(
+                status=ProductReview.ModerationStatus.APPROVED, moderator=moderator
+            )
+
+        self.assertEqual(self.client.get(self.detail_url).data["reviews_count"], 1)
+
+    def test_authenticated_requests_are_not_cached(self):
+        user = get_user_model().objects.create_user(username="buyer", password="x")
+        self.client.force_authenticate(user)
+        self.client.get(self.detail_url)
+        response = self.client.get(self.detail_url)
+        self.assertTrue(response.data["can_review"])
+        self.assertEqual(len(cache._cache), 0)
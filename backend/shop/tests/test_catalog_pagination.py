@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from shop.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class ProductCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Shoes")
+        prices = ["10.00", "20.00", "20.00", "20.00", "30.00", "40.00", "40.00"]
+        self.products = [
+            Product.objects.create(
+                category=self.category,
+                name=f"Sneaker {index:02d}",
+                sku=f"SNKR-{index:03d}",
+                price=Decimal(price),
+                stock=5,
+            )
+            for index, price in enumerate(prices)
+        ]
+
+    def _walk(self, **params) -> list[int]:
+        seen: list[int] = []
+        response = self.client.get(
+            reverse("product-list"),
+            {"pagination": "cursor", "page_size": 2, **params},
+        )
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(item["id"] for item in response.data["results"])
+            if not response.data["next"]:
+                return seen
+            response = self.client.get(response.data["next"])
+
+    def test_walks_every_ordering_without_gaps_or_duplicates(self):
+        by_price = sorted(self.products, key=lambda p: (p.price, p.id))
+        self.assertEqual(self._walk(ordering="price"), [p.id for p in by_price])
+        self.assertEqual(
+            self._walk(ordering="-price"), [p.id for p in reversed(by_price)]
+        )
+        by_name = sorted(self.products, key=lambda p: (p.name, p.id))
+        self.assertEqual(self._walk(), [p.id for p in by_name])
+        by_created = sorted(self.products, key=lambda p: (p.created_at, p.id))
+        self.assertEqual(
+            self._walk(ordering="-created_at"),
+            [p.id for p in reversed(by_created)],
+        )
+
+    def test_cursor_pages_skip_count_and_offset(self):
+        first = self.client.get(
+            reverse("product-list"),
+            {"pagination": "cursor", "page_size": 2, "ordering": "price"},
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(first.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = " ".join(query["sql"].upper() for query in queries)
+        self.assertNotIn("COUNT(", statements)
+        self.assertNotIn("OFFSET", statements)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        first = self.client.get(
+            reverse("product-list"),
+            {"pagination": "cursor", "page_size": 2, "ordering": "price"},
+        )
+        cursor = first.data["next"].split("cursor=")[1]
+        response = self.client.get(
+            reverse("product-list"), {"cursor": cursor, "ordering": "name"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse("product-list"))
+        self.assertEqual(response.data["count"], len(self.products))
+
+    @skipUnless(connection.vendor == "postgresql", "Needs full-text search")
+    def test_ranked_search_has_no_cursor_mode(self):
+        params = {"pagination": "cursor", "page_size": 2, "search": "sneaker"}
+
+        response = self.client.get(reverse("product-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        by_price = sorted(self.products, key=lambda p: (p.price, p.id))
+        self.assertEqual(
+            self._walk(search="sneaker", ordering="price"), [p.id for p in by_price]
+        )
+        ranked = self.client.get(reverse("product-list"), {"search": "sneaker"})
+        self.assertEqual(ranked.data["count"], len(self.products))
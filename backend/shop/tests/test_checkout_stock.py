@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+from unittest import mock, skipUnless
+
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from shop.models import (
+    Cart,
+    CartItem,
+    Category,
+    InsufficientStockError,
+    Order,
+    Product,
+    SearchIndexQueue,
+)
+
+ORDER_FIELDS = {
+    "customer_email": "buyer@example.com",
+    "shipping_full_name": "Buyer",
+    "shipping_address": "Lenina 1",
+    "shipping_city": "Moscow",
+}
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class CheckoutStockTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Shoes")
+        self.sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=3
+        )
+        self.boot = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-1", price=20, stock=1
+        )
+
+    def _cart(self, **quantities) -> Cart:
+        cart = Cart.objects.create()
+        for attr, quantity in quantities.items():
+            CartItem.objects.create(
+                cart=cart, product=getattr(self, attr), quantity=quantity
+            )
+        return cart
+
+    def test_checkout_takes_items_out_of_stock(self):
+        Order.create_from_cart(self._cart(sneaker=2, boot=1), **ORDER_FIELDS)
+
+        self.sneaker.refresh_from_db()
+        self.boot.refresh_from_db()
+        self.assertEqual((self.sneaker.stock, self.boot.stock), (1, 0))
+
+    @override_settings(ALGOLIA_ENABLED=True, LOCAL_SEARCH_ENABLED=True)
+    def test_reserved_products_are_queued_for_search_after_commit(self):
+        SearchIndexQueue.objects.all().delete()
+        cart = self._cart(sneaker=2)
+
+        with mock.patch("shop.local_search.refresh_products") as refresh:
+            with self.captureOnCommitCallbacks() as callbacks:
+                Order.create_from_cart(cart, **ORDER_FIELDS)
+                # Nothing the checkout transaction would keep locked.
+                self.assertFalse(SearchIndexQueue.objects.exists())
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(
+            list(SearchIndexQueue.objects.values_list("product_id", flat=True)),
+            [self.sneaker.id],
+        )
+        refresh.assert_not_called()
+
+    def test_shortage_reports_every_line_and_reserves_nothing(self):
+        self.boot.stock = 0
+        self.boot.save()
+        cart = self._cart(sneaker=5, boot=1)
+
+        response = self.client.post(
+            "/api/orders/", {"cart_id": str(cart.id), **ORDER_FIELDS}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        # DRF renders validation details as strings.
+        self.assertEqual(
+            response.data["items"],
+            [
+                {
+                    "product": str(self.sneaker.id),
+                    "product_name": "Sneaker",
+                    "requested": "5",
+                    "available": "3",
+                },
+                {
+                    "product": str(self.boot.id),
+                    "product_name": "Boot",
+                    "requested": "1",
+                    "available": "0",
+                },
+            ],
+        )
+        self.sneaker.refresh_from_db()
+        self.assertEqual(self.sneaker.stock, 3)
+        self.assertTrue(Cart.objects.filter(pk=cart.pk).exists())
+        self.assertFalse(Order.objects.exists())
+
+    def test_inactive_products_cannot_be_reserved(self):
+        self.boot.is_active = False
+        self.boot.save()
+
+        with self.assertRaises(InsufficientStockError) as error:
+            Order.create_from_cart(self._cart(boot=1), **ORDER_FIELDS)
+        self.assertEqual(error.exception.shortages[0]["available"], 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class ConcurrentCheckoutTests(TransactionTestCase):
+    def test_parallel_checkouts_never_oversell(self):
+        category = Category.objects.create(name="Sale")
+        product = Product.objects.create(
+            category=category, name="Hot", sku="HOT-1", price=5, stock=5
+        )
+        carts = []
+        for _ in range(12):
+            cart = Cart.objects.create()
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            carts.append(cart)
+        placed = []
+
+        def buy(cart):
+            try:
+                Order.create_from_cart(cart, **ORDER_FIELDS)
+                placed.append(cart.pk)
+            except InsufficientStockError:
+                pass
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(placed), 5)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(Order.objects.count(), 5)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import make_aware
+from rest_framework.test import APITestCase
+
+from shop.analytics import customer_metrics, load_order_arrays
+from shop.models import Order
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class CustomerAnalyticsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.alice = User.objects.create_user(username="alice", password="secret")
+        self.admin = User.objects.create_user(
+            username="admin", password="secret", is_staff=True
+        )
+        self._order("2025-01-10", "100.00", user=self.alice)
+        self._order("2025-02-20", "50.00", user=self.alice)
+        self._order("2025-01-15", "200.00", email="Bob@example.com")
+        self._order("2025-01-25", "100.00", email="bob@example.com")
+        self._order("2025-02-05", "300.00", email="carol@example.com")
+        self._order(
+            "2025-02-06", "999.00", email="carol@example.com", status="cancelled"
+        )
+
+    def _order(self, day, total, *, user=None, email="", status="paid"):
+        Order.objects.create(
+            user=user,
+            customer_email=email or "alice@example.com",
+            placed_at=make_aware(datetime.fromisoformat(f"{day}T12:00")),
+            status=status,
+            subtotal_amount=Decimal(total),
+            total_amount=Decimal(total),
+            shipping_full_name="Buyer",
+            shipping_address="Lenina 1",
+            shipping_city="Moscow",
+        )
+
+    def test_metrics_are_computed_per_customer(self):
+        metrics = customer_metrics(load_order_arrays(chunk_size=2))
+
+        self.assertEqual(metrics["orders"], 5)
+        self.assertEqual(metrics["customers"], 3)
+        self.assertEqual(metrics["repeat_customers"], 2)
+        self.assertEqual(metrics["repeat_purchase_rate"], 0.6667)
+        self.assertEqual(metrics["time_to_second_order_days"]["p50"], 25.5)
+        self.assertEqual(
+            [(c["month"], c["customers"], c["retention"]) for c in metrics["cohorts"]],
+            [("2025-01", 2, [1.0, 0.5]), ("2025-02", 1, [1.0])],
+        )
+        (rub,) = metrics["revenue_percentiles"]
+        self.assertEqual((rub["currency"], rub["orders"]), ("RUB", 5))
+        self.assertEqual(rub["revenue"], 750.0)
+        self.assertEqual(rub["order_value"]["p50"], 100.0)
+        self.assertEqual(rub["customer_value"]["p50"], 300.0)
+
+    def test_endpoint_caches_each_date_range(self):
+        self.client.force_authenticate(self.admin)
+        params = {"date_from": "2025-01-01", "date_to": "2025-01-31", "months": 3}
+
+        first = self.client.get("/api/stats/customers/", params)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get("/api/stats/customers/", params)
+
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertEqual(first.data["orders"], 3)
+        self.assertEqual(first.data["cohorts"][0]["retention"], [1.0])
+        self.assertEqual(second.data, first.data)
+        self.assertFalse(
+            any('"shop_order"' in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_endpoint_rejects_bad_params(self):
+        self.client.force_authenticate(self.admin)
+
+        for params in ({"months": "99"}, {"date_from": "yesterday"}):
+            response = self.client.get("/api/stats/customers/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_command_reports_summary(self):
+        out = StringIO()
+        call_command("customer_analytics", "--to=2025-02-28", stdout=out)
+
+        self.assertIn("Заказов: 5, покупателей: 3, повторных: 2", out.getvalue())
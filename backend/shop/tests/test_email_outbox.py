@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from shop import emails
+from shop.models import Cart, CartItem, Category, EmailOutbox, Product
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    CATALOG_CACHE_ENABLED=False,
+)
+class EmailOutboxTests(TestCase):
+    def test_worker_sends_due_emails_and_clears_them(self):
+        emails.queue_email("First", "Body", ["a@example.com"])
+        emails.queue_email("Second", "Body", ["b@example.com"])
+        emails.queue_email("Nobody", "Body", [""])
+
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+        self.assertEqual(emails.send_queued_emails(), (2, 0))
+        self.assertEqual([m.subject for m in mail.outbox], ["First", "Second"])
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_one_connection_per_batch(self):
+        for index in range(3):
+            emails.queue_email(f"Email {index}", "Body", ["a@example.com"])
+
+        with mock.patch.object(
+            emails, "get_connection", wraps=emails.get_connection
+        ) as get_connection:
+            self.assertEqual(emails.send_queued_emails(batch_size=2), (2, 0))
+
+        get_connection.assert_called_once()
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_failed_email_is_retried_with_backoff_then_given_up(self):
+        entry = emails.queue_email("Flaky", "Body", ["a@example.com"])
+
+        with mock.patch.object(
+            emails.EmailMessage, "send", side_effect=OSError("smtp down")
+        ):
+            self.assertEqual(emails.send_queued_emails(), (0, 1))
+            entry.refresh_from_db()
+            self.assertEqual(entry.attempts, 1)
+            self.assertEqual(entry.last_error, "smtp down")
+            self.assertGreater(entry.available_at, timezone.now())
+            # Not due yet: the next run leaves it alone.
+            self.assertEqual(emails.send_queued_emails(), (0, 0))
+
+            EmailOutbox.objects.update(
+                attempts=emails.MAX_ATTEMPTS - 1,
+                available_at=timezone.now() - timedelta(seconds=1),
+            )
+            emails.send_queued_emails()
+
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.failed_at)
+        self.assertEqual(emails.outbox_depth(), emails.OutboxDepth(0, 0, 1))
+
+    def test_command_reports_queue_depth(self):
+        emails.queue_email("Hello", "Body", ["a@example.com"])
+
+        output = StringIO()
+        call_command("send_queued_emails", stdout=output)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("к отправке: 0", output.getvalue())
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class ConcurrentOutboxTests(TransactionTestCase):
+    def test_rows_are_leased_not_locked_while_sending(self):
+        emails.queue_email("Slow", "Body", ["a@example.com"])
+        observed = {}
+
+        def in_other_worker():
+            try:
+                # Raises if a row lock were held across the SMTP exchange.
+                with transaction.atomic():
+                    entry = EmailOutbox.objects.select_for_update(nowait=True).get()
+                observed["leased"] = entry.available_at > timezone.now()
+                observed["second worker"] = emails.send_queued_emails()
+            finally:
+                connections.close_all()
+
+        def send(message):
+            worker = threading.Thread(target=in_other_worker)
+            worker.start()
+            worker.join()
+            return 1
+
+        with mock.patch.object(emails.EmailMessage, "send", send):
+            self.assertEqual(emails.send_queued_emails(), (1, 0))
+
+        self.assertEqual(observed, {"leased": True, "second worker": (0, 0)})
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    CATALOG_CACHE_ENABLED=False,
+)
+class OutboxRequestTests(APITestCase):
+    def test_failed_checkout_queues_no_email(self):
+        category = Category.objects.create(name="Shoes")
+        product = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-1", price=10, stock=0
+        )
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=product, quantity=1)
+
+        response = self.client.post(
+            "/api/orders/",
+            {
+                "cart_id": str(cart.id),
+                "customer_email": "buyer@example.com",
+                "shipping_full_name": "Buyer",
+                "shipping_address": "Lenina 1",
+                "shipping_city": "Moscow",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_password_reset_is_queued(self):
+        get_user_model().objects.create_user(
+            username="reader", email="reader@example.com", password="secret"
+        )
+
+        response = self.client.post(
+            "/api/auth/password/reset/", {"email": "reader@example.com"}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(mail.outbox, [])
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.recipients, ["reader@example.com"])
+        self.assertIn("token=", entry.body)
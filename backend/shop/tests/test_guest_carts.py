@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.models import Cart, CartItem, Category, Order, Product
+
+
+class FakeRedis:
+    """The handful of hash commands the guest cart store uses."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        entry = self.hashes.setdefault(key, {})
+        for name, item in values.items():
+            entry[str(name).encode()] = str(item).encode()
+
+    def hsetnx(self, key, field, value):
+        entry = self.hashes.setdefault(key, {})
+        name = str(field).encode()
+        if name in entry:
+            return 0
+        entry[name] = str(value).encode()
+        return 1
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hincrby(self, key, field, amount=1):
+        entry = self.hashes.setdefault(key, {})
+        name = str(field).encode()
+        value = int(entry.get(name, b"0")) + amount
+        entry[name] = str(value).encode()
+        return value
+
+    def hdel(self, key, *fields):
+        for name in fields:
+            self.hashes.get(key, {}).pop(str(name).encode(), None)
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+        return key in self.hashes
+
+    def delete(self, *keys):
+        return sum(self.hashes.pop(key, None) is not None for key in keys)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        return [
+            getattr(self.client, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+@override_settings(GUEST_CART_BACKEND="redis", CATALOG_CACHE_ENABLED=False)
+class GuestCartTests(APITestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch("shop.carts.redis_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        category = Category.objects.create(name="Shoes")
+        self.sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=5
+        )
+        self.boot = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-1", price=25, stock=5
+        )
+
+    def _new_cart(self) -> str:
+        response = self.client.post(reverse("cart-list"))
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def _add(self, cart_id, product, quantity):
+        return self.client.post(
+            reverse("cart-items-list", args=[cart_id]),
+            {"product_id": product.id, "quantity": quantity},
+            format="json",
+        )
+
+    def test_guest_cart_writes_stay_out_of_the_database(self):
+        cart_id = self._new_cart()
+        self._add(cart_id, self.sneaker, 2)
+        self._add(cart_id, self.boot, 1)
+        self.client.patch(
+            reverse("cart-items-detail", args=[cart_id, self.sneaker.id]),
+            {"quantity": 3},
+            format="json",
+        )
+        self.client.delete(reverse("cart-items-detail", args=[cart_id, self.boot.id]))
+
+        cart = self.client.get(reverse("cart-detail", args=[cart_id])).data
+
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(
+            [(item["product"]["id"], item["quantity"]) for item in cart["items"]],
+            [(self.sneaker.id, 3)],
+        )
+        self.assertEqual(cart["total_items"], 3)
+        self.assertEqual(cart["subtotal"], "30.00")
+
+    def test_adding_a_product_twice_is_rejected_like_database_carts(self):
+        guest_cart_id = self._new_cart()
+        with mock.patch.object(self.redis, "pipeline", side_effect=OSError("down")):
+            database_cart_id = self._new_cart()
+
+        for cart_id in (guest_cart_id, database_cart_id):
+            with self.subTest(cart_id=cart_id):
+                self.assertEqual(self._add(cart_id, self.sneaker, 2).status_code, 201)
+                response = self._add(cart_id, self.sneaker, 1)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("product_id", response.data)
+                cart = self.client.get(reverse("cart-detail", args=[cart_id])).data
+                self.assertEqual(cart["total_items"], 2)
+
+    def test_checkout_persists_the_guest_cart(self):
+        cart_id = self._new_cart()
+        self._add(cart_id, self.boot, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/orders/",
+                {
+                    "cart_id": cart_id,
+                    "customer_email": "buyer@example.com",
+                    "shipping_full_name": "Buyer",
+                    "shipping_address": "Lenina 1",
+                    "shipping_city": "Moscow",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201, response.content)
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, 50)
+        self.assertEqual(order.items.get().quantity, 2)
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_signed_in_user_claims_the_guest_cart(self):
+        cart_id = self._new_cart()
+        self._add(cart_id, self.sneaker, 1)
+        user = get_user_model().objects.create_user(
+            username="buyer", email="buyer@example.com", password="secret"
+        )
+        self.client.force_authenticate(user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse("cart-detail", args=[cart_id]))
+
+        self.assertEqual(response.data["total_items"], 1)
+        cart = Cart.objects.get(pk=cart_id)
+        self.assertEqual(cart.user, user)
+        self.assertEqual(cart.items.get().product, self.sneaker)
+        self.assertEqual(self.redis.hashes, {})
+
+    def test_redis_outage_falls_back_to_database_carts(self):
+        with mock.patch.object(self.redis, "pipeline", side_effect=OSError("down")):
+            cart_id = self._new_cart()
+
+        self.assertTrue(Cart.objects.filter(pk=cart_id).exists())
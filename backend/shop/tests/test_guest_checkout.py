@@ -7,6 +7,7 @@ from django.core import mail
 from django.test import override_settings
 from rest_framework.test import APITestCase
 
+from shop.emails import send_queued_emails
 from shop.models import Cart, CartItem, Category, Order, Product
 
 
@@ -67,6 +68,8 @@ class GuestCheckoutTests(APITestCase):
         self.assertTrue(response.data["requires_account_activation"])
         self.assertEqual(response.data["activation_email"], "guest@example.com")
 
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(send_queued_emails(), (2, 0))
         self.assertEqual(len(mail.outbox), 2)
         subjects = {email.subject for email in mail.outbox}
         self.assertIn(f"Order confirmation #{order.pk}", subjects)
@@ -102,6 +105,7 @@ class GuestCheckoutTests(APITestCase):
         self.assertFalse(response.data["requires_account_activation"])
         self.assertNotIn("activation_email", response.data)
 
+        send_queued_emails()
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, f"Order confirmation #{order.pk}")
         self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from shop.idempotency import REPLAYED_HEADER
+from shop.models import Cart, CartItem, Category, Order, Product
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CATALOG_CACHE_ENABLED=False,
+    IDEMPOTENCY_WAIT_SECONDS=0,
+)
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=5
+        )
+        self.cart = Cart.objects.create()
+        self.items_url = reverse("cart-items-list", args=[self.cart.id])
+
+    def _order_payload(self) -> dict[str, str]:
+        return {
+            "cart_id": str(self.cart.id),
+            "customer_email": "buyer@example.com",
+            "shipping_full_name": "Buyer",
+            "shipping_address": "Lenina 1",
+            "shipping_city": "Moscow",
+        }
+
+    def _post(self, url, payload, key="key-1"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                url, payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+            )
+
+    def test_retried_order_is_replayed_not_recreated(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+        first = self._post("/api/orders/", self._order_payload())
+        retry = self._post("/api/orders/", self._order_payload())
+
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry[REPLAYED_HEADER], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_retried_cart_write_is_applied_once(self):
+        payload = {"product_id": self.product.id, "quantity": 2}
+
+        first = self._post(self.items_url, payload)
+        retry = self._post(self.items_url, payload)
+
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self._post(self.items_url, {"product_id": self.product.id, "quantity": 1})
+        response = self._post(
+            self.items_url, {"product_id": self.product.id, "quantity": 3}
+        )
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_duplicate_in_flight_gets_conflict(self):
+        # Another request holds the in-flight lock for this key.
+        with mock.patch.object(cache, "add", return_value=False):
+            response = self._post(
+                self.items_url, {"product_id": self.product.id, "quantity": 1}
+            )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_failed_request_is_not_stored(self):
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=9)
+
+        rejected = self._post("/api/orders/", self._order_payload())
+        Product.objects.filter(pk=self.product.pk).update(stock=9)
+        accepted = self._post("/api/orders/", self._order_payload())
+
+        self.assertEqual(rejected.status_code, 400)
+        self.assertEqual(accepted.status_code, 201)
+        self.assertNotIn(REPLAYED_HEADER, accepted)
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    CATALOG_CACHE_ENABLED=False,
+)
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def test_concurrent_duplicates_wait_for_first_result(self):
+        cache.clear()
+        category = Category.objects.create(name="Shoes")
+        product = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-2", price=10, stock=5
+        )
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=product, quantity=1)
+        payload = {
+            "cart_id": str(cart.id),
+            "customer_email": "buyer@example.com",
+            "shipping_full_name": "Buyer",
+            "shipping_address": "Lenina 1",
+            "shipping_city": "Moscow",
+        }
+        responses = []
+
+        def submit():
+            try:
+                responses.append(
+                    APIClient().post(
+                        "/api/orders/",
+                        payload,
+                        format="json",
+                        HTTP_IDEMPOTENCY_KEY="mobile-retry",
+                    )
+                )
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * 4)
+        self.assertEqual(len({response.data["id"] for response in responses}), 1)
+        self.assertEqual(Order.objects.count(), 1)
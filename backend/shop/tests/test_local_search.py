@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop import local_search
+from shop.local_search import LocalSearchIndex, get_local_index
+from shop.models import Category, Product
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False, LOCAL_SEARCH_ENABLED=True)
+class LocalSearchTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(LOCAL_SEARCH_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.category = Category.objects.create(name="Аудио")
+        self.headphones = Product.objects.create(
+            category=self.category,
+            name="Беспроводные наушники AirTune",
+            sku="AT-PRO-WHT",
+            price=Decimal("12990.00"),
+            description="Активное шумоподавление.",
+        )
+        self.speaker = Product.objects.create(
+            category=self.category,
+            name="Колонка Boom",
+            sku="BOOM-01",
+            price=Decimal("4990.00"),
+            description="Отлично дополняет наушники и плееры.",
+        )
+        get_local_index().rebuild()
+
+    def _search(self, query: str) -> list[int]:
+        response = self.client.get(reverse("product-autocomplete"), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [int(hit["objectID"]) for hit in response.data["hits"]]
+
+    def test_prefix_search_ranks_name_matches_first(self):
+        self.assertEqual(self._search("наушн"), [self.headphones.id, self.speaker.id])
+        self.assertEqual(self._search("колонка bo"), [self.speaker.id])
+        self.assertEqual(self._search("at-pro"), [self.headphones.id])
+        self.assertEqual(self._search("колонка air"), [])
+
+    def test_hits_carry_current_stock(self):
+        # Checkouts reserve stock with update(), which journals nothing.
+        Product.objects.filter(pk=self.speaker.pk).update(stock=7)
+
+        response = self.client.get(reverse("product-autocomplete"), {"q": "колонка"})
+
+        self.assertEqual(response.data["hits"][0]["stock"], 7)
+
+    def test_product_changes_reach_other_workers_through_the_journal(self):
+        worker = LocalSearchIndex(get_local_index().directory)
+        self.assertEqual(worker.search("колонка")["nbHits"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            toy = Product.objects.create(
+                category=self.category, name="Ёлочная игрушка", sku="XMAS-001", price=1
+            )
+            self.speaker.delete()
+        self.assertEqual(worker.search("елочная")["hits"][0]["slug"], toy.slug)
+        self.assertEqual(worker.search("колонка")["nbHits"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Звук"
+            self.category.save()
+        get_local_index().compact()
+        self.assertEqual(worker.search("звук")["nbHits"], 2)
+        self.assertEqual(worker.search("аудио")["nbHits"], 0)
+
+    @override_settings(LOCAL_SEARCH_JOURNAL_MAX_BYTES=1)
+    def test_requests_only_append_to_the_journal(self):
+        index = get_local_index()
+        snapshot = index.snapshot_path.stat()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speaker.name = "Колонка Boom 2"
+            self.speaker.save()
+
+        self.assertEqual(index.snapshot_path.stat().st_ino, snapshot.st_ino)
+        self.assertGreater(index.journal_size(), 1)
+
+        index.compact()
+        self.assertEqual(index.journal_size(), 0)
+        self.assertEqual(self._search("boom 2"), [self.speaker.id])
+
+    def test_journaled_updates_do_not_inflate_the_document_count(self):
+        worker = LocalSearchIndex(get_local_index().directory)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.speaker.price = Decimal("3990.00")
+            self.speaker.save()
+            Product.objects.create(
+                category=self.category, name="Колонка Mini", sku="MINI-01", price=1
+            )
+            self.headphones.delete()
+
+        with mock.patch.object(
+            local_search,
+            "inverse_document_frequency",
+            wraps=local_search.inverse_document_frequency,
+        ) as idf:
+            self.assertEqual(worker.search("колонка")["nbHits"], 2)
+        # "колонка" is in both live products out of two.
+        self.assertEqual({call.args for call in idf.call_args_list}, {(2, 2)})
+
+    def test_missing_snapshot_is_not_built_inside_a_search(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = LocalSearchIndex(directory)
+
+            with self.assertLogs("shop.local_search", "WARNING"):
+                result = index.search("колонка")
+
+            self.assertEqual(result, {"hits": [], "nbHits": 0})
+            self.assertFalse(index.snapshot_path.exists())
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.fulltext import fuzzy_enabled
+from shop.models import Category, Product
+
+
+def trigram_available() -> bool:
+    return fuzzy_enabled(Product.objects.all())
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Дом")
+        self.headphones = Product.objects.create(
+            category=self.category,
+            name="Беспроводные наушники AirTune",
+            sku="AT-PRO-WHT",
+            price=Decimal("12990.00"),
+            description="Активное шумоподавление.",
+        )
+        self.toy = Product.objects.create(
+            category=self.category,
+            name="Ёлочная игрушка",
+            sku="XMAS-001",
+            price=Decimal("390.00"),
+        )
+        self.speaker = Product.objects.create(
+            category=self.category,
+            name="Колонка Boom",
+            sku="BOOM-01",
+            price=Decimal("4990.00"),
+            description="Отлично дополняет наушники и плееры.",
+        )
+
+    def _search(self, term: str) -> list[int]:
+        response = self.client.get(reverse("product-list"), {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_matches_name_sku_and_description(self):
+        self.assertEqual(self._search("AirTune"), [self.headphones.id])
+        self.assertEqual(self._search("xmas-001"), [self.toy.id])
+        self.assertIn(self.speaker.id, self._search("плееры"))
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL full-text search")
+    def test_full_text_search_folds_yo_and_stems(self):
+        self.assertEqual(self._search("елочная"), [self.toy.id])
+        self.assertEqual(self._search("ёлочн"), [self.toy.id])
+        self.assertEqual(self._search("беспроводных наушников"), [self.headphones.id])
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL full-text search")
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(
+            self._search("наушники"), [self.headphones.id, self.speaker.id]
+        )
+        ordered = self._search_with_ordering("наушники", "-price")
+        self.assertEqual(ordered, [self.headphones.id, self.speaker.id])
+        ordered = self._search_with_ordering("наушники", "price")
+        self.assertEqual(ordered, [self.speaker.id, self.headphones.id])
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL full-text search")
+    def test_search_vector_follows_updates(self):
+        self.toy.name = "Новогодний шар"
+        self.toy.save()
+        self.assertEqual(self._search("ёлочная"), [])
+        self.assertEqual(self._search("новогодний"), [self.toy.id])
+
+    def _search_with_ordering(self, term: str, ordering: str) -> list[int]:
+        response = self.client.get(
+            reverse("product-list"), {"search": term, "ordering": ordering}
+        )
+        return [item["id"] for item in response.data["results"]]
+
+    def test_suggest_returns_matching_names(self):
+        response = self.client.get(
+            reverse("product-suggest"), {"q": "Колонка", "limit": 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.data["results"]], [self.speaker.slug]
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL trigram search")
+    def test_typos_match_through_trigrams(self):
+        if not trigram_available():
+            self.skipTest("pg_trgm is not installed")
+        self.assertEqual(self._search("наушнеки"), [self.headphones.id])
+        response = self.client.get(reverse("product-suggest"), {"q": "калонка"})
+        self.assertEqual(response.data["results"][0]["id"], self.speaker.id)
+        self.assertGreater(response.data["results"][0]["similarity"], 0)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from shop.models import Category, Order, OrderItem, Product
+from shop.utils import (
+    purchased_product_ids,
+    user_has_verified_purchase,
+    user_purchased_products,
+)
+
+
+@override_settings(
+    CATALOG_CACHE_ENABLED=False,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class PurchasedProductsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="buyer", password="secret"
+        )
+        category = Category.objects.create(name="Audio")
+        self.headphones, self.speaker, self.cable = (
+            Product.objects.create(
+                category=category,
+                name=name,
+                sku=name.upper(),
+                price=Decimal("100.00"),
+                stock=10,
+            )
+            for name in ("headphones", "speaker", "cable")
+        )
+        self.order = self._order(self.headphones, status=Order.Status.COMPLETED)
+        self.pending = self._order(
+            self.speaker,
+            status=Order.Status.PENDING,
+            payment_status=Order.PaymentStatus.PENDING,
+        )
+
+    def _order(self, product, status, payment_status=Order.PaymentStatus.PAID):
+        order = Order.objects.create(
+            user=self.user,
+            status=status,
+            payment_status=payment_status,
+            subtotal_amount=product.price,
+            total_amount=product.price,
+            customer_email="buyer@example.com",
+            shipping_full_name="Buyer",
+            shipping_address="Lenina 1",
+            shipping_city="Moscow",
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            product_name=product.name,
+            unit_price=product.price,
+            quantity=1,
+            line_total=product.price,
+        )
+        return order
+
+    def test_checks_are_answered_from_one_cached_set(self):
+        self.assertEqual(purchased_product_ids(self.user), {self.headphones.pk})
+
+        with CaptureQueriesContext(connection) as queries:
+            bought = user_has_verified_purchase(self.user, self.headphones)
+            not_bought = user_has_verified_purchase(self.user, self.speaker)
+            subset = user_purchased_products(
+                self.user, [self.headphones.pk, self.speaker.pk, self.cable.pk]
+            )
+
+        self.assertTrue(bought)
+        self.assertFalse(not_bought)
+        self.assertEqual(subset, {self.headphones.pk})
+        self.assertEqual(len(queries), 0)
+
+    def test_order_moving_into_and_out_of_paid_drops_the_set(self):
+        purchased_product_ids(self.user)
+
+        self.pending.status = Order.Status.PAID
+        self.pending.payment_status = Order.PaymentStatus.PAID
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.save()
+        self.assertEqual(
+            purchased_product_ids(self.user), {self.headphones.pk, self.speaker.pk}
+        )
+
+        self.order.payment_status = Order.PaymentStatus.REFUNDED
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save(update_fields=["payment_status"])
+        self.assertEqual(purchased_product_ids(self.user), {self.speaker.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.delete()
+        self.assertEqual(purchased_product_ids(self.user), frozenset())
+
+    def test_unrelated_order_updates_keep_the_set(self):
+        purchased_product_ids(self.user)
+
+        self.order.notes = "Leave at the door"
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.order.save()
+
+        self.assertEqual(callbacks, [])
+
+    def test_bulk_endpoint(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(
+            "/api/products/purchased/",
+            {"ids": f"{self.cable.pk},{self.headphones.pk},{self.speaker.pk}"},
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data, {"purchased": [self.headphones.pk]})
+        bad = self.client.get("/api/products/purchased/", {"ids": "1,two"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_bulk_endpoint_requires_authentication(self):
+        response = self.client.get("/api/products/purchased/", {"ids": "1"})
+
+        self.assertEqual(response.status_code, 401)
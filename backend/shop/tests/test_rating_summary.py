@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+
+from shop.admin import ProductReviewAdmin
+from shop.models import Category, Product, ProductRatingSummary, ProductReview
+
+
+class ProductRatingSummaryTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user(
+            username="moderator",
+            email="mod@example.com",
+            password="secret",
+            is_staff=True,
+        )
+        self.category = Category.objects.create(name="Electronics")
+        self.product = Product.objects.create(
+            category=self.category,
+            name="Test Gadget",
+            sku="TG-001",
+            price=Decimal("199.99"),
+            stock=10,
+        )
+
+    def _review(self, rating: int, **fields) -> ProductReview:
+        return ProductReview.objects.create(
+            product=self.product,
+            rating=rating,
+            body="Review body",
+            author_name="Guest",
+            **fields,
+        )
+
+    def _summary(self) -> ProductRatingSummary:
+        return ProductRatingSummary.objects.get(product=self.product)
+
+    def test_pending_review_does_not_create_summary(self):
+        self._review(5)
+        self.assertFalse(
+            ProductRatingSummary.objects.filter(product=self.product).exists()
+        )
+        self.assertEqual(self.product.reviews_count, 0)
+        self.assertIsNone(self.product.average_rating)
+
+    def test_moderation_updates_summary(self):
+        first = self._review(5)
+        second = self._review(2)
+        first.mark_moderated(
+            status=ProductReview.ModerationStatus.APPROVED, moderator=self.staff
+        )
+        second.mark_moderated(
+            status=ProductReview.ModerationStatus.APPROVED, moderator=self.staff
+        )
+        summary = self._summary()
+        self.assertEqual(summary.reviews_count, 2)
+        self.assertEqual(summary.rating_sum, 7)
+        self.assertEqual(summary.histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(summary.average_rating, 3.5)
+
+        second.mark_moderated(
+            status=ProductReview.ModerationStatus.REJECTED, moderator=self.staff
+        )
+        summary = self._summary()
+        self.assertEqual(summary.reviews_count, 1)
+        self.assertEqual(summary.rating_sum, 5)
+
+    def test_soft_delete_and_restore_update_summary(self):
+        review = self._review(
+            4, moderation_status=ProductReview.ModerationStatus.APPROVED
+        )
+        self.assertEqual(self._summary().reviews_count, 1)
+
+        review.delete()
+        self.assertEqual(self._summary().reviews_count, 0)
+
+        review.restore()
+        self.assertEqual(self._summary().reviews_count, 1)
+        self.assertEqual(self._summary().stars_4, 1)
+
+    def test_admin_actions_refresh_summary(self):
+        self._review(3)
+        self._review(5)
+        request = RequestFactory().post("/admin/")
+        request.user = self.staff
+        model_admin = ProductReviewAdmin(ProductReview, AdminSite())
+        model_admin.message_user = lambda *args, **kwargs: None
+        queryset = ProductReview.all_objects.filter(
+            moderation_status=ProductReview.ModerationStatus.PENDING
+        )
+
+        model_admin.approve_reviews(request, queryset)
+        self.assertEqual(self._summary().reviews_count, 2)
+        self.assertEqual(self._summary().rating_sum, 8)
+
+        model_admin.reject_reviews(request, ProductReview.all_objects.all())
+        self.assertEqual(self._summary().reviews_count, 0)
+
+    def test_rebuild_command_restores_drifted_summary(self):
+        self._review(5, moderation_status=ProductReview.ModerationStatus.APPROVED)
+        ProductRatingSummary.objects.filter(product=self.product).update(
+            reviews_count=10, rating_sum=10, stars_5=0
+        )
+
+        call_command("rebuild_rating_summaries", batch_size=1, stdout=StringIO())
+
+        summary = self._summary()
+        self.assertEqual(summary.reviews_count, 1)
+        self.assertEqual(summary.rating_sum, 5)
+        self.assertEqual(summary.stars_5, 1)
+
+    def test_hard_deleting_product_removes_summary(self):
+        self._review(5, moderation_status=ProductReview.ModerationStatus.APPROVED)
+        self.product.hard_delete()
+        self.assertFalse(ProductRatingSummary.objects.exists())
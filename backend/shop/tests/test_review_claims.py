@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from shop.models import Category, Product, ProductReview
+from shop.moderation import claim_pending_reviews
+
+
+def pending_reviews(count: int) -> list[ProductReview]:
+    category = Category.objects.create(name="Audio")
+    product = Product.objects.create(
+        category=category, name="Speaker", sku="SPK-1", price=Decimal("10"), stock=1
+    )
+    return [
+        ProductReview.objects.create(
+            product=product, rating=4, body=f"Review {index}", author_name="Guest"
+        )
+        for index in range(count)
+    ]
+
+
+class ReviewClaimTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user(
+            username="alice", password="secret", is_staff=True
+        )
+        self.bob = User.objects.create_user(
+            username="bob", password="secret", is_staff=True
+        )
+        self.reviews = pending_reviews(5)
+
+    def _claim(self, user, limit):
+        self.client.force_authenticate(user)
+        return self.client.post("/api/reviews/claim/", {"limit": limit}, format="json")
+
+    def test_moderators_get_disjoint_reviews_oldest_first(self):
+        first = self._claim(self.alice, 3)
+        second = self._claim(self.bob, 3)
+
+        self.assertEqual(first.status_code, 200, first.content)
+        alice_ids = [review["id"] for review in first.data["results"]]
+        bob_ids = [review["id"] for review in second.data["results"]]
+        self.assertEqual(alice_ids, [review.pk for review in self.reviews[:3]])
+        self.assertEqual(bob_ids, [review.pk for review in self.reviews[3:]])
+        self.assertIsNotNone(first.data["claimed_until"])
+        self.assertEqual(self._claim(self.bob, 3).data["results"][0]["id"], bob_ids[0])
+
+    def test_expired_leases_are_handed_out_again(self):
+        claim_pending_reviews(self.alice, 5)
+        ProductReview.all_objects.filter(pk=self.reviews[1].pk).update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        claimed = claim_pending_reviews(self.bob, 5)
+
+        self.assertEqual([review.pk for review in claimed], [self.reviews[1].pk])
+        self.assertEqual(claimed[0].claimed_by, self.bob)
+
+    def test_moderated_reviews_leave_the_queue(self):
+        claimed = claim_pending_reviews(self.alice, 2)
+        claimed[0].mark_moderated(
+            status=ProductReview.ModerationStatus.APPROVED, moderator=self.alice
+        )
+        self.client.force_authenticate(self.alice)
+        self.client.post(
+            "/api/reviews/bulk-moderate/",
+            {"ids": [claimed[1].pk], "status": "rejected"},
+            format="json",
+        )
+
+        self.assertFalse(
+            ProductReview.all_objects.filter(
+                pk__in=[claimed[0].pk, claimed[1].pk], claimed_by__isnull=False
+            ).exists()
+        )
+        self.assertEqual(len(claim_pending_reviews(self.bob, 5)), 3)
+
+    def test_validation_and_permissions(self):
+        customer = get_user_model().objects.create_user(username="c", password="x")
+        self.assertEqual(self._claim(customer, 1).status_code, 403)
+        self.assertEqual(self._claim(self.alice, 500).status_code, 400)
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+class ConcurrentReviewClaimTests(TransactionTestCase):
+    def test_parallel_claims_never_share_a_review(self):
+        reviews = pending_reviews(20)
+        moderators = [
+            get_user_model().objects.create_user(
+                username=f"moderator{index}", password="x", is_staff=True
+            )
+            for index in range(4)
+        ]
+        claimed: dict[int, list[int]] = {}
+        barrier = threading.Barrier(len(moderators))
+
+        def claim(moderator):
+            try:
+                barrier.wait()
+                claimed[moderator.pk] = [
+                    review.pk for review in claim_pending_reviews(moderator, 5)
+                ]
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=claim, args=(moderator,))
+            for moderator in moderators
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_ids = [pk for ids in claimed.values() for pk in ids]
+        self.assertEqual(len(all_ids), len(set(all_ids)))
+        self.assertEqual(set(all_ids), {review.pk for review in reviews})
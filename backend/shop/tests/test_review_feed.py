@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from shop.models import Category, Product, ProductReview
+
+
+class ReviewFeedTests(APITestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user(
+            username="moderator", password="secret", is_staff=True
+        )
+        category = Category.objects.create(name="Audio")
+        self.product = Product.objects.create(
+            category=category,
+            name="Speaker",
+            sku="SPK-1",
+            price=Decimal("100.00"),
+            stock=10,
+        )
+        self.other = Product.objects.create(
+            category=category,
+            name="Cable",
+            sku="CBL-1",
+            price=Decimal("5.00"),
+            stock=10,
+        )
+        now = timezone.now()
+        ratings = [5, 5, 4, 1, 5, 3, 4]
+        self.reviews = []
+        for index, rating in enumerate(ratings):
+            review = self._review(self.product, rating)
+            # Pairs share a timestamp so the id tie-breaker is exercised.
+            ProductReview.all_objects.filter(pk=review.pk).update(
+                created_at=now - timedelta(minutes=index // 2)
+            )
+            self.reviews.append(review)
+        self._review(self.product, 2, approve=False)
+        self._review(self.other, 1)
+
+    def _review(self, product, rating, approve=True) -> ProductReview:
+        review = ProductReview.objects.create(
+            product=product, rating=rating, body="Body", author_name="Guest"
+        )
+        if approve:
+            review.mark_moderated(
+                status=ProductReview.ModerationStatus.APPROVED, moderator=self.staff
+            )
+        return review
+
+    def test_cursor_pages_walk_the_feed_newest_first(self):
+        seen = []
+        url = "/api/reviews/"
+        params = {
+            "product_slug": self.product.slug,
+            "pagination": "cursor",
+            "page_size": 3,
+        }
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertNotIn("count", response.data)
+            seen.extend(review["id"] for review in response.data["results"])
+            url, params = response.data["next"], None
+
+        expected = sorted(
+            self.reviews,
+            key=lambda review: (
+                ProductReview.all_objects.get(pk=review.pk).created_at,
+                review.pk,
+            ),
+            reverse=True,
+        )
+        self.assertEqual(seen, [review.pk for review in expected])
+
+    def test_unknown_slug_returns_an_empty_feed(self):
+        response = self.client.get(
+            "/api/reviews/", {"product_slug": "missing", "pagination": "cursor"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+
+    def test_histogram_is_read_from_the_summary(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/reviews/histogram/", {"product": self.product.pk}
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        statements = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(len(statements), 1)
+        self.assertIn("shop_productratingsummary", statements[0])
+        self.assertEqual(
+            response.data["histogram"], {"1": 1, "2": 0, "3": 1, "4": 2, "5": 3}
+        )
+        self.assertEqual(response.data["reviews_count"], 7)
+        self.assertEqual(response.data["average_rating"], 3.86)
+
+    def test_histogram_for_product_without_reviews(self):
+        product = Product.objects.create(
+            category=self.product.category,
+            name="Stand",
+            sku="STD-1",
+            price=Decimal("10.00"),
+            stock=1,
+        )
+
+        response = self.client.get(
+            "/api/reviews/histogram/", {"product_slug": product.slug}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["reviews_count"], 0)
+        self.assertIsNone(response.data["average_rating"])
+        self.assertEqual(set(response.data["histogram"].values()), {0})
+
+    def test_histogram_errors(self):
+        self.assertEqual(self.client.get("/api/reviews/histogram/").status_code, 400)
+        missing = self.client.get("/api/reviews/histogram/", {"product_slug": "nope"})
+        self.assertEqual(missing.status_code, 404)
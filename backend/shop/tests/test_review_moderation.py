@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from shop.admin import ProductReviewAdmin
+from shop.models import Category, Product, ProductRatingSummary, ProductReview
+
+
+class BulkModerationTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.staff = User.objects.create_user(
+            username="moderator", password="secret", is_staff=True
+        )
+        self.customer = User.objects.create_user(username="buyer", password="secret")
+        category = Category.objects.create(name="Audio")
+        self.speaker, self.cable = (
+            Product.objects.create(
+                category=category,
+                name=name,
+                sku=name.upper(),
+                price=Decimal("10.00"),
+                stock=5,
+            )
+            for name in ("speaker", "cable")
+        )
+        self.reviews = [
+            ProductReview.objects.create(
+                product=product, rating=rating, body="Body", author_name="Guest"
+            )
+            for product, rating in (
+                (self.speaker, 5),
+                (self.speaker, 3),
+                (self.speaker, 4),
+                (self.cable, 1),
+            )
+        ]
+
+    def _summary(self, product) -> ProductRatingSummary:
+        return ProductRatingSummary.objects.get(product=product)
+
+    def _moderate(self, ids, status="approved", note=""):
+        return self.client.post(
+            "/api/reviews/bulk-moderate/",
+            {"ids": ids, "status": status, "note": note},
+            format="json",
+        )
+
+    def test_bulk_approve_updates_reviews_and_summaries_in_one_batch(self):
+        self.client.force_authenticate(self.staff)
+        ids = [review.pk for review in self.reviews]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._moderate([*ids, 999_999], note="Checked")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data, {"updated": ids, "missing": [999_999]})
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "shop_productreview"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(
+                ProductReview.all_objects.values_list(
+                    "moderation_status", "moderation_note", "moderated_by"
+                )
+            ),
+            {("approved", "Checked", self.staff.pk)},
+        )
+        self.assertEqual(self._summary(self.speaker).reviews_count, 3)
+        self.assertEqual(self._summary(self.speaker).rating_sum, 12)
+        self.assertEqual(self._summary(self.cable).histogram[1], 1)
+
+    def test_rejecting_approved_reviews_refreshes_their_products(self):
+        self.client.force_authenticate(self.staff)
+        self._moderate([review.pk for review in self.reviews])
+
+        response = self._moderate(
+            [self.reviews[0].pk], status="rejected", note="Spam link"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._summary(self.speaker).reviews_count, 2)
+        self.assertEqual(self._summary(self.cable).reviews_count, 1)
+        self.reviews[0].refresh_from_db()
+        self.assertEqual(self.reviews[0].moderation_note, "Spam link")
+
+    def test_validation_and_permissions(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self._moderate([self.reviews[0].pk]).status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self._moderate([]).status_code, 400)
+        self.assertEqual(
+            self._moderate([self.reviews[0].pk], status="spam").status_code, 400
+        )
+
+    def test_admin_action_clears_stale_note(self):
+        review = self.reviews[0]
+        review.mark_moderated(
+            status=ProductReview.ModerationStatus.REJECTED,
+            moderator=self.staff,
+            note="Off topic",
+        )
+        request = RequestFactory().post("/admin/")
+        request.user = self.staff
+        model_admin = ProductReviewAdmin(ProductReview, AdminSite())
+        model_admin.message_user = lambda *args, **kwargs: None
+
+        model_admin.approve_reviews(
+            request, model_admin.get_queryset(request).filter(pk=review.pk)
+        )
+
+        review.refresh_from_db()
+        self.assertEqual(review.moderation_status, "approved")
+        self.assertEqual(review.moderation_note, "")
+        self.assertEqual(self._summary(self.speaker).reviews_count, 1)
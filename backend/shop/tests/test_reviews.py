@@ -3,6 +3,9 @@ from __future__ import annotations
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -244,3 +247,31 @@ class ProductReviewAPITests(APITestCase):
         self.assertFalse(after_moderation["can_review"])
         self.assertEqual(after_moderation["reviews_count"], 1)
         self.assertEqual(after_moderation["average_rating"], 5.0)
+
+    @override_settings(CATALOG_CACHE_ENABLED=False)
+    def test_product_list_resolves_user_reviews_in_one_query(self):
+        for index in range(5):
+            product = Product.objects.create(
+                category=self.category,
+                name=f"Extra Gadget {index}",
+                sku=f"TG-1{index:02d}",
+                price=Decimal("99.00"),
+            )
+            ProductReview.objects.create(
+                product=product, user=self.user, rating=4, body="Fine"
+            )
+
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("product-list"), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        review_queries = [
+            query for query in queries if 'FROM "shop_productreview"' in query["sql"]
+        ]
+        self.assertEqual(len(review_queries), 1)
+
+        results = {item["sku"]: item for item in response.data["results"]}
+        self.assertTrue(results["TG-001"]["can_review"])
+        self.assertIsNone(results["TG-001"]["user_review"])
+        self.assertFalse(results["TG-100"]["can_review"])
+        self.assertEqual(results["TG-100"]["user_review"]["rating"], 4)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from shop.models import (
+    Cart,
+    CartItem,
+    Category,
+    DailySalesRollup,
+    Order,
+    Product,
+    SalesRollupQueue,
+)
+from shop.sales import process_sales_queue, rebuild_sales_rollups
+
+ORDER_FIELDS = {
+    "customer_email": "buyer@example.com",
+    "shipping_full_name": "Buyer",
+    "shipping_address": "Lenina 1",
+    "shipping_city": "Moscow",
+}
+
+
+class SalesRollupTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Shoes")
+        self.sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-1", price=10, stock=50
+        )
+        self.boot = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-1", price=25, stock=50
+        )
+        self.admin = get_user_model().objects.create_user(
+            username="admin", password="secret", is_staff=True
+        )
+        self.today = timezone.localdate()
+
+    def _order(self, shipping=Decimal("0.00"), **quantities) -> Order:
+        cart = Cart.objects.create()
+        for attr, quantity in quantities.items():
+            CartItem.objects.create(
+                cart=cart, product=getattr(self, attr), quantity=quantity
+            )
+        order = Order.create_from_cart(cart, shipping_amount=shipping, **ORDER_FIELDS)
+        return Order.objects.get(pk=order.pk)
+
+    def _rows(self):
+        process_sales_queue()
+        return {
+            row.product_id: (row.orders, row.quantity, row.revenue)
+            for row in DailySalesRollup.objects.filter(day=self.today)
+        }
+
+    def _overview(self, **params):
+        process_sales_queue()
+        self.client.force_authenticate(self.admin)
+        return self.client.get("/api/stats/overview/", params)
+
+    def test_checkout_updates_daily_rollups(self):
+        self._order(sneaker=2, boot=1, shipping=Decimal("5.00"))
+        self._order(sneaker=1)
+
+        self.assertEqual(
+            self._rows(),
+            {
+                None: (2, 4, Decimal("60.00")),
+                self.sneaker.pk: (2, 3, Decimal("30.00")),
+                self.boot.pk: (1, 1, Decimal("25.00")),
+            },
+        )
+
+    def test_checkout_only_queues_its_sales(self):
+        self._order(sneaker=2, boot=1)
+
+        self.assertFalse(DailySalesRollup.objects.exists())
+        self.assertEqual(SalesRollupQueue.objects.count(), 3)
+
+        out = StringIO()
+        call_command("process_sales_queue", stdout=out)
+
+        self.assertFalse(SalesRollupQueue.objects.exists())
+        self.assertEqual(
+            DailySalesRollup.objects.get(day=self.today, product__isnull=True).orders,
+            1,
+        )
+        self.assertIn("Перенесено: 3", out.getvalue())
+
+    def test_overview_reads_only_rollups(self):
+        self._order(sneaker=2, boot=1)
+        self._order(boot=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._overview(date_from=self.today.isoformat())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_orders"], 2)
+        self.assertEqual(Decimal(response.data["gross_revenue"]), Decimal("120"))
+        self.assertEqual(
+            [
+                (item["product_name"], item["total_quantity"])
+                for item in response.data["top_products"]
+            ],
+            [("Boot", 4), ("Sneaker", 2)],
+        )
+        self.assertFalse(
+            any('"shop_order' in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_date_to_includes_the_whole_day(self):
+        self._order(sneaker=1)
+        yesterday = self.today - timedelta(days=1)
+
+        self.assertEqual(
+            self._overview(date_to=self.today.isoformat()).data["total_orders"], 1
+        )
+        self.assertEqual(
+            self._overview(date_to=yesterday.isoformat()).data["total_orders"], 0
+        )
+
+    def test_cancelling_and_archiving_orders_updates_rollups(self):
+        kept = self._order(sneaker=1)
+        cancelled = self._order(boot=2)
+
+        cancelled.status = Order.Status.CANCELLED
+        cancelled.save()
+        kept.delete()
+
+        self.assertEqual(
+            self._rows(),
+            {
+                None: (0, 0, Decimal("0.00")),
+                self.sneaker.pk: (0, 0, Decimal("0.00")),
+                self.boot.pk: (0, 0, Decimal("0.00")),
+            },
+        )
+        cancelled.status = Order.Status.PAID
+        cancelled.save()
+        self.assertEqual(self._rows()[self.boot.pk], (1, 2, Decimal("50.00")))
+        self.assertEqual(self._overview().data["total_orders"], 1)
+
+    def test_rebuild_command_backfills_and_reconciles(self):
+        self._order(sneaker=2, boot=1)
+        self._order(boot=1)
+        expected = self._rows()
+        DailySalesRollup.objects.filter(product=self.boot).delete()
+        DailySalesRollup.objects.filter(product__isnull=True).update(orders=7)
+
+        out = StringIO()
+        call_command("rebuild_sales_rollups", "--all", stdout=out)
+
+        self.assertEqual(self._rows(), expected)
+        self.assertIn("исправлено расхождений 2", out.getvalue())
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+class ConcurrentRebuildTests(TransactionTestCase):
+    def _order(self, product, quantity) -> Order:
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        return Order.create_from_cart(cart, **ORDER_FIELDS)
+
+    def test_checkouts_of_the_same_day_do_not_wait_on_each_other(self):
+        category = Category.objects.create(name="Shoes")
+        sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-3", price=10, stock=50
+        )
+        boot = Product.objects.create(
+            category=category, name="Boot", sku="BOOT-3", price=25, stock=50
+        )
+        self._order(sneaker, 1)
+        process_sales_queue()
+        finished = threading.Event()
+
+        def checkout():
+            try:
+                self._order(boot, 1)
+                finished.set()
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            self._order(sneaker, 1)
+            worker = threading.Thread(target=checkout)
+            worker.start()
+            # Used to block here on the day's total row until this COMMIT.
+            self.assertTrue(finished.wait(5))
+        worker.join()
+
+        process_sales_queue()
+        total = DailySalesRollup.objects.get(
+            day=timezone.localdate(), product__isnull=True
+        )
+        self.assertEqual(total.orders, 3)
+
+    def test_checkout_committing_during_a_rebuild_is_kept(self):
+        category = Category.objects.create(name="Shoes")
+        sneaker = Product.objects.create(
+            category=category, name="Sneaker", sku="SNKR-2", price=10, stock=50
+        )
+        today = timezone.localdate()
+        self._order(sneaker, 1)
+        errors = []
+
+        def rebuild():
+            try:
+                rebuild_sales_rollups(today, today)
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            self._order(sneaker, 2)
+            worker = threading.Thread(target=rebuild)
+            worker.start()
+            # Commit only once the rebuild is waiting on this checkout.
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT count(*) FROM pg_locks WHERE NOT granted")
+                    if cursor.fetchone()[0]:
+                        break
+                time.sleep(0.02)
+        worker.join()
+        process_sales_queue()
+
+        self.assertEqual(errors, [])
+        total = DailySalesRollup.objects.get(day=today, product__isnull=True)
+        self.assertEqual((total.orders, total.quantity), (2, 3))
+        line = DailySalesRollup.objects.get(day=today, product=sneaker)
+        self.assertEqual((line.orders, line.quantity), (2, 3))
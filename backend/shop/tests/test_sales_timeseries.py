@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from shop.models import DailySalesRollup, SalesDelta
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SalesTimeSeriesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                username="admin", password="secret", is_staff=True
+            )
+        )
+
+    def _sale(self, day, orders, revenue, currency="RUB"):
+        DailySalesRollup.objects.create(
+            day=day, currency=currency, orders=orders, revenue=Decimal(revenue)
+        )
+
+    def _get(self, **params):
+        response = self.client.get("/api/stats/timeseries/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_windows_share_one_daily_series(self):
+        self._sale(self.today - timedelta(days=5), 2, "300.00")
+        self._sale(self.yesterday, 1, "50.00")
+        self._sale(self.today, 3, "90.00")
+        self._sale(self.today, 9, "900.00", currency="EUR")
+
+        data = self._get(interval="day", windows="2,7")
+
+        short, week = data["windows"]
+        self.assertEqual(len(short["series"]), 2)
+        self.assertEqual(len(week["series"]), 7)
+        self.assertEqual(week["date_from"], self.today - timedelta(days=6))
+        self.assertEqual(
+            [(b["orders"], Decimal(b["revenue"])) for b in short["series"]],
+            [(1, Decimal("50")), (3, Decimal("90"))],
+        )
+        self.assertEqual(week["totals"]["orders"], 6)
+        self.assertEqual(Decimal(week["totals"]["revenue"]), Decimal("440"))
+        self.assertEqual(week["totals"]["average_order_value"], "73.33")
+        self.assertIsNone(week["series"][0]["average_order_value"])
+
+    def test_monthly_buckets_group_days(self):
+        month_start = self.today.replace(day=1)
+        previous_month = (month_start - timedelta(days=1)).replace(day=1)
+        self._sale(previous_month, 1, "10.00")
+        self._sale(previous_month + timedelta(days=1), 1, "30.00")
+        self._sale(self.today, 2, "100.00")
+
+        series = self._get(interval="month", windows="2")["windows"][0]["series"]
+
+        self.assertEqual(
+            [b["period_start"] for b in series], [previous_month, month_start]
+        )
+        self.assertEqual([b["orders"] for b in series], [2, 2])
+        self.assertEqual(series[0]["average_order_value"], "20.00")
+
+    def test_past_buckets_are_cached_until_rollups_change(self):
+        self._sale(self.yesterday, 1, "50.00")
+        self._sale(self.today, 1, "10.00")
+        self._get(windows="2")
+
+        # Bypasses DailySalesRollup.apply, so nothing is invalidated.
+        DailySalesRollup.objects.update(orders=5)
+        stale = self._get(windows="2")["windows"][0]["series"]
+        self.assertEqual([b["orders"] for b in stale], [1, 5])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailySalesRollup.apply(
+                {(self.yesterday, "RUB", None): SalesDelta(orders=1)}
+            )
+        fresh = self._get(windows="2")["windows"][0]["series"]
+        self.assertEqual([b["orders"] for b in fresh], [6, 5])
+
+    @override_settings(SALES_BUCKET_CACHE_TIMEOUT=60)
+    def test_missed_invalidations_expire_with_the_cached_bucket(self):
+        self._sale(self.yesterday, 1, "50.00")
+        self._get(windows="2")
+        DailySalesRollup.objects.update(orders=5)
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            series = self._get(windows="2")["windows"][0]["series"]
+
+        self.assertEqual([b["orders"] for b in series], [5, 0])
+
+    def test_rejects_unknown_interval_and_bad_windows(self):
+        for params in ({"interval": "year"}, {"windows": "0"}, {"windows": "7,x"}):
+            response = self.client.get("/api/stats/timeseries/", params)
+            self.assertEqual(response.status_code, 400, params)
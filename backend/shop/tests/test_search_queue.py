@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from shop.models import Category, Product, ProductImage, SearchIndexQueue
+from shop.search import process_index_queue, sync_all_products
+
+
+class FakeResponse:
+    def wait(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self):
+        self.indexes: dict[str, FakeIndex] = {}
+
+    def init_index(self, name: str) -> FakeIndex:
+        return self.indexes.setdefault(name, FakeIndex(name, self))
+
+
+class FakeIndex:
+    def __init__(self, name: str = "shop_products", client: FakeClient | None = None):
+        self.name = name
+        self.client = client
+        self.saved: list[list[dict]] = []
+        self.deleted: list[list[str]] = []
+
+    def save_objects(self, records):
+        self.saved.append(list(records))
+        return FakeResponse()
+
+    def delete_objects(self, object_ids):
+        self.deleted.append(list(object_ids))
+        return FakeResponse()
+
+    def copy_to(self, name, request_options=None):
+        self.client.init_index(name)
+        return FakeResponse()
+
+    def move_to(self, name):
+        self.client.indexes[name] = self.client.indexes.pop(self.name)
+        return FakeResponse()
+
+    def delete(self):
+        self.client.indexes.pop(self.name, None)
+        return FakeResponse()
+
+
+@override_settings(ALGOLIA_ENABLED=True, CATALOG_CACHE_ENABLED=False)
+class SearchIndexQueueTests(TestCase):
+    def setUp(self):
+        self.index = FakeIndex()
+        patcher = mock.patch("shop.search.get_index", return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.category = Category.objects.create(name="Shoes")
+
+    def _create(self, name: str) -> Product:
+        return Product.objects.create(
+            category=self.category, name=name, sku=name, price=Decimal("10.00")
+        )
+
+    def test_saves_are_queued_once_and_pushed_in_one_batch(self):
+        products = [self._create(f"Sneaker {index}") for index in range(3)]
+        for product in products:
+            product.stock = 5
+            product.save()
+        self.assertEqual(self.index.saved, [])
+        self.assertEqual(SearchIndexQueue.objects.count(), 3)
+
+        self.assertEqual(process_index_queue(), (3, 0))
+        self.assertEqual(len(self.index.saved), 1)
+        self.assertEqual(
+            sorted(record["objectID"] for record in self.index.saved[0]),
+            sorted(str(product.pk) for product in products),
+        )
+        self.assertFalse(SearchIndexQueue.objects.exists())
+
+    def test_deleted_and_inactive_products_are_removed(self):
+        removed = self._create("Removed")
+        hidden = self._create("Hidden")
+        expected = sorted([str(removed.pk), str(hidden.pk)])
+        removed.hard_delete()
+        hidden.is_active = False
+        hidden.save()
+
+        self.assertEqual(process_index_queue(), (0, 2))
+        self.assertEqual(sorted(self.index.deleted[0]), expected)
+
+    def test_changes_made_during_a_push_stay_queued(self):
+        product = self._create("Sneaker")
+
+        def save_objects(records):
+            product.price = Decimal("12.00")
+            product.save()
+
+        self.index.save_objects = save_objects
+        self.assertEqual(process_index_queue(), (1, 0))
+        self.assertTrue(SearchIndexQueue.objects.filter(product_id=product.pk).exists())
+
+    def test_failed_push_keeps_entries_and_backs_off(self):
+        self._create("Sneaker")
+        self.index.save_objects = mock.Mock(side_effect=RuntimeError("timeout"))
+
+        with self.assertRaises(RuntimeError):
+            process_index_queue()
+        entry = SearchIndexQueue.objects.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        # Not due yet: the next run leaves it alone.
+        self.assertEqual(process_index_queue(), (0, 0))
+        self.index.save_objects.assert_called_once()
+
+    def test_rejected_product_does_not_stall_the_queue(self):
+        oversized = self._create("Oversized")
+        others = [self._create(f"Sneaker {index}") for index in range(2)]
+        save_objects = self.index.save_objects
+
+        def reject_oversized(records):
+            records = list(records)
+            if any(record["objectID"] == str(oversized.pk) for record in records):
+                raise RuntimeError("Record is too big")
+            return save_objects(records)
+
+        self.index.save_objects = reject_oversized
+        with self.assertRaises(RuntimeError):
+            process_index_queue()
+        SearchIndexQueue.objects.update(available_at=timezone.now())
+
+        # Retried alone, it fails without holding back the others.
+        with self.assertRaises(RuntimeError):
+            process_index_queue()
+        self.assertEqual(process_index_queue(), (1, 0))
+        self.assertEqual(process_index_queue(), (1, 0))
+
+        self.assertEqual(
+            sorted(
+                record["objectID"] for batch in self.index.saved for record in batch
+            ),
+            sorted(str(product.pk) for product in others),
+        )
+        entry = SearchIndexQueue.objects.get()
+        self.assertEqual((entry.product_id, entry.attempts), (oversized.pk, 2))
+
+
+@override_settings(ALGOLIA_ENABLED=True, CATALOG_CACHE_ENABLED=False)
+class AlgoliaSyncTests(TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.index = self.client.init_index("shop_products")
+        for target, value in (("get_client", self.client), ("get_index", self.index)):
+            patcher = mock.patch(f"shop.search.{target}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.category = Category.objects.create(name="Shoes")
+        self.products = [self._create(index) for index in range(5)]
+
+    def _create(self, index: int) -> Product:
+        product = Product.objects.create(
+            category=self.category,
+            name=f"Sneaker {index}",
+            sku=f"SNKR-{index}",
+            price=Decimal("10.00"),
+        )
+        ProductImage.objects.create(product=product, image="products/side.jpg")
+        ProductImage.objects.create(
+            product=product, image="products/main.jpg", is_main=True
+        )
+        return product
+
+    def test_streams_fixed_size_batches_in_parallel(self):
+        reports = []
+        result = sync_all_products(batch_size=2, workers=2, progress=reports.append)
+
+        self.assertEqual((result.saved, result.batches), (5, 3))
+        self.assertEqual(sorted(len(batch) for batch in self.index.saved), [1, 2, 2])
+        self.assertTrue(reports)
+
+    def test_since_sends_changed_products_and_removes_hidden_ones(self):
+        since = timezone.now() + timedelta(seconds=1)
+        changed, hidden = self.products[0], self.products[1]
+        with mock.patch("django.utils.timezone.now", return_value=since):
+            changed.price = Decimal("12.00")
+            changed.save()
+            hidden.is_active = False
+            hidden.save()
+
+        result = sync_all_products(since=since)
+
+        self.assertEqual((result.saved, result.deleted), (1, 1))
+        self.assertEqual(self.index.saved[0][0]["objectID"], str(changed.pk))
+        self.assertEqual(self.index.deleted, [[str(hidden.pk)]])
+
+    def test_clear_rebuilds_in_a_temporary_index_and_swaps_it_in(self):
+        result = sync_all_products(clear_index=True, batch_size=2)
+
+        self.assertEqual(result.saved, 5)
+        self.assertEqual(self.index.saved, [])
+        live = self.client.indexes["shop_products"]
+        self.assertIsNot(live, self.index)
+        self.assertTrue(live.name.startswith("shop_products_tmp_"))
+        self.assertEqual(sum(len(batch) for batch in live.saved), 5)
+        self.assertEqual(list(self.client.indexes), ["shop_products"])
+
+    def test_reindexing_costs_the_same_queries_for_any_catalog_size(self):
+        with CaptureQueriesContext(connection) as small:
+            sync_all_products(batch_size=2)
+        self.products += [self._create(index) for index in range(5, 12)]
+        self.index.saved.clear()
+        with CaptureQueriesContext(connection) as large:
+            result = sync_all_products(batch_size=2)
+
+        self.assertEqual(result.saved, 12)
+        # One product query and one image query.
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), 2)
+        records = [record for batch in self.index.saved for record in batch]
+        self.assertTrue(
+            all(record["image_url"].endswith("main.jpg") for record in records)
+        )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from shop.models import (
+    Cart,
+    CartItem,
+    Category,
+    InsufficientStockError,
+    Order,
+    Product,
+    ProductStockShard,
+)
+
+ORDER_FIELDS = {
+    "customer_email": "buyer@example.com",
+    "shipping_full_name": "Buyer",
+    "shipping_address": "Lenina 1",
+    "shipping_city": "Moscow",
+}
+
+
+def shard_levels(product: Product) -> list[int]:
+    return list(product.stock_shards.order_by("index").values_list("stock", flat=True))
+
+
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class StockShardTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Drops")
+        self.product = Product.objects.create(
+            category=self.category, name="Hot", sku="HOT-1", price=5, stock=10
+        )
+
+    def _checkout(self, quantity: int) -> Order:
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.product, quantity=quantity)
+        return Order.create_from_cart(cart, **ORDER_FIELDS)
+
+    def test_sharding_spreads_stock_and_folds_back(self):
+        self.product.set_stock_shards(4)
+
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(shard_levels(self.product), [3, 3, 2, 2])
+        self.assertEqual(self.product.total_stock, 10)
+
+        self.product.set_stock_shards(0)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.stock_shard_count), (10, 0))
+        self.assertFalse(ProductStockShard.objects.exists())
+
+    def test_checkout_takes_from_shards_and_across_them(self):
+        self.product.set_stock_shards(4)
+
+        self._checkout(2)
+        self._checkout(7)
+
+        self.assertEqual(sum(shard_levels(self.product)), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    def test_shortage_reports_sharded_total(self):
+        self.product.set_stock_shards(3)
+
+        with self.assertRaises(InsufficientStockError) as error:
+            self._checkout(11)
+
+        self.assertEqual(error.exception.shortages[0]["available"], 10)
+        self.assertEqual(sum(shard_levels(self.product)), 10)
+
+    def test_api_exposes_total_stock_and_filters_on_it(self):
+        self.product.set_stock_shards(2)
+        empty = Product.objects.create(
+            category=self.category, name="Gone", sku="GONE-1", price=5
+        )
+        empty.set_stock_shards(2)
+
+        detail = self.client.get(reverse("product-detail", args=[self.product.slug]))
+        listing = self.client.get(reverse("product-list"), {"in_stock": "true"})
+
+        self.assertEqual(detail.data["stock"], 10)
+        self.assertEqual(
+            [item["id"] for item in listing.data["results"]], [self.product.id]
+        )
+
+    def test_staff_stock_update_redistributes_shards(self):
+        self.product.set_stock_shards(2)
+        staff = get_user_model().objects.create_user(
+            username="staff", email="staff@example.com", password="x", is_staff=True
+        )
+        self.client.force_authenticate(staff)
+
+        response = self.client.patch(
+            reverse("product-detail", args=[self.product.slug]),
+            {"stock": 7},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["stock"], 7)
+        self.assertEqual(shard_levels(self.product), [4, 3])
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs concurrent transactions")
+@override_settings(CATALOG_CACHE_ENABLED=False)
+class ConcurrentShardedCheckoutTests(TransactionTestCase):
+    def test_parallel_checkouts_never_oversell_sharded_stock(self):
+        category = Category.objects.create(name="Sale")
+        product = Product.objects.create(
+            category=category, name="Hot", sku="HOT-2", price=5, stock=5
+        )
+        product.set_stock_shards(4)
+        carts = []
+        for _ in range(12):
+            cart = Cart.objects.create()
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            carts.append(cart)
+        placed = []
+
+        def buy(cart):
+            try:
+                Order.create_from_cart(cart, **ORDER_FIELDS)
+                placed.append(cart.pk)
+            except InsufficientStockError:
+                pass
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(placed), 5)
+        self.assertEqual(shard_levels(product), [0, 0, 0, 0])
+        self.assertEqual(Order.objects.count(), 5)
@@ -5,10 +5,12 @@ from .views import (
     CartItemViewSet,
     CartViewSet,
     CategoryViewSet,
+    CustomerAnalyticsView,
     OrderViewSet,
     ProductReviewViewSet,
     ProductViewSet,
     StatisticsOverviewView,
+    StatisticsTimeSeriesView,
 )
 
 router = DefaultRouter()
@@ -19,6 +21,7 @@ router.register("orders", OrderViewSet, basename="order")
 router.register("reviews", ProductReviewViewSet, basename="review")
 
 cart_items_list = CartItemViewSet.as_view({"get": "list", "post": "create"})
+cart_items_add = CartItemViewSet.as_view({"post": "add"})
 cart_items_detail = CartItemViewSet.as_view(
     {"patch": "partial_update", "delete": "destroy"}
 )
@@ -26,10 +29,17 @@ cart_items_detail = CartItemViewSet.as_view(
 urlpatterns = [
     path("", include(router.urls)),
     path("carts/<uuid:cart_id>/items/", cart_items_list, name="cart-items-list"),
+    path("carts/<uuid:cart_id>/items/add/", cart_items_add, name="cart-items-add"),
     path(
         "carts/<uuid:cart_id>/items/<int:pk>/",
         cart_items_detail,
         name="cart-items-detail",
     ),
     path("stats/overview/", StatisticsOverviewView.as_view(), name="stats-overview"),
+    path("stats/customers/", CustomerAnalyticsView.as_view(), name="stats-customers"),
+    path(
+        "stats/timeseries/",
+        StatisticsTimeSeriesView.as_view(),
+        name="stats-timeseries",
+    ),
 ]
@@ -1,23 +1,80 @@
 from __future__ import annotations
 
+import logging
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
 from .models import Order, OrderItem, Product
 
+logger = logging.getLogger(__name__)
 
-def user_has_verified_purchase(user, product: Product) -> bool:
+PURCHASES_KEY_PREFIX = "purchases:user"
+
+
+def purchases_key(user_id) -> str:
+    return f"{PURCHASES_KEY_PREFIX}:{user_id}"
+
+
+def _load_purchased_product_ids(user_id) -> frozenset[int]:
+    product_ids = (
+        OrderItem.objects.filter(
+            order__user_id=user_id,
+            order__deleted_at__isnull=True,
+            order__status__in=Order.PURCHASE_STATUSES,
+            order__payment_status=Order.PaymentStatus.PAID,
+        )
+        .order_by()
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+    return frozenset(product_ids)
+
+
+def purchased_product_ids(user) -> frozenset[int]:
+    """
+    Ids of every product in the user's paid orders, cached per user until an
+    order of theirs moves into or out of a purchase status (``shop/signals.py``).
+    """
     if not user or not user.is_authenticated:
-        return False
-    qualifying_statuses = {
-        Order.Status.PAID,
-        Order.Status.SHIPPED,
-        Order.Status.COMPLETED,
-    }
-    qualifying_payments = {
-        Order.PaymentStatus.PAID,
-    }
-    return OrderItem.objects.filter(
-        order__user=user,
-        order__deleted_at__isnull=True,
-        order__status__in=qualifying_statuses,
-        order__payment_status__in=qualifying_payments,
-        product=product,
-    ).exists()
+        return frozenset()
+    key = purchases_key(user.pk)
+    try:
+        cached = cache.get(key)
+    except Exception as exc:
+        logger.warning("Purchased products cache unavailable: %s", exc)
+        cached = None
+    if cached is not None:
+        return cached
+    product_ids = _load_purchased_product_ids(user.pk)
+    try:
+        cache.set(key, product_ids, settings.PURCHASES_CACHE_TIMEOUT)
+    except Exception as exc:
+        logger.warning("Failed to cache purchased products: %s", exc)
+    return product_ids
+
+
+def user_has_verified_purchase(user, product: Product) -> bool:
+    return product.pk in purchased_product_ids(user)
+
+
+def user_purchased_products(user, product_ids: Iterable[int]) -> set[int]:
+    """Which of ``product_ids`` the user has bought, from one cached set."""
+    return purchased_product_ids(user).intersection(product_ids)
+
+
+def invalidate_purchases(user_ids: Iterable[int]) -> None:
+    keys = [purchases_key(user_id) for user_id in set(user_ids) if user_id]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as exc:
+        logger.warning("Failed to invalidate purchased products: %s", exc)
+
+
+def invalidate_purchases_on_commit(user_ids: Iterable[int]) -> None:
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: invalidate_purchases(user_ids))
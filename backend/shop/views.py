@@ -1,79 +1,183 @@
 from __future__ import annotations
 
-import logging
-from datetime import datetime
+import time
+from datetime import date, datetime
 from decimal import Decimal
 
 from django.conf import settings
-from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg, Count, Q, Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
-from django.utils.timezone import make_aware
+from django.utils.timezone import localdate, make_aware
 from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from .analytics import customer_analytics
+from .cache import (
+    CATEGORIES_TAG,
+    SALES_INTERVALS,
+    CachedResponseMixin,
+    category_tag,
+    product_tag,
+)
+from .carts import (
+    apply_changes,
+    create_guest_cart,
+    delete_guest_cart,
+    fold_operations,
+    get_guest_store,
+    resolve_guest_cart,
+)
+from .emails import queue_account_setup, queue_order_confirmation
 from .filters import ProductFilter
-from .models import Cart, CartItem, Category, Order, OrderItem, Product, ProductReview
+from .fulltext import suggest_product_names
+from .idempotency import idempotent
+from .local_search import search_products as search_local_index
+from .models import (
+    Cart,
+    CartItem,
+    Category,
+    Order,
+    Product,
+    ProductRatingSummary,
+    ProductReview,
+    shard_stock_sum,
+)
+from .moderation import claim_pending_reviews, moderate_reviews
+from .pagination import OptionalKeysetMixin, ReviewFeedPagination
 from .permissions import IsAdminOrReadOnly, IsReviewAuthorOrStaff
+from .sales import average_order_value, sales_overview, sales_series, summarize_buckets
 from .serializers import (
+    CartItemAddSerializer,
     CartItemSerializer,
+    CartOperationsSerializer,
     CartSerializer,
     CategorySerializer,
     OrderCreateSerializer,
     OrderSerializer,
     ProductReviewSerializer,
     ProductSerializer,
+    ReviewBulkModerationSerializer,
+    ReviewClaimSerializer,
 )
-from .utils import user_has_verified_purchase
+from .utils import user_has_verified_purchase, user_purchased_products
+
+SUGGEST_DEFAULT_LIMIT = 5
+SUGGEST_MAX_LIMIT = 10
+MAX_PURCHASE_CHECK_IDS = 200
+PRODUCT_ALREADY_IN_CART = "This product is already in the cart."
 
-logger = logging.getLogger(__name__)
 
+def _limit_param(request, default: int, maximum: int) -> int:
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
 
-class CategoryViewSet(viewsets.ModelViewSet):
+
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrReadOnly]
     lookup_field = "slug"
+    cache_scope = "categories"
+
+    def get_list_cache_tags(self, data) -> list[str]:
+        return [CATEGORIES_TAG]
+
+    def get_detail_cache_tags(self, data) -> list[str]:
+        return [category_tag(data["id"])]
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, OptionalKeysetMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrReadOnly]
     lookup_field = "slug"
     filterset_class = ProductFilter
     ordering_fields = ("price", "created_at", "name")
     ordering = ("name",)
+    cache_scope = "products"
+
+    def get_detail_cache_tags(self, data) -> list[str]:
+        tags = [product_tag(data["id"])]
+        if data.get("category"):
+            tags.append(category_tag(data["category"]["id"]))
+        return tags
 
     def get_queryset(self):
         return (
-            Product.objects.select_related("category")
+            Product.objects.select_related("category", "rating_summary")
             .prefetch_related("images")
-            .annotate(
-                reviews_count=Count(
-                    "reviews",
-                    filter=Q(
-                        reviews__moderation_status=ProductReview.ModerationStatus.APPROVED,
-                        reviews__deleted_at__isnull=True,
-                    ),
-                    distinct=True,
-                ),
-                average_rating=Avg(
-                    "reviews__rating",
-                    filter=Q(
-                        reviews__moderation_status=ProductReview.ModerationStatus.APPROVED,
-                        reviews__deleted_at__isnull=True,
-                    ),
-                ),
-            )
+            .defer("search_vector")
+            .annotate(shard_stock=shard_stock_sum())
+        )
+
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """Closest product names for a (possibly misspelled) ``?q=``."""
+        limit = _limit_param(request, SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT)
+        queryset = Product.objects.filter(is_active=True)
+        suggestions = suggest_product_names(
+            queryset, request.query_params.get("q", ""), limit
+        )
+        return Response({"results": suggestions})
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """
+        Algolia-shaped hits from the in-process index (``shop/local_search.py``)
+        so the storefront search keeps working without Algolia.
+        """
+        if not settings.LOCAL_SEARCH_ENABLED:
+            raise Http404
+        query = request.query_params.get("q", "")
+        limit = _limit_param(request, SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT)
+        started = time.perf_counter()
+        result = search_local_index(query, limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return Response(
+            {
+                "hits": result["hits"],
+                "nbHits": result["nbHits"],
+                "query": query,
+                "processingTimeMS": round(elapsed_ms, 3),
+            }
         )
 
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def purchased(self, request):
+        """Which of ``?ids=1,2,3`` the current user has bought (paid orders)."""
+        raw_ids = [
+            value.strip()
+            for param in request.query_params.getlist("ids")
+            for value in param.split(",")
+            if value.strip()
+        ]
+        if len(raw_ids) > MAX_PURCHASE_CHECK_IDS:
+            raise ParseError(f"At most {MAX_PURCHASE_CHECK_IDS} ids per request.")
+        try:
+            product_ids = {int(value) for value in raw_ids}
+        except ValueError as exc:
+            raise ParseError("ids must be a comma-separated list of integers.") from exc
+        purchased = user_purchased_products(request.user, product_ids)
+        return Response({"purchased": sorted(purchased)})
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Full-text matches are ranked unless the client picked an ordering.
+        if "search_rank" in queryset.query.annotations and not (
+            self.request.query_params.get(api_settings.ORDERING_PARAM)
+        ):
+            queryset = queryset.order_by("-search_rank", "id")
+        return queryset
+
 
 class CartViewSet(
     mixins.CreateModelMixin,
@@ -82,22 +186,58 @@ class CartViewSet(
     viewsets.GenericViewSet,
 ):
     queryset = Cart.objects.prefetch_related(
-        "items__product__category", "items__product__images"
+        Prefetch("items", queryset=CartItem.objects.select_related("product")),
+        "items__product__images",
     )
     serializer_class = CartSerializer
     permission_classes = [AllowAny]
     lookup_field = "id"
 
     def create(self, request, *args, **kwargs):
-        cart = Cart.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-        )
+        cart = None
+        if not request.user.is_authenticated:
+            cart = create_guest_cart()
+        if cart is None:
+            cart = Cart.objects.create(
+                user=request.user if request.user.is_authenticated else None,
+            )
         serializer = self.get_serializer(cart)
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
 
+    def retrieve(self, request, *args, **kwargs):
+        guest_cart = resolve_guest_cart(request, kwargs["id"])
+        if guest_cart is not None:
+            return Response(self.get_serializer(guest_cart).data)
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=True, methods=["post"])
+    @idempotent
+    def operations(self, request, *args, **kwargs):
+        """
+        Apply a list of ``add``/``set``/``remove`` operations in one
+        transaction and return the recomputed cart.
+        """
+        serializer = CartOperationsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = fold_operations(serializer.validated_data["operations"])
+        guest_cart = resolve_guest_cart(request, kwargs["id"])
+        if guest_cart is not None:
+            get_guest_store().apply(guest_cart.id, changes)
+            cart = get_guest_store().load(guest_cart.id)
+        else:
+            cart = self.get_object()
+            apply_changes(cart.pk, changes)
+            cart = self.get_queryset().get(pk=cart.pk)
+        return Response(self.get_serializer(cart).data)
+
+    def destroy(self, request, *args, **kwargs):
+        if delete_guest_cart(kwargs["id"]):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return super().destroy(request, *args, **kwargs)
+
 
 class CartItemViewSet(
     mixins.ListModelMixin,
@@ -113,7 +253,7 @@ class CartItemViewSet(
         cart_id = self.kwargs["cart_id"]
         return (
             CartItem.objects.filter(cart_id=cart_id)
-            .select_related("product", "cart", "product__category")
+            .select_related("product")
             .prefetch_related("product__images")
         )
 
@@ -122,17 +262,111 @@ class CartItemViewSet(
         context["cart_id"] = self.kwargs["cart_id"]
         return context
 
+    def _guest_cart(self):
+        return resolve_guest_cart(self.request, self.kwargs["cart_id"])
+
+    def _guest_item(self, guest_cart) -> CartItem:
+        item = guest_cart.item(int(self.kwargs["pk"]))
+        if item is None:
+            raise Http404
+        return item
+
+    def list(self, request, *args, **kwargs):
+        guest_cart = self._guest_cart()
+        if guest_cart is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(guest_cart.items)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        return Response(self.get_serializer(guest_cart.items, many=True).data)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        guest_cart = self._guest_cart()
+        if guest_cart is None:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data["product"]
+        quantity = serializer.validated_data.get("quantity", 1)
+        if not get_guest_store().create_line(guest_cart.id, product.pk, quantity):
+            raise serializers.ValidationError({"product_id": [PRODUCT_ALREADY_IN_CART]})
+        item = CartItem(
+            id=product.pk, cart_id=guest_cart.id, product=product, quantity=quantity
+        )
+        return Response(self.get_serializer(item).data, status=status.HTTP_201_CREATED)
+
+    @idempotent
+    def add(self, request, *args, **kwargs):
+        """
+        Add ``quantity`` of a product, creating the line or incrementing it
+        atomically when the product is already in the cart.
+        """
+        serializer = CartItemAddSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data["product"]
+        quantity = serializer.validated_data["quantity"]
+        guest_cart = self._guest_cart()
+        if guest_cart is not None:
+            quantity = get_guest_store().add(guest_cart.id, product.pk, quantity)
+            item = CartItem(
+                id=product.pk, cart_id=guest_cart.id, product=product, quantity=quantity
+            )
+        else:
+            cart = get_object_or_404(Cart, pk=self.kwargs["cart_id"])
+            CartItem.add_quantities(cart.pk, {product.pk: quantity})
+            item = self.get_queryset().get(product=product)
+        return Response(self.get_serializer(item).data)
+
+    # partial_update delegates here, so PATCH is covered too.
+    @idempotent
+    def update(self, request, *args, **kwargs):
+        guest_cart = self._guest_cart()
+        if guest_cart is None:
+            return super().update(request, *args, **kwargs)
+        item = self._guest_item(guest_cart)
+        serializer = self.get_serializer(
+            item, data=request.data, partial=kwargs.get("partial", False)
+        )
+        serializer.is_valid(raise_exception=True)
+        store = get_guest_store()
+        product = serializer.validated_data.get("product", item.product)
+        if product.pk != item.product_id:
+            store.remove(guest_cart.id, item.product_id)
+        item.id, item.product = product.pk, product
+        item.quantity = serializer.validated_data.get("quantity", item.quantity)
+        store.set_quantity(guest_cart.id, product.pk, item.quantity)
+        return Response(self.get_serializer(item).data)
+
+    @idempotent
+    def destroy(self, request, *args, **kwargs):
+        guest_cart = self._guest_cart()
+        if guest_cart is None:
+            return super().destroy(request, *args, **kwargs)
+        item = self._guest_item(guest_cart)
+        get_guest_store().remove(guest_cart.id, item.product_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def perform_create(self, serializer):
         cart = get_object_or_404(Cart, pk=self.kwargs["cart_id"])
-        serializer.save(cart=cart)
+        try:
+            with transaction.atomic():
+                serializer.save(cart=cart)
+        except IntegrityError as exc:
+            raise serializers.ValidationError(
+                {"product_id": [PRODUCT_ALREADY_IN_CART]}
+            ) from exc
 
     def perform_update(self, serializer):
         serializer.save()
 
 
-class ProductReviewViewSet(viewsets.ModelViewSet):
+class ProductReviewViewSet(OptionalKeysetMixin, viewsets.ModelViewSet):
     serializer_class = ProductReviewSerializer
     lookup_field = "id"
+    keyset_pagination_class = ReviewFeedPagination
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
     def get_permissions(self):
@@ -140,7 +374,7 @@ class ProductReviewViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         if self.action in {"update", "partial_update", "destroy"}:
             return [IsAuthenticated(), IsReviewAuthorOrStaff()]
-        if self.action == "moderate":
+        if self.action in {"moderate", "bulk_moderate", "claim"}:
             return [IsAdminUser()]
         return [AllowAny()]
 
@@ -154,7 +388,11 @@ class ProductReviewViewSet(viewsets.ModelViewSet):
         if product_id:
             qs = qs.filter(product_id=product_id)
         if product_slug:
-            qs = qs.filter(product__slug=product_slug)
+            # Filter on product_id so the feed can use review_feed_idx.
+            slug_product_id = self._product_id_for_slug(product_slug)
+            if slug_product_id is None:
+                return qs.none()
+            qs = qs.filter(product_id=slug_product_id)
 
         if request.user.is_staff:
             moderation = request.query_params.get("moderation")
@@ -167,6 +405,50 @@ class ProductReviewViewSet(viewsets.ModelViewSet):
             visibility |= Q(user=request.user)
         return qs.filter(visibility).order_by("-created_at")
 
+    @staticmethod
+    def _product_id_for_slug(slug: str) -> int | None:
+        return (
+            Product.objects.all_with_deleted()
+            .filter(slug=slug)
+            .values_list("pk", flat=True)
+            .first()
+        )
+
+    @action(detail=False, methods=["get"])
+    def histogram(self, request):
+        """
+        Approved-review counts per star for ``?product=`` or ``?product_slug=``,
+        read from ``ProductRatingSummary`` instead of counting reviews.
+        """
+        product_id = request.query_params.get("product")
+        product_slug = request.query_params.get("product_slug")
+        if product_slug:
+            product_id = self._product_id_for_slug(product_slug)
+        elif product_id:
+            try:
+                product_id = int(product_id)
+            except ValueError as exc:
+                raise ParseError("product must be an integer.") from exc
+        else:
+            raise ParseError("Pass product or product_slug.")
+        summary = ProductRatingSummary.objects.filter(product_id=product_id).first()
+        if summary is None:
+            if not Product.objects.filter(pk=product_id).exists():
+                raise Http404
+            summary = ProductRatingSummary(product_id=product_id)
+        return Response(
+            {
+                "product": product_id,
+                "reviews_count": summary.reviews_count,
+                "average_rating": (
+                    round(summary.average_rating, 2) if summary.reviews_count else None
+                ),
+                "histogram": {
+                    str(star): count for star, count in summary.histogram.items()
+                },
+            }
+        )
+
     def perform_create(self, serializer):
         product = serializer.validated_data["product"]
         user = self.request.user if self.request.user.is_authenticated else None
@@ -231,6 +513,41 @@ class ProductReviewViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(review)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="bulk-moderate")
+    def bulk_moderate(self, request):
+        """
+        Apply one moderation status and note to up to 500 reviews at once;
+        ids that do not exist (or were deleted) are reported as ``missing``.
+        """
+        serializer = ReviewBulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        updated = moderate_reviews(
+            ProductReview.all_objects.filter(pk__in=ids, deleted_at__isnull=True),
+            status=serializer.validated_data["status"],
+            moderator=request.user,
+            note=serializer.validated_data["note"],
+        )
+        return Response({"updated": updated, "missing": sorted(ids - set(updated))})
+
+    @action(detail=False, methods=["post"])
+    def claim(self, request):
+        """
+        Lease the next ``limit`` pending reviews to the calling moderator so
+        parallel moderators never get the same ones.
+        """
+        serializer = ReviewClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reviews = claim_pending_reviews(
+            request.user, serializer.validated_data["limit"]
+        )
+        return Response(
+            {
+                "claimed_until": reviews[0].claimed_until if reviews else None,
+                "results": self.get_serializer(reviews, many=True).data,
+            }
+        )
+
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
@@ -239,7 +556,9 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Order.objects.select_related("user").prefetch_related(
-            "items__product", "items__product__images"
+            "items__product",
+            "items__product__images",
+            "items__product__rating_summary",
         )
         user = self.request.user
         if user.is_authenticated:
@@ -258,6 +577,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderCreateSerializer
         return OrderSerializer
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -266,145 +586,148 @@ class OrderViewSet(viewsets.ModelViewSet):
             order, context=self.get_serializer_context()
         )
         auto_registered_user = getattr(serializer, "auto_registered_user", None)
+        # Queued in the request transaction; the send_queued_emails worker
+        # delivers them, so checkout latency does not depend on the mail server.
         if auto_registered_user:
-            self._send_account_setup_email(auto_registered_user)
+            queue_account_setup(auto_registered_user)
         response_payload = dict(output_serializer.data)
         response_payload["requires_account_activation"] = bool(auto_registered_user)
         if auto_registered_user and auto_registered_user.email:
             response_payload["activation_email"] = auto_registered_user.email
-        self._send_confirmation_email(order)
+        queue_order_confirmation(order)
         headers = self.get_success_headers(output_serializer.data)
         return Response(
             response_payload, status=status.HTTP_201_CREATED, headers=headers
         )
 
-    def _send_confirmation_email(self, order: Order) -> None:
-        if not order.customer_email:
-            return
-        try:
-            items = order.items.select_related("product").all()
-            lines = [
-                f"- {item.product_name} x {item.quantity} - {item.line_total} {order.currency}"
-                for item in items
-            ]
-            items_block = "\n".join(lines) if lines else "Cart is empty."
-            message = (
-                f"Hello, {order.shipping_full_name}!\n\n"
-                f"Thank you for your order #{order.pk}.\n\n"
-                f"Order summary:\n{items_block}\n\n"
-                f"Subtotal: {order.subtotal_amount} {order.currency}\n"
-                f"Shipping: {order.shipping_amount} {order.currency}\n"
-                f"Total: {order.total_amount} {order.currency}\n\n"
-                "We will contact you shortly to confirm the details.\n"
-                "If you did not place this order, please ignore this email."
-            )
-            send_mail(
-                subject=f"Order confirmation #{order.pk}",
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[order.customer_email],
-                fail_silently=True,
-            )
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Failed to send order confirmation email: %s", exc)
 
-    def _send_account_setup_email(self, user) -> None:
-        if not getattr(user, "email", None):
-            return
+def stats_days(request) -> tuple[date | None, date | None]:
+    """``date_from``/``date_to`` query params as days in the shop time zone."""
+    days = []
+    for param in ("date_from", "date_to"):
+        value = request.query_params.get(param)
+        if not value:
+            days.append(None)
+            continue
         try:
-            token_generator = PasswordResetTokenGenerator()
-            token = token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            reset_url = (
-                f"{settings.FRONTEND_PASSWORD_RESET_URL}?uid={uid}&token={token}"
-            )
-            full_name = user.get_full_name() or user.get_username()
-            message = (
-                f"Р—РґСЂР°РІСЃС‚РІСѓР№С‚Рµ, {full_name}!\n\n"
-                "Р”Р»СЏ СѓРґРѕР±СЃС‚РІР° РјС‹ СЃРѕР·РґР°Р»Рё РґР»СЏ РІР°СЃ Р°РєРєР°СѓРЅС‚ РІ Shopster, С‡С‚РѕР±С‹ РІС‹ РјРѕРіР»Рё РѕС‚СЃР»РµР¶РёРІР°С‚СЊ СЃРІРѕРё Р·Р°РєР°Р·С‹.\n"
-                f"РџРµСЂРµР№РґРёС‚Рµ РїРѕ СЃСЃС‹Р»РєРµ, С‡С‚РѕР±С‹ РїСЂРёРґСѓРјР°С‚СЊ РїР°СЂРѕР»СЊ Рё Р·Р°РІРµСЂС€РёС‚СЊ СЂРµРіРёСЃС‚СЂР°С†РёСЋ:\n{reset_url}\n\n"
-                "Р•СЃР»Рё РІС‹ РЅРµ РѕС„РѕСЂРјР»СЏР»Рё Р·Р°РєР°Р· РёР»Рё РЅРµ С…РѕС‚РёС‚Рµ СЃРѕР·РґР°РІР°С‚СЊ Р°РєРєР°СѓРЅС‚, РїСЂРѕСЃС‚Рѕ РїСЂРѕРёРіРЅРѕСЂРёСЂСѓР№С‚Рµ СЌС‚Рѕ РїРёСЃСЊРјРѕ."
-            )
-            send_mail(
-                subject="Р”РѕР±СЂРѕ РїРѕР¶Р°Р»РѕРІР°С‚СЊ РІ Shopster",
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=True,
-            )
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Failed to send auto-registration email: %s", exc)
+            moment = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise ParseError(f"Invalid {param} format. Use ISO 8601.") from exc
+        if moment.tzinfo is None:
+            moment = make_aware(moment)
+        days.append(localdate(moment))
+    return days[0], days[1]
 
 
 class StatisticsOverviewView(APIView):
+    """
+    Sales totals and top products for whole days, read from
+    ``DailySalesRollup`` so the cost does not grow with the order count.
+    """
+
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        date_from = request.query_params.get("date_from")
-        date_to = request.query_params.get("date_to")
-
-        order_queryset = Order.objects.all()
-        if date_from:
-            try:
-                start = datetime.fromisoformat(date_from)
-                if start.tzinfo is None:
-                    start = make_aware(start)
-                order_queryset = order_queryset.filter(placed_at__gte=start)
-            except ValueError:
-                return Response(
-                    {"detail": "Invalid date_from format. Use ISO 8601."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        if date_to:
-            try:
-                end = datetime.fromisoformat(date_to)
-                if end.tzinfo is None:
-                    end = make_aware(end)
-                order_queryset = order_queryset.filter(placed_at__lte=end)
-            except ValueError:
-                return Response(
-                    {"detail": "Invalid date_to format. Use ISO 8601."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        totals_by_currency_raw = order_queryset.values("currency").annotate(
-            total_sales=Sum("total_amount"),
-            total_orders=Count("id"),
-        )
+        totals, top_products = sales_overview(*stats_days(request))
         totals_by_currency = [
             {
                 "currency": item["currency"],
                 "total_sales": str(item["total_sales"] or Decimal("0.00")),
                 "total_orders": item["total_orders"],
             }
-            for item in totals_by_currency_raw
+            for item in totals
         ]
         total_orders = sum(item["total_orders"] for item in totals_by_currency)
         gross_revenue = sum(Decimal(item["total_sales"]) for item in totals_by_currency)
 
-        top_products_queryset = (
-            OrderItem.objects.filter(order__in=order_queryset)
-            .values("product_id", "product_name")
-            .annotate(
-                total_quantity=Sum("quantity"),
-                total_sales=Sum("line_total"),
-            )
-            .order_by("-total_quantity")[:5]
-        )
-        top_products = [
-            {
-                "product_id": item["product_id"],
-                "product_name": item["product_name"],
-                "total_quantity": item["total_quantity"],
-                "total_sales": str(item["total_sales"] or Decimal("0.00")),
-            }
-            for item in top_products_queryset
-        ]
-
         response_payload = {
             "total_orders": total_orders,
             "gross_revenue": str(gross_revenue),
             "currency_breakdown": totals_by_currency,
-            "top_products": top_products,
+            "top_products": [
+                {
+                    "product_id": item["product_id"],
+                    "product_name": item["product_name"],
+                    "total_quantity": item["total_quantity"],
+                    "total_sales": str(item["total_sales"] or Decimal("0.00")),
+                }
+                for item in top_products
+            ],
         }
         return Response(response_payload)
+
+
+class StatisticsTimeSeriesView(APIView):
+    """
+    Revenue, order count and average order value per ``day``/``week``/
+    ``month`` for one or more trailing windows, e.g. ``?interval=day&windows=7,30``.
+    Windows share one series, so the response costs the same as the largest.
+    """
+
+    permission_classes = [IsAdminUser]
+    default_windows = {"day": 30, "week": 12, "month": 12}
+    max_buckets = 366
+
+    def get(self, request):
+        interval = request.query_params.get("interval", "day")
+        if interval not in SALES_INTERVALS:
+            return Response(
+                {"detail": f"interval must be one of: {', '.join(SALES_INTERVALS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        raw_windows = request.query_params.get("windows") or str(
+            self.default_windows[interval]
+        )
+        try:
+            windows = [int(value) for value in raw_windows.split(",") if value.strip()]
+        except ValueError:
+            windows = []
+        if not windows or not all(0 < value <= self.max_buckets for value in windows):
+            return Response(
+                {
+                    "detail": "windows must be a comma-separated list of bucket "
+                    f"counts between 1 and {self.max_buckets}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        currency = request.query_params.get("currency", "RUB").upper()
+
+        series = sales_series(interval, currency, max(windows))
+        for bucket in series:
+            bucket["average_order_value"] = average_order_value(
+                bucket["revenue"], bucket["orders"]
+            )
+        payload_windows = []
+        for size in windows:
+            buckets = series[-size:]
+            payload_windows.append(
+                {
+                    "buckets": size,
+                    "date_from": buckets[0]["period_start"],
+                    "totals": summarize_buckets(buckets),
+                    "series": buckets,
+                }
+            )
+        return Response(
+            {"interval": interval, "currency": currency, "windows": payload_windows}
+        )
+
+
+class CustomerAnalyticsView(APIView):
+    """
+    Monthly cohorts, repeat-purchase rate, time to second order and revenue
+    percentiles for orders placed in ``date_from``..``date_to``.
+    """
+
+    permission_classes = [IsAdminUser]
+    max_offset = 24
+
+    def get(self, request):
+        date_from, date_to = stats_days(request)
+        try:
+            months = int(request.query_params.get("months", 12))
+        except ValueError:
+            months = -1
+        if not 0 <= months <= self.max_offset:
+            raise ParseError(f"months must be between 0 and {self.max_offset}.")
+        return Response(customer_analytics(date_from, date_to, months))
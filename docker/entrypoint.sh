@@ -5,6 +5,10 @@ set -o nounset
 
 python backend/manage.py migrate --noinput
 python backend/manage.py collectstatic --noinput
+python backend/manage.py build_local_search_index
+# Folds the search journal into the snapshot off the request path; it shares
+# LOCAL_SEARCH_DIR with the gunicorn workers, so it runs in this container.
+python backend/manage.py build_local_search_index --compact --loop &
 
 exec gunicorn core.wsgi:application \
     --chdir backend \
@@ -1,7 +1,7 @@
 import { redirect } from "next/navigation";
 
 import { auth } from "@/lib/auth";
-import { fetchStatsOverview } from "@/lib/adminApi";
+import { fetchStatsOverview, fetchStatsTimeSeries } from "@/lib/adminApi";
 
 export const metadata = {
   title: "Admin dashboard",
@@ -64,8 +64,12 @@ export default async function AdminStatsPage({ searchParams }: StatsPageProps) {
   };
 
   let stats;
+  let trend;
   try {
-    stats = await fetchStatsOverview(accessToken, query);
+    [stats, trend] = await Promise.all([
+      fetchStatsOverview(accessToken, query),
+      fetchStatsTimeSeries(accessToken, { interval: "day", windows: [7, 30] }),
+    ]);
   } catch (error) {
     console.error("Failed to load stats", error);
     return (
@@ -78,6 +82,9 @@ export default async function AdminStatsPage({ searchParams }: StatsPageProps) {
     );
   }
 
+  const trendSeries = trend.windows[trend.windows.length - 1]?.series ?? [];
+  const trendPeak = Math.max(...trendSeries.map((bucket) => Number(bucket.revenue)), 0);
+
   const dateFromInput = formatDateInput(dateFromParam);
   const dateToInput = formatDateInput(dateToParam);
 
@@ -121,6 +128,31 @@ export default async function AdminStatsPage({ searchParams }: StatsPageProps) {
           </div>
         </div>
 
+        <div className="stats-section">
+          <h2>Revenue trend ({trend.currency})</h2>
+          <div className="stats-cards">
+            {trend.windows.map((window) => (
+              <div key={window.buckets} className="stats-card">
+                <span>Last {window.buckets} days</span>
+                <strong>{window.totals.revenue}</strong>
+                <span>
+                  {window.totals.orders} orders, average {window.totals.average_order_value ?? "—"}
+                </span>
+              </div>
+            ))}
+          </div>
+          <div className="stats-chart">
+            {trendSeries.map((bucket) => (
+              <div
+                key={bucket.period_start}
+                className="stats-chart__bar"
+                title={`${bucket.period_start}: ${bucket.revenue} (${bucket.orders} orders)`}
+                style={{ height: `${trendPeak ? (Number(bucket.revenue) / trendPeak) * 100 : 0}%` }}
+              />
+            ))}
+          </div>
+        </div>
+
         <div className="stats-section">
           <h2>Totals by currency</h2>
           {stats.currency_breakdown.length === 0 ? (
@@ -74,7 +74,6 @@ export default function CartPage() {
                       Remove
                     </button>
                   </div>
-                  <p>{item.product.short_description}</p>
                   <div className="cart-item__actions">
                     <label>
                       Quantity
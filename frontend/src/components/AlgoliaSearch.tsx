@@ -14,6 +14,7 @@ import {
 import type { Hit } from "instantsearch.js";
 
 import { ALGOLIA_INDEX, getAlgoliaSearchClient } from "@/lib/algolia";
+import { searchLocally } from "@/lib/localSearch";
 
 type SearchHit = Hit<{
   name: string;
@@ -29,9 +30,6 @@ const MIN_QUERY_LENGTH = 2;
 
 function createSearchClient() {
   const baseClient = getAlgoliaSearchClient();
-  if (!baseClient) {
-    return null;
-  }
 
   return {
     ...baseClient,
@@ -57,7 +55,11 @@ function createSearchClient() {
         });
       }
 
-      return baseClient.search(requests);
+      if (!baseClient) {
+        return searchLocally(requests);
+      }
+      // Keep the dropdown working through Algolia outages.
+      return baseClient.search(requests).catch(() => searchLocally(requests));
     },
   };
 }
@@ -120,10 +122,6 @@ function SearchDropdown() {
 export function AlgoliaSearch() {
   const searchClient = useMemo(() => createSearchClient(), []);
 
-  if (!searchClient) {
-    return null;
-  }
-
   return (
     <InstantSearch searchClient={searchClient} indexName={ALGOLIA_INDEX}>
       <Configure {...({ hitsPerPage: 5 } as any)} />
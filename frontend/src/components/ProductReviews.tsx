@@ -9,7 +9,9 @@ import {
   createProductReview,
   deleteProductReview,
   fetchProductReviews,
+  fetchReviewHistogram,
   updateProductReview,
+  type ReviewHistogram,
 } from "@/lib/reviewApi";
 
 type ProductReviewsProps = {
@@ -134,8 +136,8 @@ export function ProductReviews({
   const { status: sessionStatus, data: session } = useSession();
   const [isAuthenticated, setIsAuthenticated] = useState(sessionStatus === "authenticated");
   const [reviews, setReviews] = useState<ProductReview[]>([]);
-  const [nextPage, setNextPage] = useState<number | null>(1);
-  const [totalCount, setTotalCount] = useState<number>(reviewsCount);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [histogram, setHistogram] = useState<ReviewHistogram | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [submitting, setSubmitting] = useState(false);
@@ -157,20 +159,19 @@ export function ProductReviews({
     setIsAuthenticated(sessionStatus === "authenticated");
   }, [sessionStatus]);
 
-  const hasMore = nextPage !== null;
+  const hasMore = nextCursor !== null;
 
   const loadReviews = useCallback(
-    async (page: number) => {
+    async (cursor: string | null) => {
       setLoading(true);
       setError(null);
       try {
-        const {
-          reviews: fetched,
-          nextPage: next,
-          totalCount: count,
-        } = await fetchProductReviews(productSlug, page);
+        const { reviews: fetched, nextCursor: next } = await fetchProductReviews(
+          productSlug,
+          cursor,
+        );
         setReviews((prev) => {
-          if (page === 1) {
+          if (cursor === null) {
             return fetched;
           }
           const existingIds = new Set(prev.map((review) => review.id));
@@ -182,8 +183,7 @@ export function ProductReviews({
           });
           return merged;
         });
-        setNextPage(next);
-        setTotalCount(count);
+        setNextCursor(next);
       } catch (err) {
         setError(err instanceof Error ? err.message : "Не удалось загрузить отзывы.");
       } finally {
@@ -194,9 +194,15 @@ export function ProductReviews({
   );
 
   useEffect(() => {
-    loadReviews(1).catch(() => undefined);
+    loadReviews(null).catch(() => undefined);
   }, [loadReviews]);
 
+  useEffect(() => {
+    fetchReviewHistogram(productSlug)
+      .then(setHistogram)
+      .catch(() => setHistogram(null));
+  }, [productSlug]);
+
   const canSubmitReview = useMemo(() => canReview, [canReview]);
 
   const resetForm = () => {
@@ -237,8 +243,6 @@ export function ProductReviews({
         }
         const created = await createProductReview(payload, accessToken);
         setReviews((prev) => [created, ...prev.filter((review) => review.id !== created.id)]);
-        setTotalCount((prev) => prev + 1);
-        setNextPage(nextPage ?? null);
         setFormVisible(false);
         setEditingReview(null);
         setForm({ ...initialFormState });
@@ -281,13 +285,13 @@ export function ProductReviews({
   };
 
   const handleLoadMore = () => {
-    if (nextPage && !loading) {
-      loadReviews(nextPage).catch(() => undefined);
+    if (nextCursor && !loading) {
+      loadReviews(nextCursor).catch(() => undefined);
     }
   };
 
-  const derivedAverage = averageRating ?? null;
-  const approvedCount = reviewsCount;
+  const derivedAverage = histogram?.average_rating ?? averageRating ?? null;
+  const approvedCount = histogram?.reviews_count ?? reviewsCount;
 
   return (
     <section className="product-reviews">
@@ -298,6 +302,22 @@ export function ProductReviews({
             ? `Средняя оценка ${derivedAverage?.toFixed(1) ?? "—"} ★ · Одобренных отзывов: ${approvedCount}`
             : "Пока нет одобренных отзывов"}
         </p>
+        {histogram && approvedCount > 0 && (
+          <ul className="product-reviews__histogram">
+            {[5, 4, 3, 2, 1].map((star) => {
+              const count = histogram.histogram[String(star)] ?? 0;
+              return (
+                <li key={star}>
+                  <span>{`${star} ★`}</span>
+                  <span className="product-reviews__bar">
+                    <span style={{ width: `${(count / approvedCount) * 100}%` }} />
+                  </span>
+                  <span>{count}</span>
+                </li>
+              );
+            })}
+          </ul>
+        )}
       </header>
 
       {error && <p className="product-reviews__error">{error}</p>}
@@ -58,3 +58,70 @@ export async function fetchStatsOverview(
 
   return response.json() as Promise<StatsOverview>;
 }
+
+export type StatsInterval = "day" | "week" | "month";
+
+export type StatsBucket = {
+  period_start: string;
+  orders: number;
+  revenue: string;
+  average_order_value: string | null;
+};
+
+export type StatsWindow = {
+  buckets: number;
+  date_from: string;
+  totals: {
+    orders: number;
+    revenue: string;
+    average_order_value: string | null;
+  };
+  series: StatsBucket[];
+};
+
+export type StatsTimeSeries = {
+  interval: StatsInterval;
+  currency: string;
+  windows: StatsWindow[];
+};
+
+type TimeSeriesParams = {
+  interval?: StatsInterval;
+  windows?: number[];
+  currency?: string;
+};
+
+export async function fetchStatsTimeSeries(
+  accessToken: string,
+  params: TimeSeriesParams = {},
+): Promise<StatsTimeSeries> {
+  const url = new URL("/api/stats/timeseries/", API_BASE_URL);
+  if (params.interval) {
+    url.searchParams.set("interval", params.interval);
+  }
+  if (params.windows?.length) {
+    url.searchParams.set("windows", params.windows.join(","));
+  }
+  if (params.currency) {
+    url.searchParams.set("currency", params.currency);
+  }
+
+  const response = await fetch(url.toString(), {
+    headers: {
+      Accept: "application/json",
+      Authorization: `Bearer ${accessToken}`,
+    },
+    cache: "no-store",
+  });
+
+  if (response.status === 401 || response.status === 403) {
+    throw new Error("Unauthorized");
+  }
+
+  if (!response.ok) {
+    const payload = await response.text();
+    throw new Error(payload || "Failed to load statistics.");
+  }
+
+  return response.json() as Promise<StatsTimeSeries>;
+}
@@ -4,7 +4,9 @@ export function getAlgoliaSearchClient() {
   const appId = process.env.NEXT_PUBLIC_ALGOLIA_APP_ID;
   const searchKey = process.env.NEXT_PUBLIC_ALGOLIA_SEARCH_API_KEY;
   if (!appId || !searchKey) {
-    console.warn("Algolia environment variables are missing. Search will be disabled.");
+    console.warn(
+      "Algolia environment variables are missing. Falling back to the local search API.",
+    );
     return null;
   }
   return algoliasearch(appId, searchKey);
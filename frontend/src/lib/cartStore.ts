@@ -14,12 +14,9 @@ type ProductSummary = {
   id: number;
   name: string;
   slug: string;
-  sku: string;
-  short_description: string;
   price: string;
   currency: string;
-  stock: number;
-  images: ProductImage[];
+  main_image: ProductImage | null;
 };
 
 export type CartItem = {
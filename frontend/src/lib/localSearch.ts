@@ -0,0 +1,47 @@
+import { API_BASE_URL } from "@/lib/config";
+
+type SearchRequest = {
+  indexName?: string;
+  params?: { query?: string; hitsPerPage?: number };
+};
+
+type AutocompleteResponse = {
+  hits: Record<string, unknown>[];
+  nbHits: number;
+  processingTimeMS: number;
+};
+
+const DEFAULT_HITS_PER_PAGE = 5;
+
+async function searchOne({ params }: SearchRequest) {
+  const query = (params?.query ?? "").trim();
+  const hitsPerPage = params?.hitsPerPage ?? DEFAULT_HITS_PER_PAGE;
+  const search = new URLSearchParams({ q: query, limit: String(hitsPerPage) });
+
+  const response = await fetch(`${API_BASE_URL}/api/products/autocomplete/?${search}`);
+  if (!response.ok) {
+    throw new Error(`Local search failed with status ${response.status}`);
+  }
+  const data = (await response.json()) as AutocompleteResponse;
+  return {
+    hits: data.hits,
+    nbHits: data.nbHits,
+    page: 0,
+    nbPages: data.nbHits ? 1 : 0,
+    hitsPerPage,
+    exhaustiveNbHits: true,
+    query,
+    params: "",
+    processingTimeMS: data.processingTimeMS,
+  };
+}
+
+/**
+ * Answers InstantSearch requests from the backend's in-process index
+ * (`/api/products/autocomplete/`), used when Algolia is not configured or
+ * unreachable. Responses mimic Algolia's multi-query result shape.
+ */
+export async function searchLocally(requests: SearchRequest[]) {
+  const results = await Promise.all(requests.map(searchOne));
+  return { results };
+}
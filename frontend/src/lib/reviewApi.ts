@@ -6,18 +6,23 @@ type ReviewsResponse = {
   results: ProductReview[];
   next: string | null;
   previous: string | null;
-  count: number;
+};
+
+export type ReviewHistogram = {
+  product: number;
+  reviews_count: number;
+  average_rating: number | null;
+  histogram: Record<string, number>;
 };
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 
-function parseNextPage(next: string | null): number | null {
+function parseNextCursor(next: string | null): string | null {
   if (!next) {
     return null;
   }
   try {
-    const pageParam = new URL(next, API_BASE).searchParams.get("page");
-    return pageParam ? Number(pageParam) : null;
+    return new URL(next, API_BASE).searchParams.get("cursor");
   } catch {
     return null;
   }
@@ -37,15 +42,17 @@ async function handleResponse<T>(response: Response): Promise<T> {
 
 export async function fetchProductReviews(
   productSlug: string,
-  page = 1,
+  cursor: string | null = null,
 ): Promise<{
   reviews: ProductReview[];
-  nextPage: number | null;
-  totalCount: number;
+  nextCursor: string | null;
 }> {
   const url = new URL("/api/reviews/", API_BASE);
-  url.searchParams.set("page", String(page));
+  url.searchParams.set("pagination", "cursor");
   url.searchParams.set("product_slug", productSlug);
+  if (cursor) {
+    url.searchParams.set("cursor", cursor);
+  }
 
   const response = await fetch(url.toString(), {
     headers: { Accept: "application/json" },
@@ -55,11 +62,20 @@ export async function fetchProductReviews(
   const data = await handleResponse<ReviewsResponse>(response);
   return {
     reviews: data.results,
-    nextPage: parseNextPage(data.next),
-    totalCount: data.count ?? data.results.length,
+    nextCursor: parseNextCursor(data.next),
   };
 }
 
+export async function fetchReviewHistogram(productSlug: string): Promise<ReviewHistogram> {
+  const url = new URL("/api/reviews/histogram/", API_BASE);
+  url.searchParams.set("product_slug", productSlug);
+  const response = await fetch(url.toString(), {
+    headers: { Accept: "application/json" },
+    cache: "no-store",
+  });
+  return handleResponse<ReviewHistogram>(response);
+}
+
 type ReviewPayload = {
   product_id: number;
   rating: number;